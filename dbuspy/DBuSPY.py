@@ -1,4 +1,9 @@
+from . import cache
+from . import startup
+from . import store
 from . import utils
+import asyncio
+import bisect
 import dbus_fast.aio
 import os
 import rich.text
@@ -10,9 +15,21 @@ import textual.css.query
 import textual.message
 import textual.reactive
 import textual.screen
+import textual.timer
 import textual.widgets
+import textual.widgets.data_table
+import textual.widgets.tree
+import textual.worker
 import typing
 
+# NOTE:
+# Modules of features used on demand only are imported where used, to keep
+# startup fast.
+if typing.TYPE_CHECKING:
+    from . import crawler
+    from . import properties
+    from . import search
+
 
 class DBuSPY(textual.app.App):
     """A Textual app like d-feet."""
@@ -21,6 +38,18 @@ class DBuSPY(textual.app.App):
         textual.binding.Binding("escape,q", "quit", "Quit"),
     ]
 
+    def __init__(self, capture_path: typing.Optional[str] = None):
+        super().__init__()
+        # NOTE: Capture to browse on top of the buses once started.
+        self.capture_path = capture_path
+
+    def on_mount(self):
+        self.call_after_refresh(startup.mark, "first frame")
+        if self.capture_path != None:
+            from . import browser
+
+            self.push_screen(browser.CaptureScreen(self.capture_path))
+
     def compose(self) -> textual.app.ComposeResult:
         yield textual.widgets.Header()
         yield textual.widgets.Footer()
@@ -28,99 +57,226 @@ class DBuSPY(textual.app.App):
 
 
 class MainPage(textual.containers.Container):
+    BUS_TYPES = {
+        "session": dbus_fast.constants.BusType.SESSION,
+        "system": dbus_fast.constants.BusType.SYSTEM,
+    }
+
     message_buses = textual.reactive.reactive[
         typing.Optional[dict[str, dbus_fast.aio.message_bus.MessageBus]]
     ](None)
 
+    def __init__(self):
+        super().__init__()
+        self.pending_buses: set[str] = set()
+        self.add_panes_lock = asyncio.Lock()
+
     def on_mount(self):
         self.loading = True
         self.add_buses()
 
-    @textual.work()
-    async def add_buses(self):
-        message_buses = {}
-
-        # NOTE: root user doesn't have session bus
-        if os.getuid() != 0:
-            message_buses["session"] = (
-                await dbus_fast.aio.message_bus.MessageBus(
-                    bus_type=dbus_fast.constants.BusType.SESSION
-                ).connect()
-            )
-
-        message_buses["system"] = await dbus_fast.aio.message_bus.MessageBus(
-            bus_type=dbus_fast.constants.BusType.SYSTEM
-        ).connect()
-
-        self.set_reactive(MainPage.message_buses, message_buses)
-        self.mutate_reactive(MainPage.message_buses)
+    def add_buses(self):
+        for id in self.BUS_TYPES:
+            # NOTE: root user doesn't have session bus
+            if id == "session" and os.getuid() == 0:
+                continue
 
-        self.loading = False
+            self.pending_buses.add(id)
+            self.add_bus(id)
 
-    @textual.work(exclusive=True, group="watch_message_buses")
+    # NOTE:
+    # Buses are connected concurrently, and each one gets its tab as soon as
+    # it is ready, so that a slow handshake does not hold the others back.
+    @textual.work()
+    async def add_bus(self, id: str):
+        try:
+            bus = await dbus_fast.aio.message_bus.MessageBus(
+                bus_type=self.BUS_TYPES[id]
+            ).connect()
+        except Exception as e:
+            self.log.error("Failed to connect to", id, "bus:", e)
+            self.notify(
+                f"Failed to connect to {id} bus: {e}",
+                severity="error",
+            )
+        else:
+            startup.mark(f"connect {id} bus")
+
+            if self.message_buses == None:
+                self.set_reactive(MainPage.message_buses, {})
+            self.message_buses[id] = bus
+            self.mutate_reactive(MainPage.message_buses)
+        finally:
+            self.pending_buses.discard(id)
+            if self.message_buses != None or not self.pending_buses:
+                self.loading = False
+
+    # NOTE:
+    # Not exclusive, as cancelling a worker adding a pane of a bus which has
+    # just been connected would lose that pane.
+    @textual.work(group="watch_message_buses")
     async def watch_message_buses(self):
         if self.message_buses == None:
             return
 
         self.log.info("Update message buses to", self.message_buses)
 
+        async with self.add_panes_lock:
+            await self.add_panes()
+
+    async def add_panes(self):
+        tabbed_content = self.query_one(textual.widgets.TabbedContent)
+
         for id, bus in self.message_buses.items():
             try:
-                self.query_one(textual.widgets.TabbedContent).get_pane(id)
+                tabbed_content.get_pane(id)
             except textual.css.query.NoMatches:
-                await self.query_one(textual.widgets.TabbedContent).add_pane(
-                    textual.widgets.TabPane(id, BusPane(bus), id=id)
-                )
+                pass
+            else:
+                continue
+
+            # NOTE: Keep tabs in the order of BUS_TYPES.
+            ids = list(self.BUS_TYPES)
+            before = None
+            for other in ids[ids.index(id) + 1 :]:
+                try:
+                    before = tabbed_content.get_pane(other)
+                except textual.css.query.NoMatches:
+                    continue
+                break
+
+            await tabbed_content.add_pane(
+                textual.widgets.TabPane(id, BusPane(bus, id), id=id),
+                before=before,
+            )
+
+            from . import bustop
+
+            # NOTE: Tabs of bus-top come after the ones of the buses.
+            before = None
+            for other in ids[ids.index(id) + 1 :]:
+                try:
+                    before = tabbed_content.get_pane(other + "-top")
+                except textual.css.query.NoMatches:
+                    continue
+                break
+
+            await tabbed_content.add_pane(
+                textual.widgets.TabPane(
+                    id + " top",
+                    bustop.BusTopPane(
+                        utils.get_bus_address(self.BUS_TYPES[id])
+                    ),
+                    id=id + "-top",
+                ),
+                before=before,
+            )
 
     def compose(self) -> textual.app.ComposeResult:
         yield textual.widgets.TabbedContent()
 
 
+class MoreObjects:
+    """Data of the placeholder node standing for children of path which are
+    not shown, before or after the shown ones."""
+
+    def __init__(self, path: str, before: bool):
+        self.path = path
+        self.before = before
+
+
+class PrefixScreen(textual.screen.ModalScreen[str]):
+    DEFAULT_CSS = """
+    PrefixScreen {
+        align: center middle;
+    }
+    PrefixScreen > Input {
+        width: 60%;
+    }
+    """
+    BINDINGS = [
+        textual.binding.Binding("escape", "app.pop_screen", "Close"),
+    ]
+
+    def compose(self) -> textual.app.ComposeResult:
+        yield textual.widgets.Input(placeholder="Jump to child name prefix")
+
+    def on_input_submitted(self, event: textual.widgets.Input.Submitted):
+        self.dismiss(event.value)
+
+
 class ObjectsTree(textual.widgets.Tree):
+    """The object tree of a service.
+
+    Children of an expanded object are listed from its introspection, but
+    only a window of at most PAGE_SIZE of them gets nodes, and only objects
+    scrolled into view are introspected to tell whether they have children.
+    """
+
+    BINDINGS = [
+        textual.binding.Binding("g", "jump_to_prefix", "Jump to prefix"),
+    ]
+
+    PAGE_SIZE = 256
+
     def __init__(
         self,
-        bus: dbus_fast.aio.message_bus.MessageBus,
+        introspection_cache: cache.IntrospectionCache,
         service: str,
         introspection: dbus_fast.introspection.Node,
+        introspect_concurrency: int = 16,
     ):
         super().__init__("/", introspection)
 
-        self.bus = bus
+        self.introspection_cache = introspection_cache
         self.service = service
+        self.introspect_concurrency = introspect_concurrency
         self.guide_depth = 2
 
+        self.owner: typing.Optional[str] = None
+        self.managed_objects: dict[str, utils.ManagedObjects] = {}
+        self.nodes_by_path: dict[
+            str, textual.widgets.tree.TreeNode[dbus_fast.introspection.Node]
+        ] = {"/": self.root}
+        self.loaded_paths: set[str] = set()
+        # NOTE:
+        # Paths whose node data is their own introspection, or what their
+        # ObjectManager tells about them, rather than the bare child entry
+        # found in the introspection of their parent.
+        self.resolved_paths: set[str] = {"/"}
+
+        # NOTE:
+        # Sorted names of the children of loaded paths, the [start, end)
+        # window of them which have nodes, and the placeholder nodes before
+        # and after that window.
+        self.child_names: dict[str, list[str]] = {}
+        self.windows: dict[str, list[int]] = {}
+        self.placeholders: dict[
+            str, list[typing.Optional[textual.widgets.tree.TreeNode]]
+        ] = {}
+
         if not len(introspection.nodes):
             self.root.allow_expand = False
             return
 
         self.root.expand()
 
-    @textual.work()
-    async def on_tree_node_expanded(
-        self,
-        event: textual.widgets.Tree.NodeExpanded,
-    ):
-        if event.node.children:
-            if len(event.node.children) != 1:
-                return
-            event.node.children[0].expand()
+    def on_unmount(self):
+        if not self.managed_objects:
             return
 
-        introspection = event.node.data
-        assert isinstance(introspection, dbus_fast.introspection.Node)
-        list.sort(introspection.nodes, key=lambda node: node.name)
-
-        child_node = None
-
-        for child in introspection.nodes:
-            assert isinstance(child, dbus_fast.introspection.Node)
-            assert child.name is not None
-            path = utils.get_textual_tree_node_path(event.node) + child.name
-
-            child_introspection = None
+        self.introspection_cache.bus.remove_message_handler(
+            self.on_object_manager_signal
+        )
 
+    async def introspect_child(
+        self,
+        semaphore: asyncio.Semaphore,
+        path: str,
+    ) -> tuple[str, typing.Optional[dbus_fast.introspection.Node]]:
+        async with semaphore:
             try:
-                child_introspection = await self.bus.introspect(
+                return path, await self.introspection_cache.introspect(
                     self.service,
                     path,
                 )
@@ -133,510 +289,560 @@ class ObjectsTree(textual.widgets.Tree):
                     "failed, maybe object has been removed:",
                     e,
                 )
+                return path, None
 
-            if child_introspection == None:
-                continue
+    async def get_managed_objects(
+        self,
+        path: str,
+        introspection: dbus_fast.introspection.Node,
+    ) -> typing.Optional[utils.ManagedObjects]:
+        for managed_objects in self.managed_objects.values():
+            if managed_objects.contains(path):
+                return managed_objects
+
+        if not any(
+            interface.name == "org.freedesktop.DBus.ObjectManager"
+            for interface in introspection.interfaces
+        ):
+            return None
 
-            self.log.debug(
-                "Introspect D-Bus service",
-                self.service,
-                "at object path",
+        try:
+            if self.owner is None:
+                await self.introspection_cache.subscribe()
+                self.owner = await self.introspection_cache.get_owner(
+                    self.service
+                )
+
+            objects = await utils.get_dbus_managed_objects(
+                self.introspection_cache.bus, self.owner, path
+            )
+        except Exception as e:
+            self.log.info(
+                "get managed objects at",
                 path,
-                "result:",
-                child_introspection.tostring(),
+                "of",
+                self.service,
+                "failed, fallback to introspection:",
+                e,
             )
+            return None
 
-            child_node = event.node.add(
-                child.name,
-                child_introspection,
-                allow_expand=len(child_introspection.nodes) > 0,
-            )
+        managed_objects = utils.ManagedObjects(path)
+        for object_path, interfaces in objects.items():
+            managed_objects.add(object_path, interfaces.keys())
 
-        if len(introspection.nodes) != 1:
-            return
+        if not self.managed_objects:
+            self.introspection_cache.bus.add_message_handler(
+                self.on_object_manager_signal
+            )
 
-        if child_node is None:
-            return
+        self.managed_objects[path] = managed_objects
 
-        child_node.expand()
+        return managed_objects
 
+    def get_child_introspection(
+        self, parent_path: str, name: str
+    ) -> dbus_fast.introspection.Node:
+        """Returns what is known about a child of a loaded path without
+        introspecting it."""
 
-class UpdateServices(textual.message.Message):
-    pass
+        path = utils.join_object_path(parent_path, name)
+        for managed_objects in self.managed_objects.values():
+            if managed_objects.contains(path):
+                self.resolved_paths.add(path)
+                return managed_objects.get_introspection(path)
 
+        # NOTE:
+        # Names of children might span several path components, as the ones
+        # listed by dbus-daemon do.
+        parent = self.nodes_by_path[parent_path]
 
-class UpdateObjectsTree(textual.message.Message):
-    pass
+        assert isinstance(parent.data, dbus_fast.introspection.Node)
+        for child in parent.data.nodes:
+            if child.name == name:
+                return child
 
+        return dbus_fast.introspection.Node(name, is_root=False)
 
-class MemberSelected(textual.message.Message):
-    def __init__(
+    def add_child_node(
         self,
-        interface_name: str,
-        member_name: str,
-    ):
-        self.interface_name = interface_name
-        self.member_name = member_name
-        super().__init__()
+        parent_path: str,
+        name: str,
+        before: typing.Optional[textual.widgets.tree.TreeNode] = None,
+    ) -> textual.widgets.tree.TreeNode[dbus_fast.introspection.Node]:
+        path = utils.join_object_path(parent_path, name)
+        introspection = self.get_child_introspection(parent_path, name)
+
+        # NOTE:
+        # Objects not resolved yet might have children, the expander is
+        # dropped once they are known not to.
+        node = self.nodes_by_path[parent_path].add(
+            name,
+            introspection,
+            before=before,
+            allow_expand=len(introspection.nodes) > 0
+            or path not in self.resolved_paths,
+        )
+        self.nodes_by_path[path] = node
 
+        return node
 
-class MethodDetails(textual.containers.Container):
-    DEFAULT_CSS = """
-    MethodDetails {
-        height: auto;
-    }
-    MethodDetails > Label {
-        padding-bottom: 1;
-    }
-    MethodDetails > HorizontalScroll {
-        height: auto;
-    }
-    MethodDetails > HorizontalScroll > Label {
-        width: 1fr;
-        height: 100%;
-        content-align: center middle;
-    }
-    MethodDetails > HorizontalScroll > TextArea {
-        width: 4fr;
-        height: auto;
-    }
-    MethodDetails > Collapsible > Contents {
-        height: auto;
-    }
-    MethodDetails > Collapsible > Contents > HorizontalScroll {
-        height: auto;
-    }
-    MethodDetails > Collapsible > Contents > HorizontalScroll > Label {
-        width: auto;
-        margin-right: 2;
-        height: 100%;
-        content-align: center middle;
-    }
-    """
+    def update_placeholders(self, path: str):
+        parent = self.nodes_by_path[path]
+        names = self.child_names[path]
+        start, end = self.windows[path]
+        placeholders = self.placeholders.setdefault(path, [None, None])
 
-    def __init__(
-        self,
-        service: str,
-        path: str,
-        interface: str,
-        introspection: dbus_fast.introspection.Method,
-    ):
-        self.service = service
-        self.path = path
-        self.interface = interface
-        self.introspection = introspection
-        super().__init__()
+        for index, count in ((0, start), (1, len(names) - end)):
+            placeholder = placeholders[index]
 
-    def compose(self) -> textual.app.ComposeResult:
-        if self.introspection.annotations:
+            if count == 0:
+                if placeholder is not None:
+                    placeholder.remove()
+                    placeholders[index] = None
+                continue
 
-            yield textual.widgets.Label(
-                rich.text.Text("Annotation(s)", style="bold")
+            label = rich.text.Text(
+                f"… {count} more" if index else f"… {count} before",
+                style="dim",
             )
-            for key, value in self.introspection.annotations.items():
-                with textual.widgets.Collapsible(
-                    title=key,
-                ):
-                    yield textual.widgets.Label(value)
 
-            yield textual.widgets.Rule()
+            if placeholder is not None:
+                placeholder.set_label(label)
+                continue
 
-        if self.introspection.in_args:
+            if index == 0 and parent.children:
+                placeholder = parent.add(
+                    label,
+                    MoreObjects(path, True),
+                    before=0,
+                    allow_expand=False,
+                )
+            else:
+                placeholder = parent.add(
+                    label,
+                    MoreObjects(path, index == 0),
+                    allow_expand=False,
+                )
+            placeholders[index] = placeholder
 
-            yield textual.widgets.Label(
-                rich.text.Text("Input(s)", style="bold")
-            )
+    def show_window(self, path: str, start: int):
+        """Replaces the children of path by a page starting from start."""
 
-            for index, arg in enumerate(self.introspection.in_args):
-                with textual.containers.HorizontalScroll():
-                    yield textual.widgets.Label(
-                        arg.name or "arg_" + str(index),
-                    )
-                    yield textual.widgets.Label(str(arg.signature))
-                    yield textual.widgets.TextArea(
-                        tab_behavior="indent",
-                        soft_wrap=False,
-                    )
-                if arg.annotations:
-                    with textual.widgets.Collapsible(
-                        title="Annotation(s) of "
-                        + (arg.name or "arg_" + str(index)),
-                    ):
-                        table = textual.widgets.DataTable(show_header=False)
-                        yield table
-                        table.add_column("Key")
-                        table.add_column("Value")
-                        for key, value in arg.annotations.items():
-                            table.add_row(key, value)
-
-            yield textual.widgets.Rule()
-
-        yield textual.widgets.Label(rich.text.Text("Operations", style="bold"))
-
-        with textual.containers.HorizontalScroll():
-            yield textual.widgets.Button("Execute")
-            yield textual.widgets.Button("Monitor")
-
-        yield textual.widgets.Rule()
-
-        if self.introspection.out_args:
-
-            yield textual.widgets.Label(
-                rich.text.Text("Output(s)", style="bold")
-            )
+        names = self.child_names[path]
+        start = max(min(start, len(names) - self.PAGE_SIZE), 0)
+        end = min(start + self.PAGE_SIZE, len(names))
 
-            for index, arg in enumerate(self.introspection.out_args):
-                with textual.containers.HorizontalScroll():
-                    yield textual.widgets.Label(
-                        arg.name or "arg_" + str(index),
-                    )
-                    yield textual.widgets.Label(str(arg.signature))
-                    yield textual.widgets.TextArea(
-                        soft_wrap=False,
-                        read_only=True,
-                    )
-
-            yield textual.widgets.Rule()
-
-        yield textual.widgets.Label(
-            rich.text.Text("Utilities", style="bold"),
-        )
+        for descendant in list(self.nodes_by_path):
+            if descendant != path and descendant.startswith(
+                path.rstrip("/") + "/"
+            ):
+                self.forget_path(descendant)
 
-        with textual.widgets.Collapsible(
-            title="Generate method call command",
-            collapsed=True,
-        ):
-            with textual.containers.HorizontalScroll():
-                yield textual.widgets.Button("dbus-send")
-                yield textual.widgets.Button("gdbus")
-                yield textual.widgets.Button("qdbus")
-                yield textual.widgets.Button("busctl")
-
-        with textual.widgets.Collapsible(
-            title="Generate monitor command",
-            collapsed=True,
-        ):
-            with textual.containers.HorizontalScroll():
-                yield textual.widgets.Button("dbus-send")
-                yield textual.widgets.Button("gdbus")
-                yield textual.widgets.Button("qdbus")
-                yield textual.widgets.Button("busctl")
+        self.nodes_by_path[path].remove_children()
+        self.placeholders.pop(path, None)
+        self.windows[path] = [start, end]
 
+        for name in names[start:end]:
+            self.add_child_node(path, name)
 
-class SignalDetails(textual.containers.Container):
+        self.update_placeholders(path)
+        self.call_after_refresh(self.introspect_visible)
 
-    DEFAULT_CSS = """
-    SignalDetails {
-        height: auto;
-    }
-    SignalDetails > Label {
-        padding-bottom: 1;
-    }
-    SignalDetails > HorizontalScroll {
-        height: auto;
-    }
-    SignalDetails > HorizontalScroll > Label {
-        width: 1fr;
-        height: 100%;
-        content-align: center middle;
-    }
-    SignalDetails > Collapsible > Contents {
-        height: auto;
-    }
-    SignalDetails > Collapsible > Contents > HorizontalScroll {
-        height: auto;
-    }
-    SignalDetails > Collapsible > Contents > HorizontalScroll > Label {
-        width: auto;
-        margin-right: 2;
-        height: 100%;
-        content-align: center middle;
-    }
-    """
+    def extend_window(self, path: str, before: bool):
+        names = self.child_names[path]
+        window = self.windows[path]
+        placeholders = self.placeholders[path]
 
-    def __init__(
+        if before:
+            start = max(window[0] - self.PAGE_SIZE, 0)
+            anchor = self.nodes_by_path.get(
+                utils.join_object_path(path, names[window[0]])
+            )
+            for name in names[start : window[0]]:
+                self.add_child_node(path, name, before=anchor)
+            window[0] = start
+        else:
+            end = min(window[1] + self.PAGE_SIZE, len(names))
+            for name in names[window[1] : end]:
+                self.add_child_node(path, name, before=placeholders[1])
+            window[1] = end
+
+        self.update_placeholders(path)
+        self.call_after_refresh(self.introspect_visible)
+
+    def forget_path(self, path: str):
+        self.nodes_by_path.pop(path, None)
+        self.loaded_paths.discard(path)
+        self.resolved_paths.discard(path)
+        self.child_names.pop(path, None)
+        self.windows.pop(path, None)
+        self.placeholders.pop(path, None)
+
+    def add_object_node(
         self,
-        service: str,
         path: str,
-        interface: str,
-        introspection: dbus_fast.introspection.Signal,
-    ):
-        self.service = service
-        self.path = path
-        self.interface = interface
-        self.introspection = introspection
-        super().__init__()
-
-    def compose(self) -> textual.app.ComposeResult:
-        if self.introspection.annotations:
+        introspection: dbus_fast.introspection.Node,
+    ) -> typing.Optional[
+        textual.widgets.tree.TreeNode[dbus_fast.introspection.Node]
+    ]:
+        parent_path = utils.get_object_path_parent(path)
+        name = path.rsplit("/", 1)[1]
+        parent = self.nodes_by_path[parent_path]
+
+        # NOTE:
+        # The last child of the parent may have been removed before, or its
+        # children may not be listed yet. List them on next expansion.
+        parent.allow_expand = True
+        names = self.child_names.get(parent_path)
+        if names is None:
+            self.loaded_paths.discard(parent_path)
+            return None
+
+        window = self.windows[parent_path]
+
+        index = bisect.bisect_left(names, name)
+        if index < len(names) and names[index] == name:
+            return self.nodes_by_path.get(path)
+
+        names.insert(index, name)
+
+        # NOTE:
+        # Objects sorted out of the shown window only update the count of
+        # their placeholder.
+        if index < window[0] or (
+            index >= window[1] and window[1] != len(names) - 1
+        ):
+            if index < window[0]:
+                window[0] += 1
+                window[1] += 1
+            self.update_placeholders(parent_path)
+            return None
+
+        window[1] += 1
+
+        before = None
+        if index + 1 < window[1]:
+            before = self.nodes_by_path[
+                utils.join_object_path(parent_path, names[index + 1])
+            ]
+        else:
+            before = self.placeholders[parent_path][1]
+
+        self.resolved_paths.add(path)
+        node = parent.add(
+            name,
+            introspection,
+            before=before,
+            allow_expand=len(introspection.nodes) > 0,
+        )
+        self.nodes_by_path[path] = node
+        return node
+
+    def remove_object_node(self, path: str):
+        parent_path = utils.get_object_path_parent(path)
+        names = self.child_names.get(parent_path)
+        if names is not None:
+            name = path.rsplit("/", 1)[1]
+            index = bisect.bisect_left(names, name)
+            if index < len(names) and names[index] == name:
+                del names[index]
+                window = self.windows[parent_path]
+                if index < window[0]:
+                    window[0] -= 1
+                if index < window[1]:
+                    window[1] -= 1
+                self.update_placeholders(parent_path)
+
+        node = self.nodes_by_path.get(path)
+        if node is None:
+            return
 
-            yield textual.widgets.Label(
-                rich.text.Text("Annotation(s)", style="bold")
-            )
-            for key, value in self.introspection.annotations.items():
-                with textual.widgets.Collapsible(
-                    title=key,
-                ):
-                    yield textual.widgets.Label(value)
+        for descendant in list(self.nodes_by_path):
+            if descendant == path or descendant.startswith(path + "/"):
+                self.forget_path(descendant)
 
-            yield textual.widgets.Rule()
+        parent = node.parent
+        node.remove()
 
-        if self.introspection.args:
+        if parent is not None and not parent.children:
+            parent.allow_expand = False
 
-            table = textual.widgets.DataTable(cursor_type="row")
-            yield table
-            table.add_columns("Name", "Signature")
+    def on_object_manager_signal(self, message: dbus_fast.Message):
+        if (
+            message.message_type != dbus_fast.MessageType.SIGNAL
+            or message.interface != "org.freedesktop.DBus.ObjectManager"
+            or message.sender != self.owner
+        ):
+            return
 
-            for index, arg in enumerate(self.introspection.args):
-                table.add_row(
-                    arg.name or "arg_" + str(index), str(arg.signature)
-                )
+        # NOTE:
+        # Some implementations emit these signals from the path of the object
+        # instead of the path of the object manager.
+        managed_objects = None
+        for candidate in self.managed_objects.values():
+            if not candidate.is_ancestor_of(message.body[0]):
+                continue
+            if managed_objects and len(managed_objects.path) > len(
+                candidate.path
+            ):
+                continue
+            managed_objects = candidate
 
-            yield textual.widgets.Rule()
+        if managed_objects is None:
+            return
 
-        yield textual.widgets.Label(rich.text.Text("Operations", style="bold"))
+        if message.member == "InterfacesAdded":
+            path, interfaces = message.body
+            path = managed_objects.add(path, interfaces.keys())
+            if path is None:
+                return
 
-        with textual.containers.HorizontalScroll():
-            yield textual.widgets.Button("Listen")
+            parent_path = utils.get_object_path_parent(path)
+            parent = self.nodes_by_path.get(parent_path)
+            if parent is None:
+                return
 
-        yield textual.widgets.Rule()
+            if parent_path not in self.loaded_paths:
+                parent.allow_expand = True
+                return
 
-        yield textual.widgets.Label(
-            rich.text.Text("Utilities", style="bold"),
-        )
+            self.add_object_node(
+                path, managed_objects.get_introspection(path)
+            )
+            return
 
-        with textual.widgets.Collapsible(
-            title="Generate monitor command",
-            collapsed=True,
-        ):
-            with textual.containers.HorizontalScroll():
-                yield textual.widgets.Button("dbus-send")
-                yield textual.widgets.Button("gdbus")
-                yield textual.widgets.Button("qdbus")
-                yield textual.widgets.Button("busctl")
+        if message.member == "InterfacesRemoved":
+            path, interfaces = message.body
+            path = managed_objects.remove(path, interfaces)
+            if path is None:
+                return
 
+            self.remove_object_node(path)
+            return
 
-class PropertyDetails(textual.containers.Container):
+    def get_node_path(
+        self, node: textual.widgets.tree.TreeNode
+    ) -> typing.Optional[str]:
+        if not isinstance(node.data, dbus_fast.introspection.Node):
+            return None
+
+        path = utils.get_textual_tree_node_path(node)
+        if len(path) != 1:
+            path = path[:-1]
+        return path
+
+    async def resolve(
+        self, path: str
+    ) -> typing.Optional[dbus_fast.introspection.Node]:
+        node = self.nodes_by_path[path]
+        if path in self.resolved_paths:
+            assert isinstance(node.data, dbus_fast.introspection.Node)
+            return node.data
+
+        _, introspection = await self.introspect_child(
+            asyncio.Semaphore(), path
+        )
+        if self.nodes_by_path.get(path) is not node:
+            return None
 
-    DEFAULT_CSS = """
-    PropertyDetails {
-        height: auto;
-    }
-    PropertyDetails > HorizontalScroll {
-        height: auto;
-    }
-    PropertyDetails > Label {
-        padding-bottom: 1;
-    }
-    PropertyDetails > TextArea {
-        height: auto;
-    }
-    PropertyDetails > Collapsible > Contents {
-        height: auto;
-    }
-    PropertyDetails > Collapsible > Contents > HorizontalScroll {
-        height: auto;
-    }
-    """
+        self.set_introspection(path, introspection)
+        return introspection
 
-    def __init__(
+    def set_introspection(
         self,
-        service: str,
         path: str,
-        interface: str,
-        introspection: dbus_fast.introspection.Property,
+        introspection: typing.Optional[dbus_fast.introspection.Node],
     ):
-        self.service = service
-        self.path = path
-        self.interface = interface
-        self.introspection = introspection
-        super().__init__()
-
-    def compose(self) -> textual.app.ComposeResult:
-        if self.introspection.annotations:
+        if introspection == None:
+            # NOTE:
+            # Introspection fails mostly for objects removed since listed.
+            self.remove_object_node(path)
+            return
 
-            yield textual.widgets.Label(
-                rich.text.Text("Annotation(s)", style="bold")
-            )
-            for key, value in self.introspection.annotations.items():
-                with textual.widgets.Collapsible(
-                    title=key,
-                ):
-                    yield textual.widgets.Label(value)
+        node = self.nodes_by_path[path]
+        node.data = introspection
+        self.resolved_paths.add(path)
 
-            yield textual.widgets.Rule()
+        if not introspection.nodes and not any(
+            managed_objects.children.get(path)
+            for managed_objects in self.managed_objects.values()
+        ):
+            node.allow_expand = False
+
+    def watch_scroll_y(self, old_value: float, new_value: float) -> None:
+        super().watch_scroll_y(old_value, new_value)
+        self.introspect_visible()
+
+    def on_resize(self):
+        self.introspect_visible()
+
+    @textual.work(exclusive=True, group="introspect_visible")
+    async def introspect_visible(self):
+        # NOTE: Wait for scrolling to settle.
+        await asyncio.sleep(0.05)
+
+        paths = []
+        top = int(self.scroll_y)
+        for line in range(top, top + self.size.height):
+            node = self.get_node_at_line(line)
+            if node is None:
+                break
+            path = self.get_node_path(node)
+            if path is None or path in self.resolved_paths:
+                continue
+            paths.append(path)
 
-        yield textual.widgets.Label(
-            rich.text.Text("Value", style="bold"),
-        )
+        if not paths:
+            return
 
-        yield textual.widgets.TextArea()
+        semaphore = asyncio.Semaphore(self.introspect_concurrency)
+        tasks = [
+            asyncio.create_task(self.introspect_child(semaphore, path))
+            for path in paths
+        ]
 
-        yield textual.widgets.Rule()
+        try:
+            for future in asyncio.as_completed(tasks):
+                path, introspection = await future
+                if path not in self.nodes_by_path:
+                    continue
 
-        yield textual.widgets.Label(
-            rich.text.Text("Operations", style="bold"),
-        )
+                self.set_introspection(path, introspection)
+        finally:
+            for task in tasks:
+                task.cancel()
 
-        with textual.containers.HorizontalScroll():
-            yield textual.widgets.Button("Get")
-            yield textual.widgets.Button("Set")
-            yield textual.widgets.Button("Monitor")
+    def on_tree_node_selected(self, event: textual.widgets.Tree.NodeSelected):
+        if not isinstance(event.node.data, MoreObjects):
+            return
 
-        yield textual.widgets.Rule()
+        event.stop()
+        self.extend_window(event.node.data.path, event.node.data.before)
 
-        yield textual.widgets.Label(
-            rich.text.Text("Utilities", style="bold"),
-        )
+    def action_jump_to_prefix(self):
+        node = self.cursor_node
+        if node is None or node.parent is None:
+            return
 
-        with textual.widgets.Collapsible(
-            title="Generate command to get property",
-            collapsed=True,
-        ):
-            with textual.containers.HorizontalScroll():
-                yield textual.widgets.Button("dbus-send")
-                yield textual.widgets.Button("gdbus")
-                yield textual.widgets.Button("qdbus")
-                yield textual.widgets.Button("busctl")
-
-        with textual.widgets.Collapsible(
-            title="Generate command to set property",
-            collapsed=True,
-        ):
-            with textual.containers.HorizontalScroll():
-                yield textual.widgets.Button("dbus-send")
-                yield textual.widgets.Button("gdbus")
-                yield textual.widgets.Button("qdbus")
-                yield textual.widgets.Button("busctl")
+        parent_path = self.get_node_path(node.parent)
+        if parent_path is None or parent_path not in self.child_names:
+            return
 
+        def jump(prefix: typing.Optional[str]):
+            if not prefix or parent_path not in self.child_names:
+                return
 
-class MemberDetailsPage(textual.containers.Container):
-    DEFAULT_CSS = """
-    MemberDetailsPage {
-        border: round $border;
-        border-title-align: center;
-        border-title-style: bold;
-        padding: 0 1 0 1;
-        width: 90%;
-        height: 90%;
-    }
-    MemberDetailsPage > Center {
-        height: auto;
-        margin-top: 1
-    }
-    """
+            names = self.child_names[parent_path]
+            index = min(bisect.bisect_left(names, prefix), len(names) - 1)
 
-    def __init__(
-        self,
-        service: str,
-        path: str,
-        interface: dbus_fast.introspection.Interface,
-        member_name: str,
-    ):
-        super().__init__()
-        self.service = service
-        self.path = path
-        self.interface = interface
-        self.member_name = member_name
+            window = self.windows[parent_path]
+            if not window[0] <= index < window[1]:
+                self.show_window(parent_path, index - self.PAGE_SIZE // 2)
 
-    def compose(self) -> textual.app.ComposeResult:
-        with textual.containers.Center():
-            yield textual.widgets.Label(
-                rich.text.Text(
-                    self.interface.name + "." + self.member_name, style="bold"
-                ),
+            node = self.nodes_by_path.get(
+                utils.join_object_path(parent_path, names[index])
             )
+            if node is None:
+                return
 
-        yield textual.widgets.Rule()
+            def move_cursor():
+                self.move_cursor(node)
+                self.scroll_to_node(node, animate=False)
 
-        with textual.containers.VerticalScroll():
+            # NOTE: Lines of new nodes are only known after a refresh.
+            self.call_after_refresh(move_cursor)
 
-            table = textual.widgets.DataTable(
-                show_header=False,
-                show_cursor=False,
-            )
-            yield table
-            table.add_column("Key", key="key")
-            table.add_column("Value", key="value")
-            table.add_row("Service name", self.service)
-            table.add_row("Object path", self.path)
-            table.add_row("Interface", self.interface.name)
-            table.add_row("Name", self.member_name)
+        self.app.push_screen(PrefixScreen(), jump)
 
-            yield textual.widgets.Rule()
+    @textual.work()
+    async def on_tree_node_expanded(
+        self,
+        event: textual.widgets.Tree.NodeExpanded,
+    ):
+        if event.node.children:
+            if len(event.node.children) != 1:
+                return
+            event.node.children[0].expand()
+            return
 
-            for method in self.interface.methods:
-                if method.name != self.member_name:
-                    continue
+        path = self.get_node_path(event.node)
+        if path is None or path in self.loaded_paths:
+            return
+        self.loaded_paths.add(path)
 
-                table.add_row("Type", "Method")
+        introspection = await self.resolve(path)
+        if introspection == None:
+            return
 
-                yield MethodDetails(
-                    self.service, self.path, self.interface.name, method
-                )
-                return
+        child_names = set()
+        for child in introspection.nodes:
+            assert isinstance(child, dbus_fast.introspection.Node)
+            assert child.name is not None
+            child_names.add(child.name)
 
-            for property in self.interface.properties:
-                if property.name != self.member_name:
-                    continue
+        # NOTE:
+        # Objects reported by an ObjectManager are listed from its single
+        # GetManagedObjects reply instead of being introspected one by one.
+        managed_objects = await self.get_managed_objects(path, introspection)
+        if managed_objects is not None:
+            child_names.update(managed_objects.children[path])
 
-                table.add_row("Type", "Property")
-                table.add_row("Signature", property.signature)
+        if self.nodes_by_path.get(path) is not event.node:
+            return
 
-                yield PropertyDetails(
-                    self.service, self.path, self.interface.name, property
-                )
-                return
+        if not child_names:
+            event.node.allow_expand = False
+            return
 
-            for signal in self.interface.signals:
-                if signal.name != self.member_name:
-                    continue
+        self.child_names[path] = sorted(child_names)
+        self.show_window(path, 0)
 
-                table.add_row("Type", "Signal")
+        if len(child_names) != 1:
+            return
 
-                yield SignalDetails(
-                    self.service, self.path, self.interface.name, signal
-                )
-                return
+        event.node.children[0].expand()
 
-            assert False
 
+class UpdateServices(textual.message.Message):
+    pass
 
-class MemberScreen(textual.screen.Screen):
-    DEFAULT_CSS = """
-    MemberScreen {
-        align: center middle;
-        background: $surface 50%;
-    }
-    """
-    BINDINGS = [
-        textual.binding.Binding("escape,q", "app.pop_screen", "Close"),
-    ]
 
+class UpdateObjectsTree(textual.message.Message):
+    pass
+
+
+class MemberSelected(textual.message.Message):
     def __init__(
         self,
-        service: str,
-        path: str,
-        interface: dbus_fast.introspection.Interface,
+        interface_name: str,
+        member_kind: str,
         member_name: str,
     ):
-        self.service = service
-        self.path = path
-        self.interface = interface
+        self.interface_name = interface_name
+        self.member_kind = member_kind
         self.member_name = member_name
         super().__init__()
 
-    def compose(self) -> textual.app.ComposeResult:
-        yield textual.widgets.Footer()
-        yield MemberDetailsPage(
-            self.service,
-            self.path,
-            self.interface,
-            self.member_name,
-        )
-
 
 class BusPane(textual.containers.Container):
+    BINDINGS = [
+        textual.binding.Binding("slash", "search", "Search"),
+        textual.binding.Binding("c", "toggle_crawler", "Toggle crawler"),
+        textual.binding.Binding("i", "show_statistics", "Statistics"),
+    ]
+
+    # NOTE:
+    # Service details are only looked up once the cursor has rested on a
+    # service for this long, so that scrolling through the list does not
+    # queue lookups for every service passed by.
+    SERVICE_SELECTION_DELAY = 0.15
+
+    # NOTE:
+    # Changes of the values of properties are coalesced and shown at this
+    # rate, however often they are signaled.
+    FRAME_INTERVAL = 1 / 10
+
     services = textual.reactive.reactive[typing.Optional[list[str]]](None)
     objects_tree = textual.reactive.reactive[typing.Optional[ObjectsTree]](None)
     service = textual.reactive.reactive[typing.Optional[str]](None)
@@ -644,8 +850,15 @@ class BusPane(textual.containers.Container):
     pid = textual.reactive.reactive[typing.Optional[int]](None)
     executable = textual.reactive.reactive[typing.Optional[str]](None)
     command_line = textual.reactive.reactive[typing.Optional[list[str]]](None)
+    cwd = textual.reactive.reactive[typing.Optional[str]](None)
+    cgroup = textual.reactive.reactive[typing.Optional[str]](None)
+    parents = textual.reactive.reactive[
+        typing.Optional[list[utils.ProcessInfo]]
+    ](None)
     uid = textual.reactive.reactive[typing.Optional[int]](None)
     user_name = textual.reactive.reactive[typing.Optional[str]](None)
+    gids = textual.reactive.reactive[typing.Optional[list[int]]](None)
+    security_label = textual.reactive.reactive[typing.Optional[str]](None)
     unique_name = textual.reactive.reactive[typing.Optional[str]](None)
 
     object_path = textual.reactive.reactive[typing.Optional[str]](None)
@@ -653,25 +866,275 @@ class BusPane(textual.containers.Container):
         typing.Optional[list[dbus_fast.introspection.Interface]]
     ](None)
 
-    def __init__(self, bus: dbus_fast.aio.message_bus.MessageBus):
+    def __init__(
+        self, bus: dbus_fast.aio.message_bus.MessageBus, bus_type: str
+    ):
         super().__init__()
         self.bus = bus
+        self.bus_daemon = utils.BusDaemon(
+            bus, utils.get_bus_address(MainPage.BUS_TYPES[bus_type])
+        )
+        self.introspection_cache = cache.IntrospectionCache(
+            self.bus_daemon,
+            introspection_store=store.get_default_store(),
+            scope=bus_type,
+        )
+        self.introspection_cache.outdated_listeners.append(
+            self.on_introspection_outdated
+        )
+        # NOTE: Services told to be reloaded since cached objects changed.
+        self.outdated_services: set[str] = set()
+        self.process_info_cache = utils.ProcessInfoCache()
+        self.introspection: typing.Optional[cache.IndexedNode] = None
+        # NOTE:
+        # The search index and the crawler are only created once searching
+        # or crawling, see get_search_index and get_crawler.
+        self.search_index: typing.Optional["search.SearchIndex"] = None
+        self.crawler: typing.Optional["crawler.Crawler"] = None
+        self.crawler_worker: typing.Optional[textual.worker.Worker] = None
+        # NOTE:
+        # Whether the crawler has been turned on to keep running in the
+        # background, rather than only while searching.
+        self.crawling = False
+        # NOTE:
+        # The service and object path of a search result to be selected once
+        # the objects tree of that service is shown.
+        self.pending_object_path: typing.Optional[tuple[str, str]] = None
+        self.name_owner_changed_subscribed = False
+        self.services_requested = False
+        # NOTE: Created once an object with properties is selected.
+        self.properties_cache: typing.Optional[
+            "properties.PropertiesCache"
+        ] = None
+        # NOTE: Interfaces of the selected object whose properties are shown.
+        self.watched_properties: "list[properties.Key]" = []
+        self.watch_properties_lock = asyncio.Lock()
+        self.fetching_properties: "set[tuple[properties.Key, str]]" = set()
+
+    def get_search_index(self) -> "search.SearchIndex":
+        """Returns the search index, created with the services and objects
+        known so far, and fed by the introspection cache from then on."""
+
+        if self.search_index != None:
+            return self.search_index
+
+        from . import search
+
+        search_index = search.SearchIndex()
+        for service in self.services or []:
+            search_index.add_service(service)
+        for service, path, introspection in (
+            self.introspection_cache.get_objects()
+        ):
+            search_index.add_object(service, path, introspection)
+
+        self.introspection_cache.listeners.append(search_index.add_object)
+        self.introspection_cache.invalidated_listeners.append(
+            search_index.remove_object
+        )
+        self.search_index = search_index
+        return search_index
+
+    def get_crawler(self) -> "crawler.Crawler":
+        if self.crawler == None:
+            from . import crawler
+
+            self.crawler = crawler.Crawler(self.introspection_cache)
+        return self.crawler
+
+    def get_properties_cache(self) -> "properties.PropertiesCache":
+        if self.properties_cache == None:
+            from . import properties
+
+            self.properties_cache = properties.PropertiesCache(self.bus_daemon)
+        return self.properties_cache
 
     def on_mount(self):
         self.loading = True
+        self.set_interval(self.FRAME_INTERVAL, self.render_properties)
+
+    # NOTE:
+    # Services of a bus are only listed once its tab is first shown.
+    def on_show(self):
+        if self.services_requested:
+            return
+
+        self.services_requested = True
         self.update_services()
 
+    async def on_unmount(self):
+        if self.name_owner_changed_subscribed:
+            self.bus.remove_message_handler(self.on_name_owner_changed)
+            await self.bus_daemon.remove_match(
+                cache.NAME_OWNER_CHANGED_MATCH_RULE
+            )
+
+        await self.introspection_cache.close()
+        if self.properties_cache != None:
+            await self.properties_cache.close()
+
+    def on_name_owner_changed(self, message: dbus_fast.Message):
+        if (
+            message.message_type != dbus_fast.MessageType.SIGNAL
+            or message.sender != "org.freedesktop.DBus"
+            or message.interface != "org.freedesktop.DBus"
+            or message.member != "NameOwnerChanged"
+        ):
+            return
+
+        name, old_owner, new_owner = message.body
+        if bool(old_owner) == bool(new_owner):
+            return
+
+        if name.startswith(":") and not new_owner:
+            self.process_info_cache.forget_owner(name)
+
+        if self.search_index != None:
+            if new_owner:
+                self.search_index.add_service(name)
+            else:
+                self.search_index.remove_service(name)
+        if self.crawler != None:
+            if new_owner:
+                if self.crawling and not name.startswith(":"):
+                    self.crawler.add_services([name])
+            else:
+                self.crawler.forget_service(name)
+
+        self.query_one(ServiceNamesTable).update_service(name, bool(new_owner))
+
     @textual.work()
     @textual.on(UpdateServices)
     async def update_services(self):
-        self.set_reactive(
-            BusPane.services,
-            await utils.list_dbus_services(self.bus),
-        )
+        # NOTE:
+        # Subscribe before listing names, so that no change is missed in
+        # between. Changes already included in the list are ignored.
+        if not self.name_owner_changed_subscribed:
+            self.bus.add_message_handler(self.on_name_owner_changed)
+            self.name_owner_changed_subscribed = True
+            await self.bus_daemon.add_match(cache.NAME_OWNER_CHANGED_MATCH_RULE)
+
+        services = await utils.list_dbus_services(self.bus_daemon)
+        if self.search_index != None:
+            for service in services:
+                self.search_index.add_service(service)
+
+        self.set_reactive(BusPane.services, services)
         self.mutate_reactive(BusPane.services)
 
         self.loading = False
 
+        self.call_after_refresh(startup.mark, "first service list")
+        if startup.enabled:
+            self.call_after_refresh(self.app.exit)
+
+    def action_search(self):
+        from . import search
+
+        search_index = self.get_search_index()
+        if not self.crawling:
+            self.start_crawler(until_idle=True)
+        self.app.push_screen(
+            search.SearchScreen(search_index, self.get_crawler()),
+            self.show_search_result,
+        )
+
+    def action_toggle_crawler(self):
+        if self.crawling:
+            self.crawling = False
+            self.stop_crawler()
+            objects = self.get_crawler().objects
+            self.notify(f"Crawler stopped, {objects} objects crawled")
+            return
+
+        self.crawling = True
+        self.start_crawler(until_idle=False)
+        self.notify("Crawling objects of all services in background")
+
+    def action_show_statistics(self):
+        requests = self.bus_daemon.requests
+        introspection_cache = self.introspection_cache
+        self.notify(
+            f"Requests: {requests.calls} sent, "
+            f"{requests.saved} shared with identical ones in flight\n"
+            f"Introspection cache: {introspection_cache.hits} hits, "
+            f"{introspection_cache.misses} misses, "
+            f"{introspection_cache.store_hits} read from disk",
+            title="Statistics",
+            timeout=10,
+        )
+
+    def start_crawler(self, until_idle: bool):
+        if self.services == None:
+            return
+
+        # NOTE:
+        # Only services with well-known names are crawled, most connections
+        # known by their unique name only are clients exporting no object.
+        self.get_crawler().add_services(
+            [service for service in self.services if not service.startswith(":")]
+        )
+        self.prioritize_crawler()
+
+        self.crawler_worker = self.run_crawler(until_idle)
+
+    def stop_crawler(self):
+        if self.crawler_worker == None:
+            return
+
+        self.crawler_worker.cancel()
+        self.crawler_worker = None
+
+    @textual.work(exclusive=True, group="crawler")
+    async def run_crawler(self, until_idle: bool):
+        await self.get_crawler().run(until_idle)
+
+    def prioritize_crawler(self):
+        """Crawls the service under the cursor first, then its neighbours."""
+
+        table = (
+            self.query_one(ServiceNamesTable)
+            .query_one(textual.containers.VerticalScroll)
+            .query_one(textual.widgets.DataTable)
+        )
+
+        self.get_crawler().prioritize(
+            {
+                row.key.value: abs(index - table.cursor_row)
+                for index, row in enumerate(table.ordered_rows)
+                if row.key.value != None
+            }
+        )
+
+    def show_search_result(self, entry: typing.Optional["search.Entry"]):
+        # NOTE:
+        # Unless turned on, the crawler only runs while searching.
+        if not self.crawling:
+            self.stop_crawler()
+
+        if entry == None:
+            return
+
+        _, service, path, _, _ = entry
+
+        if service == self.service and self.objects_tree != None:
+            if path:
+                self.object_path = path
+            return
+
+        table = (
+            self.query_one(ServiceNamesTable)
+            .query_one(textual.containers.VerticalScroll)
+            .query_one(textual.widgets.DataTable)
+        )
+        try:
+            row = table.get_row_index(service)
+        except textual.widgets.data_table.RowDoesNotExist:
+            return
+
+        self.pending_object_path = (service, path) if path else None
+        table.move_cursor(row=row)
+
     def compose(self) -> textual.app.ComposeResult:
         with textual.containers.Horizontal():
             yield ServiceNamesTable().data_bind(services=BusPane.services)
@@ -681,8 +1144,13 @@ class BusPane(textual.containers.Container):
                 pid=BusPane.pid,
                 executable=BusPane.executable,
                 command_line=BusPane.command_line,
+                cwd=BusPane.cwd,
+                cgroup=BusPane.cgroup,
+                parents=BusPane.parents,
                 uid=BusPane.uid,
                 user_name=BusPane.user_name,
+                gids=BusPane.gids,
+                security_label=BusPane.security_label,
                 unique_name=BusPane.unique_name,
                 object_path=BusPane.object_path,
                 interfaces=BusPane.interfaces,
@@ -698,58 +1166,195 @@ class BusPane(textual.containers.Container):
         ):
             return
 
-        if self.services == None:
+        if event.cell_key.row_key.value == None:
+            return
+
+        if event.cell_key.row_key.value != self.service:
+            self.reset_service_details()
+
+        self.service = event.cell_key.row_key.value
+
+        if self.crawler_worker != None:
+            self.prioritize_crawler()
+
+    def reset_service_details(self):
+        """Forgets the details of the previous service, so that none of them
+        is shown for the next one if it turns out not to be available."""
+
+        self.pid = None
+        self.uid = None
+        self.user_name = None
+        self.gids = None
+        self.security_label = None
+        self.unique_name = None
+        # NOTE:
+        # Fields of the process of a service are None as well when reading
+        # them is not permitted, e.g. the working directory of processes of
+        # other users.
+        self.executable = None
+        self.command_line = None
+        self.cwd = None
+        self.cgroup = None
+        self.parents = None
+
+    @textual.work(exclusive=True, group="service")
+    async def watch_service(self):
+        if self.service == None:
+            return
+
+        service = self.service
+
+        # NOTE:
+        # Selecting another service cancels this worker, including the
+        # lookups below which are still in flight.
+        await asyncio.sleep(self.SERVICE_SELECTION_DELAY)
+
+        # NOTE:
+        # The objects tree, the credentials and the unique name are requested
+        # concurrently, so the details panel costs a single round trip.
+        self.update_objects_tree()
+
+        process_info, unique_name = await asyncio.gather(
+            self.update_service_credentials(service),
+            self.update_service_unique_name(service),
+        )
+
+        if process_info is None or unique_name is None:
+            return
+
+        self.process_info_cache.add_owner(unique_name, process_info)
+
+    async def update_service_credentials(
+        self, service: str
+    ) -> typing.Optional[utils.ProcessInfo]:
+        try:
+            credentials = await utils.get_dbus_service_credentials(
+                self.bus_daemon, service
+            )
+        except Exception as e:
+            self.log.error(e)
+            return None
+
+        if self.service != service:
+            return None
+
+        self.pid = credentials.get("ProcessID")
+        self.uid = credentials.get("UnixUserID")
+        self.gids = credentials.get("UnixGroupIDs")
+        self.security_label = utils.get_security_label(
+            credentials.get("LinuxSecurityLabel")
+        )
+
+        process_info, _ = await asyncio.gather(
+            self.update_process_info(service, self.pid),
+            self.update_user_name(service, self.uid),
+        )
+
+        return process_info
+
+    async def update_process_info(
+        self, service: str, pid: typing.Optional[int]
+    ) -> typing.Optional[utils.ProcessInfo]:
+        if pid == None:
+            return None
+
+        try:
+            process_info = await self.process_info_cache.get(pid)
+            parents = await self.process_info_cache.get_parents(process_info)
+        except Exception as e:
+            self.log.error(e)
+            return None
+
+        if self.service != service:
+            return None
+
+        self.executable = process_info.executable
+        self.command_line = process_info.command_line
+        self.cwd = process_info.cwd
+        self.cgroup = process_info.cgroup
+        self.parents = parents
+
+        return process_info
+
+    async def update_user_name(self, service: str, uid: typing.Optional[int]):
+        if uid == None:
             return
 
-        self.service = self.services[event.coordinate.row]
+        try:
+            user_name = await utils.get_user_name(uid)
+        except Exception as e:
+            self.log.error(e)
+            user_name = None
 
-    @textual.work()
-    async def watch_service(self):
-        if self.service == None:
+        if self.service != service:
             return
 
-        self.pid = await utils.get_dbus_service_pid(self.bus, self.service)
+        self.user_name = user_name
 
+    async def update_service_unique_name(
+        self, service: str
+    ) -> typing.Optional[str]:
         try:
-            self.executable = await utils.get_executable(self.pid)
+            unique_name = await self.introspection_cache.get_owner(service)
         except Exception as e:
             self.log.error(e)
+            return None
+
+        if self.service != service:
+            return None
+
+        self.unique_name = unique_name
+
+        return unique_name
+
+    @textual.on(UpdateObjectsTree)
+    async def reload_objects_tree(self):
+        if self.service == None:
+            return
+
+        self.outdated_services.discard(self.service)
 
         try:
-            self.command_line = await utils.get_command_line(self.pid)
+            self.introspection_cache.invalidate(
+                await self.introspection_cache.get_owner(self.service)
+            )
         except Exception as e:
             self.log.error(e)
 
-        self.uid = await utils.get_dbus_service_uid(self.bus, self.service)
-        self.user_name = await utils.get_user_name(self.uid)
-        self.unique_name = await utils.get_dbus_service_unique_name(
-            self.bus, self.service
-        )
-
         self.update_objects_tree()
 
-    @textual.work()
-    @textual.on(UpdateObjectsTree)
+    @textual.work(exclusive=True, group="objects_tree")
     async def update_objects_tree(self):
         assert self.service
 
+        service = self.service
         introspection = None
 
         try:
-            introspection = await self.bus.introspect(self.service, "/")
+            introspection = await self.introspection_cache.introspect(
+                service, "/"
+            )
         except Exception as e:
             self.log.error(e)
 
+        if self.service != service:
+            return
+
         tree = None
 
         if introspection != None:
-            tree = ObjectsTree(self.bus, self.service, introspection)
+            tree = ObjectsTree(self.introspection_cache, service, introspection)
 
         self.object_path = None
 
         self.set_reactive(BusPane.objects_tree, tree)
         self.mutate_reactive(BusPane.objects_tree)
 
+        if self.pending_object_path != None and tree != None:
+            if self.pending_object_path[0] == service:
+                self.object_path = self.pending_object_path[1]
+        self.pending_object_path = None
+
     @textual.work()
     async def on_tree_node_selected(
         self,
@@ -761,26 +1366,37 @@ class BusPane(textual.containers.Container):
 
         self.object_path = object_path
 
-    @textual.work()
+    @textual.work(exclusive=True, group="object_path")
     async def watch_object_path(self):
         if self.object_path == None:
+            self.introspection = None
             self.set_reactive(BusPane.interfaces, None)
             self.mutate_reactive(BusPane.interfaces)
+            self.watch_properties([])
             return
 
         assert self.service
 
+        service = self.service
+        object_path = self.object_path
+
         introspection = None
         try:
-            introspection = await self.bus.introspect(
-                self.service, self.object_path
+            introspection = await self.introspection_cache.introspect(
+                service, object_path
             )
         except Exception as e:
             self.log.error(e)
 
+        if self.service != service or self.object_path != object_path:
+            return
+
+        self.introspection = introspection
+
         if introspection == None:
             self.set_reactive(BusPane.interfaces, None)
             self.mutate_reactive(BusPane.interfaces)
+            self.watch_properties([])
             return
 
         def dbus_interface_sort_key(
@@ -788,59 +1404,240 @@ class BusPane(textual.containers.Container):
         ) -> str:
             return interface.name
 
-        list.sort(introspection.interfaces, key=dbus_interface_sort_key)
-
-        self.set_reactive(BusPane.interfaces, introspection.interfaces)
+        # NOTE:
+        # Introspection results are shared through the cache, sort a copy.
+        self.set_reactive(
+            BusPane.interfaces,
+            sorted(introspection.interfaces, key=dbus_interface_sort_key),
+        )
         self.mutate_reactive(BusPane.interfaces)
+        self.watch_properties(
+            [
+                (service, object_path, interface.name)
+                for interface in introspection.interfaces
+                if interface.properties
+            ]
+        )
+
+    # NOTE:
+    # Not exclusive, as cancelling a worker in the middle of subscribing
+    # would leak match rules. Workers take turns instead, and the last one
+    # leaves the properties of the selected object watched.
+    @textual.work(group="properties")
+    async def watch_properties(self, keys: "list[properties.Key]"):
+        if not keys and self.properties_cache == None:
+            return
+        properties_cache = self.get_properties_cache()
+
+        async with self.watch_properties_lock:
+            for key in self.watched_properties:
+                if key not in keys:
+                    await properties_cache.unwatch(*key)
+
+            watched = []
+            for key in keys:
+                if key not in self.watched_properties:
+                    try:
+                        await properties_cache.watch(*key)
+                    except Exception as e:
+                        self.log.error(e)
+                        continue
+                watched.append(key)
+            self.watched_properties = watched
+
+        # NOTE: Values are fetched with a single GetAll per interface.
+        results = await asyncio.gather(
+            *(properties_cache.load(*key) for key in watched),
+            return_exceptions=True,
+        )
+        for result in results:
+            if isinstance(result, Exception):
+                self.log.error(result)
+
+    def render_properties(self):
+        """Shows the values of properties changed since the last frame, and
+        fetches the invalidated ones of the interfaces expanded."""
+
+        if self.interfaces == None or self.properties_cache == None:
+            return
+
+        for widget in self.query(InterfaceDetails):
+            key = (self.service, self.object_path, widget.interface.name)
+            entry = self.properties_cache.get_entry(*key)
+            widget.update_property_values(entry)
+
+            if entry == None or widget.collapsed:
+                continue
+            for name in entry.invalidated:
+                if (key, name) not in self.fetching_properties:
+                    self.fetch_property(key, name)
+
+    @textual.work()
+    async def fetch_property(self, key: "properties.Key", name: str):
+        self.fetching_properties.add((key, name))
+        try:
+            await self.get_properties_cache().get(*key, name)
+        except Exception as e:
+            self.log.error(e)
+        finally:
+            self.fetching_properties.discard((key, name))
+
+    def on_introspection_outdated(
+        self, service: str, path: str, introspection: cache.IndexedNode
+    ):
+        if service != self.service:
+            return
+
+        if path == self.object_path:
+            self.watch_object_path()
+
+        # NOTE:
+        # The objects tree is not rebuilt under the cursor of the user, only
+        # told to be reloaded.
+        if service in self.outdated_services:
+            return
+        self.outdated_services.add(service)
+        self.notify(
+            f"Objects of {service} changed since cached, press r to reload",
+            severity="warning",
+        )
 
     def on_member_selected(self, event: MemberSelected):
         assert self.service
         assert self.object_path
-        assert self.objects_tree
-        assert self.interfaces
+        assert self.introspection
 
-        selected_interface = None
+        interface = self.introspection.get_interface(event.interface_name)
+        member = self.introspection.get_member(
+            event.interface_name, event.member_kind, event.member_name
+        )
 
-        for interface in self.interfaces:
-            if interface.name != event.interface_name:
-                continue
-            selected_interface = interface
+        assert interface != None
+        assert member != None
 
-        assert selected_interface != None
+        # NOTE:
+        # Member details are imported on demand, to keep startup fast.
+        from . import members
 
         self.app.push_screen(
-            MemberScreen(
+            members.MemberScreen(
+                self.bus_daemon,
+                self.get_properties_cache(),
                 self.service,
                 self.object_path,
-                selected_interface,
-                event.member_name,
+                interface,
+                event.member_kind,
+                member,
             )
         )
 
 
 class ServiceNamesTable(textual.containers.Container):
     BINDINGS = [
-        textual.binding.Binding("r", "reload_service", "Reload services"),
+        textual.binding.Binding("r", "reload_services", "Reload services"),
     ]
 
+    # NOTE:
+    # Name changes are applied in batches at most once per interval, so that
+    # a burst of short-lived clients cannot stall the UI.
+    UPDATE_INTERVAL = 0.25
+
     services = textual.reactive.reactive[typing.Optional[list[str]]](None)
 
+    def __init__(self):
+        super().__init__()
+        self.pending_services: dict[str, bool] = {}
+        self.update_timer: typing.Optional[textual.timer.Timer] = None
+
     def on_mount(self):
         self.loading = True
-        self.query_one(textual.widgets.DataTable).add_columns("Services")
+        self.query_one(textual.widgets.DataTable).add_column(
+            "Services", key="service"
+        )
 
     @textual.work()
     async def watch_services(self):
         if self.services == None:
             return
 
-        self.query_one(textual.widgets.DataTable).clear()
-        self.query_one(textual.widgets.DataTable).add_rows(
-            [[service] for service in self.services]
-        )
+        table = self.query_one(textual.widgets.DataTable)
+        table.clear()
+        for service in self.services:
+            table.add_row(service, key=service)
+
+        self.flush_services()
 
         self.loading = False
 
+    def update_service(self, name: str, present: bool):
+        self.pending_services[name] = present
+
+        if self.update_timer is not None:
+            return
+
+        self.update_timer = self.set_timer(
+            self.UPDATE_INTERVAL, self.flush_services
+        )
+
+    def flush_services(self):
+        if self.update_timer is not None:
+            self.update_timer.stop()
+            self.update_timer = None
+
+        if self.services == None:
+            return
+
+        pending_services = self.pending_services
+        self.pending_services = {}
+
+        table = self.query_one(textual.widgets.DataTable)
+
+        cursor_service = None
+        top_service = None
+        if table.row_count:
+            cursor_service = self.services[table.cursor_row]
+            top_service = self.services[
+                min(int(table.scroll_y), table.row_count - 1)
+            ]
+
+        changed = False
+        for name, present in pending_services.items():
+            if present:
+                if utils.insert_dbus_service(self.services, name) is None:
+                    continue
+                table.add_row(name, key=name)
+            else:
+                if utils.remove_dbus_service(self.services, name) is None:
+                    continue
+                table.remove_row(name)
+            changed = True
+
+        if not changed:
+            return
+
+        table.sort(
+            "service",
+            key=utils.get_dbus_service_sort_key,
+        )
+
+        # NOTE:
+        # Keep the same service under the cursor and the same service at the
+        # top of the viewport, unless they are the ones removed.
+        if top_service is not None:
+            table.scroll_to(
+                y=utils.find_dbus_service(self.services, top_service),
+                animate=False,
+            )
+
+        if cursor_service is not None and self.services:
+            table.move_cursor(
+                row=min(
+                    utils.find_dbus_service(self.services, cursor_service),
+                    len(self.services) - 1,
+                ),
+                scroll=False,
+            )
+
     def compose(self) -> textual.app.ComposeResult:
         yield textual.widgets.Label(rich.text.Text("Services", style="bold"))
         with textual.containers.VerticalScroll():
@@ -879,6 +1676,228 @@ class Objects(textual.containers.Container):
         self.post_message(UpdateObjectsTree())
 
 
+def get_interface_shape(
+    interface: dbus_fast.introspection.Interface,
+) -> tuple:
+    """Returns what InterfaceDetails shows of an interface, to tell whether
+    two interfaces of different objects look the same."""
+
+    return (
+        interface.name,
+        tuple(interface.annotations.items()),
+        tuple(
+            (property.name, property.signature)
+            for property in interface.properties
+        ),
+        tuple(
+            (method.name, method.in_signature, method.out_signature)
+            for method in interface.methods
+        ),
+        tuple((signal.name, signal.signature) for signal in interface.signals),
+    )
+
+
+class InterfaceDetails(textual.widgets.Collapsible):
+    """Members of an interface, only filled in once expanded."""
+
+    # NOTE: Values of properties are cut at this many characters.
+    VALUE_LIMIT = 60
+
+    def __init__(
+        self, interface: dbus_fast.introspection.Interface, collapsed: bool
+    ):
+        super().__init__(title=interface.name, collapsed=collapsed)
+        self.interface = interface
+        self.shown_interface: typing.Optional[
+            dbus_fast.introspection.Interface
+        ] = None
+        self.shape: typing.Optional[tuple] = None
+        self.member_kinds: dict[textual.widgets.DataTable, str] = {}
+        self.property_values: typing.Optional[
+            "properties.InterfaceProperties"
+        ] = None
+        self.rendered_generation: typing.Optional[int] = None
+
+    def update_interface(self, interface: dbus_fast.introspection.Interface):
+        self.interface = interface
+        self.update_contents()
+
+    def on_collapsible_expanded(self, event: textual.widgets.Collapsible.Expanded):
+        if event.collapsible is self:
+            self.update_contents()
+
+    def update_contents(self):
+        if self.collapsed or not self.is_mounted:
+            return
+
+        # NOTE:
+        # Interfaces are interned, so objects of the same shape mostly share
+        # the very same instance.
+        if self.interface is self.shown_interface:
+            return
+        self.shown_interface = self.interface
+
+        shape = get_interface_shape(self.interface)
+        if shape == self.shape:
+            return
+        self.shape = shape
+
+        self.member_kinds.clear()
+
+        contents = self.query_one(textual.widgets.Collapsible.Contents)
+        contents.remove_children()
+        contents.mount_all(self.compose_members())
+
+    def on_data_table_row_selected(
+        self, event: textual.widgets.DataTable.RowSelected
+    ):
+        event.stop()
+
+        member_kind = self.member_kinds.get(event.data_table)
+        if member_kind == None:
+            return
+
+        assert event.row_key.value != None
+        self.post_message(
+            MemberSelected(self.interface.name, member_kind, event.row_key.value)
+        )
+
+    def format_property_value(self, name: str) -> str:
+        values = self.property_values
+        if values == None:
+            return ""
+        if name in values.values:
+            from . import monitor
+
+            return monitor.format_value(values.values[name], self.VALUE_LIMIT)
+        if name in values.invalidated:
+            return "…"
+        return ""
+
+    def update_property_values(
+        self, values: typing.Optional["properties.InterfaceProperties"]
+    ):
+        """Shows the values of the properties, unless shown already or
+        collapsed."""
+
+        generation = values.generation if values != None else None
+        if (
+            values is self.property_values
+            and generation == self.rendered_generation
+        ):
+            return
+        self.property_values = values
+
+        if self.collapsed or self.shown_interface == None:
+            return
+        self.rendered_generation = generation
+
+        for table, member_kind in self.member_kinds.items():
+            if member_kind != "property":
+                continue
+            for property in self.shown_interface.properties:
+                table.update_cell(
+                    property.name,
+                    "value",
+                    self.format_property_value(property.name),
+                    update_width=True,
+                )
+
+    def compose_members(self) -> list[textual.widgets.Collapsible]:
+        # NOTE:
+        # Members are sorted by name once, when the interface is interned.
+        interface = self.interface
+        sections = []
+
+        if interface.annotations:
+            table = textual.widgets.DataTable(
+                show_header=False,
+                cursor_type="row",
+            )
+            table.add_column("Name", key="name")
+            table.add_column("Value", key="value")
+            for key, value in interface.annotations.items():
+                table.add_row(
+                    key,
+                    value,
+                )
+            sections.append(
+                textual.widgets.Collapsible(
+                    table, title="Annotations", collapsed=False
+                )
+            )
+
+        if interface.properties:
+            table = textual.widgets.DataTable(
+                show_header=False,
+                cursor_type="row",
+            )
+            table.add_column("Name", key="name")
+            table.add_column("Signature", key="signature")
+            table.add_column("Value", key="value")
+            for property in interface.properties:
+                table.add_row(
+                    property.name,
+                    property.signature,
+                    self.format_property_value(property.name),
+                    key=property.name,
+                )
+            self.rendered_generation = (
+                self.property_values.generation
+                if self.property_values != None
+                else None
+            )
+            self.member_kinds[table] = "property"
+            sections.append(
+                textual.widgets.Collapsible(
+                    table, title="Properties", collapsed=False
+                )
+            )
+
+        if interface.methods:
+            table = textual.widgets.DataTable(
+                cursor_type="row",
+            )
+            table.add_column("Name", key="name")
+            table.add_column("in", key="in")
+            table.add_column("out", key="out")
+            for method in interface.methods:
+                table.add_row(
+                    method.name,
+                    method.in_signature,
+                    method.out_signature,
+                    key=method.name,
+                )
+            self.member_kinds[table] = "method"
+            sections.append(
+                textual.widgets.Collapsible(
+                    table, title="Methods", collapsed=False
+                )
+            )
+
+        if interface.signals:
+            table = textual.widgets.DataTable(
+                show_header=False,
+                cursor_type="row",
+            )
+            table.add_column("Name", key="name")
+            table.add_column("Signature", key="signature")
+            for signal in interface.signals:
+                table.add_row(
+                    signal.name,
+                    signal.signature,
+                    key=signal.name,
+                )
+            self.member_kinds[table] = "signal"
+            sections.append(
+                textual.widgets.Collapsible(
+                    table, title="Signals", collapsed=False
+                )
+            )
+
+        return sections
+
+
 class Interfaces(textual.containers.Container):
     DEFAULT_CSS = """
     Interfaces > ScrollableContainer Collapsible {
@@ -890,157 +1909,69 @@ class Interfaces(textual.containers.Container):
     }
     """
 
+    COLLAPSED_INTERFACES = [
+        "org.freedesktop.DBus.Introspectable",
+        "org.freedesktop.DBus.Peer",
+        "org.freedesktop.DBus.Properties",
+    ]
+
     interfaces = textual.reactive.reactive[
         typing.Optional[list[dbus_fast.introspection.Interface]]
-    ](None, recompose=True)
+    ](None)
 
     def compose(self) -> textual.app.ComposeResult:
         yield textual.widgets.Label(rich.text.Text("Interfaces", style="bold"))
-
-        if self.interfaces == None:
-            yield textual.widgets.Label("No object selected")
-            return
-
-        if len(self.interfaces) == 0:
-            yield textual.widgets.Label("No interfaces avaiable in this object")
-            return
-
-        with textual.containers.ScrollableContainer():
-            for interface in self.interfaces:
-                collapsed = False
-                if interface.name in [
-                    "org.freedesktop.DBus.Introspectable",
-                    "org.freedesktop.DBus.Peer",
-                    "org.freedesktop.DBus.Properties",
-                ]:
-                    collapsed = True
-
-                with textual.widgets.Collapsible(
-                    title=interface.name,
-                    collapsed=collapsed,
-                ):
-                    if interface.annotations:
-                        with textual.widgets.Collapsible(
-                            title="Annotations",
-                            collapsed=False,
-                        ):
-                            table = textual.widgets.DataTable(
-                                show_header=False,
-                                cursor_type="row",
-                            )
-                            yield table
-                            table.add_column("Name", key="name")
-                            table.add_column("Value", key="value")
-                            for key, value in interface.annotations.items():
-                                table.add_row(
-                                    key,
-                                    value,
-                                )
-
-                    if interface.properties:
-                        with textual.widgets.Collapsible(
-                            title="Properties",
-                            collapsed=False,
-                        ):
-                            table = textual.widgets.DataTable(
-                                show_header=False,
-                                cursor_type="row",
-                            )
-                            yield table
-                            table.add_column("Name", key="name")
-                            table.add_column("Signature", key="signature")
-
-                            list.sort(
-                                interface.properties,
-                                key=lambda property: property.name,
-                            )
-
-                            for property in interface.properties:
-                                table.add_row(
-                                    property.name,
-                                    property.signature,
-                                )
-
-                    if interface.methods:
-                        with textual.widgets.Collapsible(
-                            title="Methods",
-                            collapsed=False,
-                        ):
-                            table = textual.widgets.DataTable(
-                                cursor_type="row",
-                            )
-                            yield table
-                            table.add_column("Name", key="name")
-                            table.add_column("in", key="in")
-                            table.add_column("out", key="out")
-
-                            list.sort(
-                                interface.methods,
-                                key=lambda method: method.name,
-                            )
-
-                            for method in interface.methods:
-                                table.add_row(
-                                    method.name,
-                                    method.in_signature,
-                                    method.out_signature,
-                                )
-
-                    if interface.signals:
-                        with textual.widgets.Collapsible(
-                            title="Signals",
-                            collapsed=False,
-                        ):
-                            table = textual.widgets.DataTable(
-                                show_header=False,
-                                cursor_type="row",
-                            )
-                            yield table
-                            table.add_column("Name", key="name")
-                            table.add_column("Signature", key="signature")
-
-                            list.sort(
-                                interface.signals,
-                                key=lambda signal: signal.name,
-                            )
-
-                            for signal in interface.signals:
-                                table.add_row(
-                                    signal.name,
-                                    signal.signature,
-                                )
-
-    def on_data_table_row_selected(
-        self, event: textual.widgets.DataTable.RowSelected
-    ):
-        assert isinstance(
-            event.data_table.parent, textual.widgets.Collapsible.Contents
-        )
-        assert isinstance(
-            event.data_table.parent.parent, textual.widgets.Collapsible
-        )
-
-        member_type = event.data_table.parent.parent.title.lower()
-
-        if member_type == "annotations":
+        yield textual.widgets.Label("No object selected", id="placeholder")
+        yield textual.containers.ScrollableContainer()
+
+    # NOTE:
+    # Widgets of interfaces still present are kept and only updated, so that
+    # moving between objects of the same shape rebuilds nothing.
+    def watch_interfaces(self):
+        placeholder = self.query_one("#placeholder", textual.widgets.Label)
+        container = self.query_one(textual.containers.ScrollableContainer)
+
+        if self.interfaces == None or len(self.interfaces) == 0:
+            placeholder.update(
+                "No object selected"
+                if self.interfaces == None
+                else "No interfaces avaiable in this object"
+            )
+            placeholder.display = True
+            container.display = False
+            container.remove_children()
             return
 
-        column = event.data_table.get_column_index("name")
-        row = event.data_table.get_row(event.row_key)
-        member_name = row[column]
+        placeholder.display = False
+        container.display = True
 
-        assert isinstance(
-            event.data_table.parent.parent.parent,
-            textual.widgets.Collapsible.Contents,
-        )
-        assert isinstance(
-            event.data_table.parent.parent.parent.parent,
-            textual.widgets.Collapsible,
-        )
+        widgets = {
+            widget.interface.name: widget
+            for widget in container.query_children(InterfaceDetails)
+        }
+        names = set(interface.name for interface in self.interfaces)
 
-        interface_name = event.data_table.parent.parent.parent.parent.title
+        for name, widget in widgets.items():
+            if name not in names:
+                widget.remove()
 
-        self.post_message(MemberSelected(interface_name, member_name))
+        previous: typing.Optional[InterfaceDetails] = None
+        for interface in self.interfaces:
+            widget = widgets.get(interface.name)
+            if widget != None:
+                widget.update_interface(interface)
+            else:
+                widget = InterfaceDetails(
+                    interface,
+                    collapsed=interface.name in self.COLLAPSED_INTERFACES,
+                )
+                if previous != None:
+                    container.mount(widget, after=previous)
+                elif container.children:
+                    container.mount(widget, before=0)
+                else:
+                    container.mount(widget)
+            previous = widget
 
 
 class ServiceDetails(textual.containers.Container):
@@ -1051,8 +1982,15 @@ class ServiceDetails(textual.containers.Container):
     pid = textual.reactive.reactive[typing.Optional[int]](None)
     executable = textual.reactive.reactive[typing.Optional[str]](None)
     command_line = textual.reactive.reactive[typing.Optional[list[str]]](None)
+    cwd = textual.reactive.reactive[typing.Optional[str]](None)
+    cgroup = textual.reactive.reactive[typing.Optional[str]](None)
+    parents = textual.reactive.reactive[
+        typing.Optional[list[utils.ProcessInfo]]
+    ](None)
     uid = textual.reactive.reactive[typing.Optional[int]](None)
     user_name = textual.reactive.reactive[typing.Optional[str]](None)
+    gids = textual.reactive.reactive[typing.Optional[list[int]]](None)
+    security_label = textual.reactive.reactive[typing.Optional[str]](None)
     unique_name = textual.reactive.reactive[typing.Optional[str]](None)
     object_path = textual.reactive.reactive[typing.Optional[str]](None)
     interfaces = textual.reactive.reactive[
@@ -1076,8 +2014,13 @@ class ServiceDetails(textual.containers.Container):
             table.add_row("PID", "...", key="pid")
             table.add_row("Executable", "...", key="executable")
             table.add_row("Command Line", "...", key="command_line")
+            table.add_row("Working Directory", "...", key="cwd")
+            table.add_row("CGroup", "...", key="cgroup")
+            table.add_row("Parent Processes", "...", key="parents")
             table.add_row("UID", "...", key="uid")
             table.add_row("User Name", "...", key="user")
+            table.add_row("GIDs", "...", key="gids")
+            table.add_row("Security Label", "...", key="security_label")
             table.add_row("Object Path", "...", key="object_path")
 
             yield Interfaces().data_bind(interfaces=ServiceDetails.interfaces)
@@ -1090,36 +2033,66 @@ class ServiceDetails(textual.containers.Container):
             textual.widgets.DataTable
         ).update_cell("name", "value", self.service, update_width=True)
 
+        # NOTE:
+        # Details equal to the ones of the previous service are not watched
+        # again, show them for the new one.
+        self.watch_pid()
+        self.watch_uid()
+        self.watch_unique_name()
+        self.watch_user_name()
+        self.watch_gids()
+        self.watch_security_label()
+        self.watch_executable()
+        self.watch_command_line()
+        self.watch_cwd()
+        self.watch_cgroup()
+        self.watch_parents()
+
+    # NOTE:
+    # Details which are not available for the selected service, such as
+    # GIDs on buses not providing them, are shown as "-".
+
     def watch_pid(self):
-        if self.pid == None:
+        if self.service == None:
             return
 
         self.query_one(textual.containers.VerticalScroll).query_one(
             textual.widgets.DataTable
-        ).update_cell("pid", "value", self.pid, update_width=True)
+        ).update_cell(
+            "pid",
+            "value",
+            "-" if self.pid == None else self.pid,
+            update_width=True,
+        )
 
     def watch_uid(self):
-        if self.uid == None:
+        if self.service == None:
             return
 
         self.query_one(textual.containers.VerticalScroll).query_one(
             textual.widgets.DataTable
-        ).update_cell("uid", "value", self.uid, update_width=True)
+        ).update_cell(
+            "uid",
+            "value",
+            "-" if self.uid == None else self.uid,
+            update_width=True,
+        )
 
     def watch_unique_name(self):
-        if self.unique_name == None:
+        if self.service == None:
             return
+
         self.query_one(textual.containers.VerticalScroll).query_one(
             textual.widgets.DataTable
         ).update_cell(
             "unique_name",
             "value",
-            self.unique_name,
+            self.unique_name or "-",
             update_width=True,
         )
 
     def watch_user_name(self):
-        if self.user_name == None:
+        if self.service == None:
             return
 
         self.query_one(textual.containers.VerticalScroll).query_one(
@@ -1127,12 +2100,42 @@ class ServiceDetails(textual.containers.Container):
         ).update_cell(
             "user",
             "value",
-            self.user_name,
+            self.user_name or "-",
+            update_width=True,
+        )
+
+    def watch_gids(self):
+        if self.service == None:
+            return
+
+        self.query_one(textual.containers.VerticalScroll).query_one(
+            textual.widgets.DataTable
+        ).update_cell(
+            "gids",
+            "value",
+            (
+                "-"
+                if self.gids == None
+                else " ".join([str(gid) for gid in self.gids])
+            ),
+            update_width=True,
+        )
+
+    def watch_security_label(self):
+        if self.service == None:
+            return
+
+        self.query_one(textual.containers.VerticalScroll).query_one(
+            textual.widgets.DataTable
+        ).update_cell(
+            "security_label",
+            "value",
+            self.security_label or "-",
             update_width=True,
         )
 
     def watch_executable(self):
-        if self.executable == None:
+        if self.service == None:
             return
 
         self.query_one(textual.containers.VerticalScroll).query_one(
@@ -1140,12 +2143,12 @@ class ServiceDetails(textual.containers.Container):
         ).update_cell(
             "executable",
             "value",
-            self.executable,
+            self.executable or "-",
             update_width=True,
         )
 
     def watch_command_line(self):
-        if self.command_line == None:
+        if self.service == None:
             return
 
         self.query_one(textual.containers.VerticalScroll).query_one(
@@ -1153,7 +2156,64 @@ class ServiceDetails(textual.containers.Container):
         ).update_cell(
             "command_line",
             "value",
-            " ".join([shlex.quote(arg) for arg in self.command_line]),
+            (
+                "-"
+                if self.command_line == None
+                else " ".join([shlex.quote(arg) for arg in self.command_line])
+            ),
+            update_width=True,
+        )
+
+    def watch_cwd(self):
+        if self.service == None:
+            return
+
+        self.query_one(textual.containers.VerticalScroll).query_one(
+            textual.widgets.DataTable
+        ).update_cell(
+            "cwd",
+            "value",
+            self.cwd or "-",
+            update_width=True,
+        )
+
+    def watch_cgroup(self):
+        if self.service == None:
+            return
+
+        self.query_one(textual.containers.VerticalScroll).query_one(
+            textual.widgets.DataTable
+        ).update_cell(
+            "cgroup",
+            "value",
+            self.cgroup or "-",
+            update_width=True,
+        )
+
+    def watch_parents(self):
+        if self.service == None:
+            return
+
+        self.query_one(textual.containers.VerticalScroll).query_one(
+            textual.widgets.DataTable
+        ).update_cell(
+            "parents",
+            "value",
+            (
+                "-"
+                if self.parents == None
+                else " < ".join(
+                    [
+                        str(parent.pid)
+                        + " "
+                        + os.path.basename(
+                            parent.executable
+                            or (parent.command_line or ["?"])[0]
+                        )
+                        for parent in self.parents
+                    ]
+                )
+            ),
             update_width=True,
         )
 
@@ -1 +1,19 @@
-from .DBuSPY import DBuSPY
+import typing
+
+if typing.TYPE_CHECKING:
+    from .DBuSPY import DBuSPY
+
+
+# NOTE:
+# The application is imported on first use, so that importing this package,
+# e.g. for the command line parser, does not load Textual.
+def __getattr__(name: str):
+    if name != "DBuSPY":
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    from .DBuSPY import DBuSPY
+
+    # NOTE:
+    # Importing the submodule has bound its name to the module itself.
+    globals()["DBuSPY"] = DBuSPY
+    return DBuSPY
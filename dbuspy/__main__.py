@@ -1,7 +1,52 @@
-from . import DBuSPY
+from . import startup
+from . import store
+import argparse
+import sys
+
 
 def main():
-    DBuSPY().run()
+    parser = argparse.ArgumentParser(
+        prog="dbuspy",
+        description="A D-Feet like TUI program.",
+    )
+    parser.add_argument(
+        "--profile-startup",
+        action="store_true",
+        help="print the time spent in each startup phase "
+        "and exit once the first service list is shown",
+    )
+    parser.add_argument(
+        "--no-disk-cache",
+        action="store_true",
+        help="do not read or write introspection results cached on disk",
+    )
+    parser.add_argument(
+        "--open-capture",
+        metavar="PATH",
+        help="browse the messages of a D-Bus pcap capture, "
+        "as written by the Monitor button or busctl capture",
+    )
+    args = parser.parse_args()
+
+    if args.profile_startup:
+        startup.enable()
+
+    if args.no_disk_cache:
+        store.disable()
+
+    startup.mark("parse arguments")
+
+    # NOTE:
+    # Imported here, so that --help does not have to load Textual.
+    from . import DBuSPY
+
+    startup.mark("import modules")
+
+    DBuSPY(capture_path=args.open_capture).run()
+
+    if args.profile_startup:
+        print(startup.report(), file=sys.stderr)
+
 
 if __name__ == "__main__":
     main()
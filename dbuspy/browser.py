@@ -0,0 +1,807 @@
+from . import pcap
+from . import store
+import array
+import asyncio
+import bisect
+import hashlib
+import itertools
+import mmap
+import os
+import rich.text
+import struct
+import textual.app
+import textual.binding
+import textual.containers
+import textual.screen
+import textual.timer
+import textual.widgets
+import threading
+import typing
+
+MAGIC = b"DBuSPY capture index 1\n\0"
+
+# NOTE:
+# The index of a capture starts with this header: the magic, the size and
+# modification time of the capture it was built from, the number of messages
+# and of serial buckets, the offset of the string table and the offsets of
+# the postings of each key.
+INDEX_HEADER = struct.Struct("<24sQQQQQ5Q")
+
+# NOTE:
+# A record per message follows: its offset in the capture, its time, length,
+# serial and reply serial, the ids in the string table of its sender,
+# destination, path, interface and member or error name, 0 for none, the
+# index of the message it is paired with, -1 for none, its type and flags.
+MESSAGE = struct.Struct("<QdIIIIIIIIiBB2x")
+PAIR_OFFSET = struct.calcsize("<QdIIIIIIII")
+
+# NOTE:
+# Keys messages are indexed by, and the fields of their records holding them.
+# Serials index both the serial and the reply serial of messages, hashed into
+# a bucket per message.
+KEYS = ("sender", "destination", "interface", "member", "serial")
+KEY_FIELDS = (5, 6, 8, 9)
+
+# NOTE:
+# Messages are (index, time, length, serial, reply serial, type, flags,
+# sender, destination, path, interface, member or error name, index of the
+# message paired with).
+Message = tuple[
+    int, float, int, int, int, int, int, str, str, str, str, str, int
+]
+
+
+def get_index_path(capture_path: str) -> str:
+    return store.get_cache_path(
+        "captures",
+        hashlib.blake2b(
+            os.path.realpath(capture_path).encode(errors="surrogateescape"),
+            digest_size=16,
+        ).hexdigest(),
+    )
+
+
+def read_pcap_header(data: mmap.mmap) -> tuple[str, int]:
+    """Returns the byte order of a capture, and the number of its timestamp
+    units per second."""
+
+    if len(data) < pcap.PCAP_HEADER.size:
+        raise ValueError("not a pcap file")
+
+    for byte_order in "<>":
+        (magic,) = struct.unpack_from(byte_order + "I", data)
+        if magic == pcap.PCAP_MAGIC:
+            resolution = 1000000
+        elif magic == pcap.PCAP_NANOSECOND_MAGIC:
+            resolution = 1000000000
+        else:
+            continue
+
+        (linktype,) = struct.unpack_from(byte_order + "I", data, 20)
+        if linktype != pcap.LINKTYPE_DBUS:
+            raise ValueError(f"not a D-Bus capture, link type {linktype}")
+
+        return byte_order, resolution
+
+    raise ValueError("not a pcap file")
+
+
+class CaptureIndex:
+    """Index of the messages of a capture by sender, destination, interface,
+    member and serial, pairing method calls with their replies.
+
+    Both the capture and the index are memory-mapped, only the strings of the
+    capture are loaded. The index is built by scanning the capture once, and
+    kept on disk until the capture changes. It holds a record per message and,
+    for every key, the sorted indexes of the messages having it.
+
+    Methods block on the filesystem, opening a capture not indexed yet
+    takes a while, call them from a thread.
+    """
+
+    def __init__(
+        self, capture_path: str, index_path: typing.Optional[str] = None
+    ):
+        self.capture_path = capture_path
+        self.index_path = index_path or get_index_path(capture_path)
+
+        # NOTE: Progress of the scan of the capture, in bytes.
+        self.capture_size = 0
+        self.scanned = 0
+
+        self.strings: list[str] = []
+        self._string_ids: dict[str, int] = {}
+        self._messages = 0
+        self._buckets = 0
+        self._postings: tuple[int, ...] = ()
+        self._first_time = 0.0
+
+        self._lock = threading.Lock()
+        self._cancelled = False
+        self._capture_file: typing.Optional[typing.BinaryIO] = None
+        self._capture_map: typing.Optional[mmap.mmap] = None
+        self._index_map: typing.Optional[mmap.mmap] = None
+
+    def __len__(self) -> int:
+        return self._messages
+
+    @property
+    def ready(self) -> bool:
+        return self._index_map is not None
+
+    def open(self):
+        with self._lock:
+            if self._cancelled or self._capture_file is not None:
+                return
+
+            self._capture_file = open(self.capture_path, "rb")
+            try:
+                self._open(self._capture_file)
+            except BaseException:
+                self._release()
+                raise
+            if self._cancelled:
+                self._release()
+
+    def _open(self, capture_file: typing.BinaryIO):
+        stat = os.fstat(capture_file.fileno())
+        self.capture_size = stat.st_size
+        if not self.capture_size:
+            raise ValueError("empty capture")
+        self._capture_map = mmap.mmap(
+            capture_file.fileno(),
+            self.capture_size,
+            access=mmap.ACCESS_READ,
+        )
+
+        if self._load_index(stat.st_mtime_ns):
+            return
+
+        os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
+        temporary_path = self.index_path + ".tmp"
+        try:
+            with open(temporary_path, "w+b", buffering=1024 * 1024) as f:
+                self._build(f, stat.st_mtime_ns)
+        except BaseException:
+            os.unlink(temporary_path)
+            if self._cancelled:
+                return
+            raise
+        os.replace(temporary_path, self.index_path)
+        self._load_index(stat.st_mtime_ns)
+
+    def cancel(self):
+        """Interrupts building the index, without waiting for it to stop."""
+
+        self._cancelled = True
+
+    def close(self):
+        # NOTE: Interrupts building the index, then waits for it to stop.
+        self.cancel()
+
+        with self._lock:
+            self._release()
+
+    def _release(self):
+        if self._index_map is not None:
+            self._index_map.close()
+            self._index_map = None
+        if self._capture_map is not None:
+            self._capture_map.close()
+            self._capture_map = None
+        if self._capture_file is not None:
+            self._capture_file.close()
+            self._capture_file = None
+
+    def _load_index(self, mtime: int) -> bool:
+        try:
+            with open(self.index_path, "rb") as f:
+                if os.fstat(f.fileno()).st_size < INDEX_HEADER.size:
+                    return False
+                index_map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except FileNotFoundError:
+            return False
+
+        (
+            magic,
+            capture_size,
+            capture_mtime,
+            messages,
+            buckets,
+            strings_offset,
+            *postings,
+        ) = INDEX_HEADER.unpack_from(index_map)
+        if (magic, capture_size, capture_mtime) != (
+            MAGIC,
+            self.capture_size,
+            mtime,
+        ):
+            index_map.close()
+            return False
+
+        (count,) = struct.unpack_from("<I", index_map, strings_offset)
+        offset = strings_offset + 4
+        strings = []
+        for _ in range(count):
+            (length,) = struct.unpack_from("<I", index_map, offset)
+            strings.append(
+                index_map[offset + 4 : offset + 4 + length].decode(
+                    errors="replace"
+                )
+            )
+            offset += 4 + length
+
+        self.strings = strings
+        self._string_ids = {string: id for id, string in enumerate(strings)}
+        self._messages = messages
+        self._buckets = buckets
+        self._postings = tuple(postings)
+        self._index_map = index_map
+        self.scanned = self.capture_size
+        if messages:
+            self._first_time = MESSAGE.unpack_from(
+                index_map, INDEX_HEADER.size
+            )[1]
+        return True
+
+    def _build(self, f: typing.BinaryIO, mtime: int):
+        capture = self._capture_map
+        assert capture is not None
+
+        byte_order, resolution = read_pcap_header(capture)
+        record_header = struct.Struct(byte_order + "IIII")
+
+        # NOTE:
+        # Serials are hashed into a bucket per KiB of capture, enough to
+        # keep a few messages per bucket.
+        buckets = 1
+        while buckets < self.capture_size // 1024:
+            buckets *= 2
+        mask = buckets - 1
+
+        # NOTE:
+        # Postings are sorted by counting: count the messages of each key
+        # while scanning, then fill the range of each key in the order of
+        # the messages. Counts are shifted by one, to be summed into the
+        # start of the range of each key.
+        strings = [b""]
+        string_ids = {b"": 0}
+        counts = [array.array("Q", [0, 0]) for _ in KEY_FIELDS]
+        serial_counts = array.array("Q", bytes(8 * (buckets + 1)))
+        sender_counts, destination_counts, interface_counts, member_counts = (
+            counts
+        )
+
+        def get_string_id(value: typing.Optional[bytes]) -> int:
+            if value is None:
+                return 0
+            id = string_ids.get(value)
+            if id is None:
+                id = string_ids[value] = len(strings)
+                strings.append(value)
+                for count in counts:
+                    count.append(0)
+            return id
+
+        # NOTE:
+        # Calls waiting for a reply by sender and serial, and the pairs of
+        # calls and replies found, flattened.
+        calls: dict[tuple[int, int], int] = {}
+        pairs = array.array("I")
+
+        messages = 0
+        f.write(bytes(INDEX_HEADER.size))
+
+        offset = pcap.PCAP_HEADER.size
+        while offset + pcap.RECORD_HEADER.size <= self.capture_size:
+            if self._cancelled:
+                raise InterruptedError
+
+            seconds, fraction, length, _ = record_header.unpack_from(
+                capture, offset
+            )
+            start = offset + pcap.RECORD_HEADER.size
+            if start + length > self.capture_size:
+                # NOTE: The capture is still being written.
+                break
+
+            try:
+                message_type, flags, serial, _, _, fields = pcap.parse_fields(
+                    capture, start
+                )
+            except (ValueError, IndexError, struct.error):
+                # NOTE: Messages cut short by the snapshot length.
+                message_type, flags, serial, fields = 0, 0, 0, [None] * 10
+
+            sender = get_string_id(fields[7])
+            destination = get_string_id(fields[6])
+            interface = get_string_id(fields[2])
+            member = get_string_id(fields[4] or fields[3])
+            reply_serial = fields[5] or 0
+
+            if sender:
+                sender_counts[sender + 1] += 1
+            if destination:
+                destination_counts[destination + 1] += 1
+            if interface:
+                interface_counts[interface + 1] += 1
+            if member:
+                member_counts[member + 1] += 1
+            serial_counts[(serial & mask) + 1] += 1
+            if reply_serial and reply_serial & mask != serial & mask:
+                serial_counts[(reply_serial & mask) + 1] += 1
+
+            if message_type == 1:
+                if not flags & pcap.NO_REPLY_EXPECTED:
+                    calls[(sender, serial)] = messages
+            elif reply_serial:
+                call = calls.pop((destination, reply_serial), None)
+                if call is not None:
+                    pairs.append(call)
+                    pairs.append(messages)
+
+            f.write(
+                MESSAGE.pack(
+                    start,
+                    seconds + fraction / resolution,
+                    length,
+                    serial,
+                    reply_serial,
+                    sender,
+                    destination,
+                    get_string_id(fields[1]),
+                    interface,
+                    member,
+                    -1,
+                    message_type,
+                    flags,
+                )
+            )
+            messages += 1
+            offset = start + length
+            self.scanned = offset
+
+        counts.append(serial_counts)
+        f.flush()
+        self._write_postings(
+            f, messages, buckets, strings, counts, pairs, mtime
+        )
+
+    def _write_postings(
+        self,
+        f: typing.BinaryIO,
+        messages: int,
+        buckets: int,
+        strings: list[bytes],
+        counts: list[array.array],
+        pairs: array.array,
+        mtime: int,
+    ):
+        mask = buckets - 1
+        end = f.seek(0, os.SEEK_END)
+
+        postings = []
+        offset = pcap.align(end, 8)
+        for key, count in enumerate(counts):
+            counts[key] = array.array("Q", itertools.accumulate(count))
+            postings.append(offset)
+            offset = pcap.align(
+                offset + 8 * len(count) + 4 * counts[key][-1], 8
+            )
+        strings_offset = offset
+
+        f.truncate(strings_offset)
+        f.seek(strings_offset)
+        f.write(struct.pack("<I", len(strings)))
+        for string in strings:
+            f.write(struct.pack("<I", len(string)) + string)
+        f.flush()
+
+        index_map = mmap.mmap(f.fileno(), strings_offset)
+        try:
+            for call, reply in zip(pairs[::2], pairs[1::2]):
+                for message, pair in ((call, reply), (reply, call)):
+                    struct.pack_into(
+                        "<i",
+                        index_map,
+                        INDEX_HEADER.size
+                        + message * MESSAGE.size
+                        + PAIR_OFFSET,
+                        pair,
+                    )
+
+            with memoryview(index_map) as view:
+                data = []
+                for offset, count in zip(postings, counts):
+                    view[offset : offset + 8 * len(count)] = count.tobytes()
+                    start = offset + 8 * len(count)
+                    data.append(view[start : start + 4 * count[-1]].cast("I"))
+
+                # NOTE: The starts of the ranges move along as they fill.
+                keys = list(zip(KEY_FIELDS, data, counts))
+                serial_data, serial_positions = data[-1], counts[-1]
+                try:
+                    for message in range(messages):
+                        if self._cancelled:
+                            raise InterruptedError
+
+                        record = MESSAGE.unpack_from(
+                            index_map,
+                            INDEX_HEADER.size + message * MESSAGE.size,
+                        )
+                        for field, postings_data, positions in keys:
+                            id = record[field]
+                            if id:
+                                postings_data[positions[id]] = message
+                                positions[id] += 1
+
+                        bucket = record[3] & mask
+                        serial_data[serial_positions[bucket]] = message
+                        serial_positions[bucket] += 1
+                        bucket = record[4] & mask
+                        if record[4] and bucket != record[3] & mask:
+                            serial_data[serial_positions[bucket]] = message
+                            serial_positions[bucket] += 1
+                finally:
+                    for postings_data in data:
+                        postings_data.release()
+
+            # NOTE: The header is written last, once the index is complete.
+            INDEX_HEADER.pack_into(
+                index_map,
+                0,
+                MAGIC,
+                self.capture_size,
+                mtime,
+                messages,
+                buckets,
+                strings_offset,
+                *postings,
+            )
+            index_map.flush()
+        finally:
+            index_map.close()
+
+    def _get_postings(self, key: int, id: int) -> array.array:
+        assert self._index_map is not None
+
+        offset = self._postings[key]
+        keys = self._buckets if key == len(KEY_FIELDS) else len(self.strings)
+        start, end = struct.unpack_from("<QQ", self._index_map, offset + 8 * id)
+        data = offset + 8 * (keys + 1)
+        return array.array(
+            "I", self._index_map[data + 4 * start : data + 4 * end]
+        )
+
+    def _get_record(self, message: int) -> tuple:
+        assert self._index_map is not None
+        return MESSAGE.unpack_from(
+            self._index_map, INDEX_HEADER.size + message * MESSAGE.size
+        )
+
+    def get_message(self, message: int) -> Message:
+        (
+            _,
+            at,
+            length,
+            serial,
+            reply_serial,
+            sender,
+            destination,
+            path,
+            interface,
+            member,
+            pair,
+            message_type,
+            flags,
+        ) = self._get_record(message)
+        return (
+            message,
+            at,
+            length,
+            serial,
+            reply_serial,
+            message_type,
+            flags,
+            self.strings[sender],
+            self.strings[destination],
+            self.strings[path],
+            self.strings[interface],
+            self.strings[member],
+            pair,
+        )
+
+    def get_latency(self, message: int) -> typing.Optional[float]:
+        """Returns the time between a call and its reply, given either."""
+
+        record = self._get_record(message)
+        if record[10] < 0:
+            return None
+        return abs(self._get_record(record[10])[1] - record[1])
+
+    def select(self, **filters: str) -> typing.Sequence[int]:
+        """Returns the sorted indexes of the messages matching all of the
+        filters, keyed as KEYS."""
+
+        candidates: list[typing.Sequence[int]] = []
+        for key, value in filters.items():
+            if key == "serial":
+                serial = int(value)
+                candidates.append(
+                    array.array(
+                        "I",
+                        (
+                            message
+                            for message in self._get_postings(
+                                len(KEY_FIELDS), serial & (self._buckets - 1)
+                            )
+                            if serial in self._get_record(message)[3:5]
+                        ),
+                    )
+                )
+                continue
+
+            id = self._string_ids.get(value)
+            if not id:
+                return array.array("I")
+            candidates.append(self._get_postings(KEYS.index(key), id))
+
+        if not candidates:
+            return range(self._messages)
+
+        # NOTE:
+        # Start from the fewest messages, looking the others up in the
+        # larger postings.
+        candidates.sort(key=len)
+
+        def contains(postings: typing.Sequence[int], message: int) -> bool:
+            index = bisect.bisect_left(postings, message)
+            return index < len(postings) and postings[index] == message
+
+        return array.array(
+            "I",
+            (
+                message
+                for message in candidates[0]
+                if all(contains(other, message) for other in candidates[1:])
+            ),
+        )
+
+    def get_row(self, message: int) -> tuple[str, ...]:
+        (
+            _,
+            at,
+            _,
+            serial,
+            reply_serial,
+            message_type,
+            _,
+            sender,
+            destination,
+            path,
+            interface,
+            member,
+            _,
+        ) = self.get_message(message)
+        latency = self.get_latency(message)
+        return (
+            str(message + 1),
+            f"{at - self._first_time:.6f}",
+            pcap.MESSAGE_TYPES.get(message_type, "?"),
+            str(serial),
+            str(reply_serial or ""),
+            sender,
+            destination,
+            path,
+            interface,
+            member,
+            "" if latency is None else f"{latency * 1000:.3f} ms",
+        )
+
+
+def parse_filters(query: str) -> dict[str, str]:
+    filters = {}
+    for term in query.split():
+        key, separator, value = term.partition("=")
+        if not separator or key not in KEYS:
+            raise ValueError(f"expected {'=, '.join(KEYS)}=, got {term!r}")
+        if key == "serial" and not value.isdigit():
+            raise ValueError(f"invalid serial {value!r}")
+        filters[key] = value
+    return filters
+
+
+class CaptureScreen(textual.screen.Screen):
+    """Browses the messages of a capture, filtered by the keys of its index.
+
+    The table only holds a window of PAGE_SIZE messages around the cursor,
+    moved as the cursor reaches either end of it.
+    """
+
+    DEFAULT_CSS = """
+    CaptureScreen {
+        align: center middle;
+        background: $surface 50%;
+    }
+    CaptureScreen > Container {
+        border: round $border;
+        padding: 0 1 0 1;
+        width: 90%;
+        height: 90%;
+    }
+    CaptureScreen DataTable {
+        height: 1fr;
+    }
+    """
+    BINDINGS = [
+        textual.binding.Binding("escape", "app.pop_screen", "Close"),
+        textual.binding.Binding("g", "first", "First"),
+        textual.binding.Binding("G", "last", "Last"),
+        textual.binding.Binding("p", "show_pair", "Call/reply"),
+    ]
+
+    PAGE_SIZE = 200
+    QUERY_DELAY = 0.1
+    PROGRESS_INTERVAL = 0.5
+
+    def __init__(self, path: str):
+        super().__init__()
+        self.path = path
+        self.index = CaptureIndex(path)
+        self.selection: typing.Sequence[int] = range(0)
+        # NOTE: Position in the selection of the first row of the table.
+        self.window_start = 0
+        self.query_timer: typing.Optional[textual.timer.Timer] = None
+        self.progress_timer: typing.Optional[textual.timer.Timer] = None
+
+    def compose(self) -> textual.app.ComposeResult:
+        yield textual.widgets.Footer()
+        with textual.containers.Container():
+            yield textual.widgets.Label(
+                rich.text.Text(self.path, style="bold")
+            )
+            yield textual.widgets.Input(
+                placeholder=" ".join(key + "=" for key in KEYS)
+            )
+            yield textual.widgets.Label(id="status")
+            yield textual.widgets.DataTable(cursor_type="row")
+
+    def on_mount(self):
+        table = self.query_one(textual.widgets.DataTable)
+        table.add_column("#", key="index")
+        table.add_column("Time", key="time")
+        table.add_column("Type", key="type")
+        table.add_column("Serial", key="serial")
+        table.add_column("Reply to", key="reply_serial")
+        table.add_column("Sender", key="sender")
+        table.add_column("Destination", key="destination")
+        table.add_column("Object path", key="path")
+        table.add_column("Interface", key="interface")
+        table.add_column("Member", key="member")
+        table.add_column("Latency", key="latency")
+
+        self.progress_timer = self.set_interval(
+            self.PROGRESS_INTERVAL, self.update_progress
+        )
+        self.open_index()
+
+    async def on_unmount(self):
+        # NOTE:
+        # Building the index stops at its next check, waited for in a thread
+        # rather than on the event loop.
+        self.index.cancel()
+        await asyncio.to_thread(self.index.close)
+
+    @textual.work(exclusive=True, group="index")
+    async def open_index(self):
+        # NOTE:
+        # Not run_io, as building the index of a large capture takes longer
+        # than its timeout for stuck calls.
+        try:
+            await asyncio.to_thread(self.index.open)
+        except Exception as e:
+            self.notify(f"Failed to open capture: {e}", severity="error")
+            self.query_one("#status", textual.widgets.Label).update(str(e))
+            return
+        finally:
+            if self.progress_timer is not None:
+                self.progress_timer.stop()
+                self.progress_timer = None
+
+        self.update_selection()
+
+    def update_progress(self):
+        if not self.index.capture_size:
+            return
+        self.query_one("#status", textual.widgets.Label).update(
+            f"Indexing {self.index.scanned * 100 // self.index.capture_size}%"
+        )
+
+    def on_input_changed(self, event: textual.widgets.Input.Changed):
+        # NOTE: Query once typing pauses.
+        if self.query_timer is not None:
+            self.query_timer.stop()
+        self.query_timer = self.set_timer(
+            self.QUERY_DELAY, self.update_selection
+        )
+
+    def on_input_submitted(self):
+        self.query_one(textual.widgets.DataTable).focus()
+
+    def update_selection(self):
+        if not self.index.ready:
+            return
+
+        status = self.query_one("#status", textual.widgets.Label)
+        try:
+            filters = parse_filters(self.query_one(textual.widgets.Input).value)
+        except ValueError as e:
+            status.update(str(e))
+            return
+
+        self.selection = self.index.select(**filters)
+        status.update(f"{len(self.selection)} of {len(self.index)} messages")
+        self.show_window(0, 0)
+
+    def show_window(self, start: int, position: int):
+        """Fills the table with the messages from position start of the
+        selection on, and moves the cursor to the one at position."""
+
+        start = max(min(start, len(self.selection) - self.PAGE_SIZE), 0)
+        self.window_start = start
+
+        table = self.query_one(textual.widgets.DataTable)
+        table.clear()
+        for message in self.selection[start : start + self.PAGE_SIZE]:
+            table.add_row(*self.index.get_row(message))
+
+        if table.row_count:
+            table.move_cursor(row=position - start, animate=False)
+
+    def on_data_table_row_highlighted(self):
+        table = self.query_one(textual.widgets.DataTable)
+
+        # NOTE:
+        # Read the cursor of the table rather than the one of the event, which
+        # may have moved since along with the window.
+        row = table.cursor_row
+        if row == 0 and self.window_start > 0:
+            self.show_window(
+                self.window_start - self.PAGE_SIZE // 2, self.window_start
+            )
+        elif (
+            row == table.row_count - 1
+            and self.window_start + table.row_count < len(self.selection)
+        ):
+            self.show_window(
+                self.window_start + self.PAGE_SIZE // 2, self.window_start + row
+            )
+
+    def on_data_table_row_selected(self):
+        self.action_show_pair()
+
+    def action_first(self):
+        self.show_window(0, 0)
+
+    def action_last(self):
+        self.show_window(
+            len(self.selection) - self.PAGE_SIZE, len(self.selection) - 1
+        )
+
+    def action_show_pair(self):
+        table = self.query_one(textual.widgets.DataTable)
+        if not table.row_count:
+            return
+
+        message = self.selection[self.window_start + table.cursor_row]
+        pair = self.index.get_message(message)[-1]
+        if pair < 0:
+            self.notify("No call or reply paired with this message")
+            return
+
+        position = bisect.bisect_left(self.selection, pair)
+        if position == len(self.selection) or self.selection[position] != pair:
+            self.notify(f"Message {pair + 1} is filtered out")
+            return
+
+        self.show_window(position - self.PAGE_SIZE // 2, position)
@@ -0,0 +1,490 @@
+from . import capture
+from . import pcap
+import array
+import heapq
+import math
+import rich.text
+import textual.app
+import textual.binding
+import textual.containers
+import textual.timer
+import textual.widgets
+import threading
+import time
+import typing
+
+GROUPS = ("sender", "destination", "interface", "member")
+
+# NOTE:
+# Rows are (key, messages/s, bytes/s, messages, 50th, 90th and 99th
+# percentiles of the latency of calls, in seconds).
+Row = tuple[
+    str,
+    float,
+    float,
+    int,
+    typing.Optional[float],
+    typing.Optional[float],
+    typing.Optional[float],
+]
+
+PERCENTILES = (0.5, 0.9, 0.99)
+
+
+class Counter:
+    """Messages, bytes and latencies of calls of a key, over the last WINDOW
+    seconds.
+
+    Each second has a slot, reused once out of the window. Latencies are
+    counted in histograms with BINS_PER_OCTAVE bins per doubling from
+    MIN_LATENCY on, only allocated once the key sees a call answered.
+    """
+
+    __slots__ = ("second", "total", "messages", "bytes", "latencies")
+
+    WINDOW = 10
+    MIN_LATENCY = 1e-6
+    BINS_PER_OCTAVE = 4
+    BINS = 32 * BINS_PER_OCTAVE
+
+    def __init__(self, second: int):
+        # NOTE: The latest second counted.
+        self.second = second
+        self.total = 0
+        self.messages = array.array("Q", bytes(8 * self.WINDOW))
+        self.bytes = array.array("Q", bytes(8 * self.WINDOW))
+        self.latencies: typing.Optional[array.array] = None
+
+    def _advance(self, second: int):
+        if second <= self.second:
+            return
+
+        # NOTE: Clear the slots of the seconds skipped, and of the new one.
+        for skipped in range(
+            max(self.second + 1, second - self.WINDOW + 1), second + 1
+        ):
+            slot = skipped % self.WINDOW
+            self.messages[slot] = 0
+            self.bytes[slot] = 0
+            if self.latencies is not None:
+                start = slot * self.BINS
+                self.latencies[start : start + self.BINS] = array.array(
+                    "I", bytes(4 * self.BINS)
+                )
+        self.second = second
+
+    def add(self, second: int, size: int):
+        self._advance(second)
+        slot = second % self.WINDOW
+        self.messages[slot] += 1
+        self.bytes[slot] += size
+        self.total += 1
+
+    def add_latency(self, second: int, latency: float):
+        self._advance(second)
+        if self.latencies is None:
+            self.latencies = array.array(
+                "I", bytes(4 * self.WINDOW * self.BINS)
+            )
+
+        index = 0
+        if latency > self.MIN_LATENCY:
+            index = min(
+                int(
+                    math.log2(latency / self.MIN_LATENCY)
+                    * self.BINS_PER_OCTAVE
+                ),
+                self.BINS - 1,
+            )
+        self.latencies[second % self.WINDOW * self.BINS + index] += 1
+
+    def _get_slots(self, now: int) -> list[int]:
+        """Returns the slots of the seconds of the window ending at now."""
+
+        return [
+            second % self.WINDOW
+            for second in range(
+                max(now - self.WINDOW + 1, self.second - self.WINDOW + 1),
+                min(now, self.second) + 1,
+            )
+        ]
+
+    def get_rates(self, now: int, span: float) -> tuple[float, float]:
+        """Returns messages and bytes per second over the window ending at
+        now, given how many seconds of it were monitored."""
+
+        slots = self._get_slots(now)
+        return (
+            sum(self.messages[slot] for slot in slots) / span,
+            sum(self.bytes[slot] for slot in slots) / span,
+        )
+
+    def get_percentiles(self, now: int) -> list[typing.Optional[float]]:
+        if self.latencies is None:
+            return [None] * len(PERCENTILES)
+
+        histogram = [0] * self.BINS
+        for slot in self._get_slots(now):
+            start = slot * self.BINS
+            for index, count in enumerate(
+                self.latencies[start : start + self.BINS]
+            ):
+                histogram[index] += count
+
+        total = sum(histogram)
+        if not total:
+            return [None] * len(PERCENTILES)
+
+        percentiles: list[typing.Optional[float]] = []
+        seen = 0
+        bins = iter(enumerate(histogram))
+        for percentile in PERCENTILES:
+            rank = math.ceil(total * percentile)
+            while seen < rank:
+                index, count = next(bins)
+                seen += count
+            # NOTE: Middle of the bin, on a logarithmic scale.
+            percentiles.append(
+                self.MIN_LATENCY * 2 ** ((index + 0.5) / self.BINS_PER_OCTAVE)
+            )
+        return percentiles
+
+
+class BusStatistics(capture.MonitorConnection):
+    """Counts every message on a bus by sender, destination, interface and
+    member, through a monitor connection.
+
+    Memory grows with the keys seen, not with the messages: a Counter per
+    key, forgotten once out of the window, and the calls waiting for a
+    reply, the oldest ones forgotten past MAX_CALLS. Replies and errors are
+    counted under the interface and member of their call.
+    """
+
+    MAX_CALLS = 65536
+    CALL_TIMEOUT = 30.0
+
+    def __init__(self, bus_address: str):
+        super().__init__(bus_address, [])
+        self.started_at = time.time()
+        self.counters: dict[str, dict[bytes, Counter]] = {
+            group: {} for group in GROUPS
+        }
+        # NOTE:
+        # Calls waiting for a reply by sender and serial, with their time
+        # and their counters, in the order they were sent.
+        self._calls: dict[
+            tuple[bytes, int], tuple[float, list[Counter]]
+        ] = {}
+        self._lock = threading.Lock()
+
+    def open(self):
+        self.started_at = time.time()
+
+    def _get_counter(
+        self, counters: dict[bytes, Counter], key: bytes, second: int
+    ) -> Counter:
+        counter = counters.get(key)
+        if counter is None:
+            counter = counters[key] = Counter(second)
+        return counter
+
+    def on_message(self, data: memoryview, at: float):
+        try:
+            message_type, flags, serial, _, _, fields = pcap.parse_fields(
+                data
+            )
+        except (ValueError, IndexError):
+            return
+
+        sender = bytes(fields[7] or b"")
+        destination = bytes(fields[6] or b"")
+        second = int(at)
+
+        with self._lock:
+            call = None
+            if message_type in (2, 3) and fields[5] is not None:
+                call = self._calls.pop((destination, fields[5]), None)
+
+            if call is not None:
+                called_at, counters = call
+                # NOTE: Counted as the interface and member of the call.
+                interface_counter, member_counter = counters[2:]
+            else:
+                interface_counter = self._get_counter(
+                    self.counters["interface"],
+                    bytes(fields[2] or b""),
+                    second,
+                )
+                member_counter = self._get_counter(
+                    self.counters["member"],
+                    bytes(fields[4] or fields[3] or b""),
+                    second,
+                )
+
+            counters = [
+                self._get_counter(self.counters["sender"], sender, second),
+                self._get_counter(
+                    self.counters["destination"], destination, second
+                ),
+                interface_counter,
+                member_counter,
+            ]
+            for counter in counters:
+                counter.add(second, len(data))
+
+            if call is not None:
+                # NOTE: Latencies are counted for the keys of the call.
+                latency = at - called_at
+                for counter in call[1]:
+                    counter.add_latency(second, latency)
+            elif message_type == 1 and not flags & pcap.NO_REPLY_EXPECTED:
+                self._calls[(sender, serial)] = (at, counters)
+                self._forget_calls(at)
+
+    def _forget_calls(self, now: float):
+        # NOTE: Dictionaries keep the order calls were sent in.
+        while self._calls:
+            key, (called_at, _) = next(iter(self._calls.items()))
+            if (
+                len(self._calls) <= self.MAX_CALLS
+                and now - called_at < self.CALL_TIMEOUT
+            ):
+                break
+            del self._calls[key]
+
+    def _forget_counters(self, now: int):
+        # NOTE:
+        # Unique names come and go on a bus, keys without messages in the
+        # window are dropped instead of piling up.
+        for counters in self.counters.values():
+            for key in [
+                key
+                for key, counter in counters.items()
+                if counter.second <= now - Counter.WINDOW
+            ]:
+                del counters[key]
+
+    def get_rows(
+        self,
+        group: str,
+        limit: int,
+        sort: int,
+        now: typing.Optional[float] = None,
+    ) -> list[Row]:
+        """Returns the limit rows of a group with the highest value of
+        column sort, at now or the current time."""
+
+        if now is None:
+            now = time.time()
+        span = max(min(now - self.started_at, Counter.WINDOW), 1.0)
+        second = int(now)
+
+        with self._lock:
+            self._forget_counters(second)
+            counters = list(self.counters[group].items())
+
+        def get_row(item: tuple[bytes, Counter]) -> Row:
+            key, counter = item
+            messages, size = counter.get_rates(second, span)
+            p50, p90, p99 = counter.get_percentiles(second)
+            return (
+                key.decode(errors="replace"),
+                messages,
+                size,
+                counter.total,
+                p50,
+                p90,
+                p99,
+            )
+
+        # NOTE:
+        # Percentiles need the histograms summed, sort by rates first and
+        # only read the percentiles of the rows shown.
+        if sort in (1, 2, 3):
+            now_second = second
+
+            def get_value(item: tuple[bytes, Counter]) -> float:
+                if sort == 3:
+                    return item[1].total
+                return item[1].get_rates(now_second, span)[sort - 1]
+
+            return [
+                get_row(item)
+                for item in heapq.nlargest(limit, counters, key=get_value)
+            ]
+
+        return heapq.nlargest(
+            limit,
+            map(get_row, counters),
+            key=lambda row: -1.0 if row[sort] is None else row[sort],
+        )
+
+
+def format_size(size: float) -> str:
+    for unit in ("B", "KiB", "MiB"):
+        if size < 1024:
+            return f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GiB"
+
+
+def format_latency(latency: typing.Optional[float]) -> str:
+    if latency is None:
+        return "-"
+    if latency < 1e-3:
+        return f"{latency * 1e6:.0f} µs"
+    if latency < 1:
+        return f"{latency * 1e3:.1f} ms"
+    return f"{latency:.2f} s"
+
+
+class BusTopPane(textual.containers.Container):
+    """Messages on a bus per sender, destination, interface or member, the
+    busiest first, like top.
+
+    The bus is only monitored while the pane is shown, as monitors cost the
+    bus a copy of every message.
+    """
+
+    DEFAULT_CSS = """
+    BusTopPane > DataTable {
+        height: 1fr;
+    }
+    """
+    BINDINGS = [
+        textual.binding.Binding("s", "group('sender')", "By sender"),
+        textual.binding.Binding("d", "group('destination')", "By destination"),
+        textual.binding.Binding("i", "group('interface')", "By interface"),
+        textual.binding.Binding("m", "group('member')", "By member"),
+        textual.binding.Binding("o", "sort", "Sort"),
+    ]
+
+    REFRESH_INTERVAL = 1.0
+    LIMIT = 200
+
+    COLUMNS = (
+        "Messages/s",
+        "Bytes/s",
+        "Messages",
+        "Latency p50",
+        "Latency p90",
+        "Latency p99",
+    )
+
+    def __init__(self, bus_address: str):
+        super().__init__()
+        self.bus_address = bus_address
+        self.statistics: typing.Optional[BusStatistics] = None
+        self.refresh_timer: typing.Optional[textual.timer.Timer] = None
+        self.group = "sender"
+        # NOTE: Column of Row to sort by.
+        self.sort = 1
+
+    def compose(self) -> textual.app.ComposeResult:
+        yield textual.widgets.Label(id="status")
+        yield textual.widgets.DataTable(cursor_type="row")
+
+    def on_mount(self):
+        self.update_columns()
+
+    def on_show(self):
+        self.start_monitoring()
+
+    async def on_hide(self):
+        await self.stop_monitoring()
+
+    async def on_unmount(self):
+        await self.stop_monitoring()
+
+    @textual.work(exclusive=True, group="monitor")
+    async def start_monitoring(self):
+        if self.statistics is not None:
+            return
+
+        statistics = BusStatistics(self.bus_address)
+        try:
+            await statistics.start()
+        except Exception as e:
+            self.query_one("#status", textual.widgets.Label).update(
+                f"Failed to monitor the bus: {e}"
+            )
+            return
+
+        self.statistics = statistics
+        self.refresh_timer = self.set_interval(
+            self.REFRESH_INTERVAL, self.update_rows
+        )
+        self.update_rows()
+
+    async def stop_monitoring(self):
+        if self.refresh_timer is not None:
+            self.refresh_timer.stop()
+            self.refresh_timer = None
+
+        if self.statistics is not None:
+            statistics = self.statistics
+            self.statistics = None
+            await statistics.stop()
+
+    def update_columns(self):
+        table = self.query_one(textual.widgets.DataTable)
+        table.clear(columns=True)
+        table.add_column(self.group.capitalize(), key="key")
+        for index, column in enumerate(self.COLUMNS, 1):
+            label = column + (" ▼" if index == self.sort else "")
+            table.add_column(label, key=column)
+
+    def action_group(self, group: str):
+        self.group = group
+        self.update_columns()
+        self.update_rows()
+
+    def action_sort(self):
+        self.sort = self.sort % len(self.COLUMNS) + 1
+        self.update_columns()
+        self.update_rows()
+
+    def update_rows(self):
+        statistics = self.statistics
+        if statistics is None:
+            return
+
+        if statistics.error is not None:
+            self.query_one("#status", textual.widgets.Label).update(
+                f"Stopped monitoring the bus: {statistics.error}"
+            )
+            return
+
+        rows = statistics.get_rows(self.group, self.LIMIT, self.sort)
+
+        self.query_one("#status", textual.widgets.Label).update(
+            rich.text.Text(
+                f"{statistics.messages} messages, "
+                f"{format_size(statistics.size)} monitored, "
+                f"{len(statistics.counters[self.group])} "
+                f"{self.group}s, the top {len(rows)} shown"
+            )
+        )
+
+        table = self.query_one(textual.widgets.DataTable)
+
+        # NOTE: Keep the cursor on the same key as rows move around.
+        selected = None
+        if table.row_count:
+            selected = table.get_row_at(table.cursor_row)[0]
+
+        table.clear()
+        for key, messages, size, total, p50, p90, p99 in rows:
+            table.add_row(
+                key or "-",
+                f"{messages:.1f}",
+                format_size(size),
+                str(total),
+                format_latency(p50),
+                format_latency(p90),
+                format_latency(p99),
+            )
+
+        keys = [row[0] or "-" for row in rows]
+        if selected in keys:
+            table.move_cursor(row=keys.index(selected), scroll=False)
@@ -0,0 +1,655 @@
+from . import store
+from . import utils
+import asyncio
+import collections
+import dbus_fast.aio
+import dbus_fast.introspection
+import hashlib
+import typing
+import weakref
+import xml.etree.ElementTree
+
+NAME_OWNER_CHANGED_MATCH_RULE = (
+    "type='signal',"
+    "sender='org.freedesktop.DBus',"
+    "interface='org.freedesktop.DBus',"
+    "member='NameOwnerChanged'"
+)
+
+OBJECT_MANAGER_MATCH_RULE = (
+    "type='signal',interface='org.freedesktop.DBus.ObjectManager'"
+)
+
+
+def get_object_path_ancestors(path: str) -> list[str]:
+    ancestors = []
+    while path != "/":
+        path = path.rsplit("/", 1)[0] or "/"
+        ancestors.append(path)
+    return ancestors
+
+
+def begin_request(pending: dict[typing.Hashable, list], key: typing.Hashable):
+    pending.setdefault(key, [0, False])[0] += 1
+
+
+def end_request(pending: dict[typing.Hashable, list], key: typing.Hashable):
+    """Returns whether the request has been invalidated since it began."""
+
+    entry = pending[key]
+    entry[0] -= 1
+    if entry[0] == 0:
+        del pending[key]
+    return entry[1]
+
+
+Member = typing.Union[
+    dbus_fast.introspection.Method,
+    dbus_fast.introspection.Property,
+    dbus_fast.introspection.Signal,
+]
+
+MEMBER_KINDS = ("method", "property", "signal")
+
+
+def get_interface_members(
+    interface: dbus_fast.introspection.Interface, kind: str
+) -> list:
+    if kind == "method":
+        return interface.methods
+    if kind == "property":
+        return interface.properties
+    if kind == "signal":
+        return interface.signals
+    raise ValueError(f"unknown member kind {kind!r}")
+
+
+class IndexedNode(dbus_fast.introspection.Node):
+    """A Node looking up its interfaces by name, and their members by
+    (interface name, member kind, member name), in constant time."""
+
+    def __init__(
+        self,
+        name: typing.Optional[str] = None,
+        interfaces: typing.Optional[
+            list[dbus_fast.introspection.Interface]
+        ] = None,
+        is_root: bool = True,
+    ):
+        super().__init__(name, interfaces, is_root)
+        self.interfaces_by_name: dict[
+            str, dbus_fast.introspection.Interface
+        ] = {}
+        self.members: dict[str, dict[tuple[str, str], Member]] = {}
+
+    def add_interface(
+        self,
+        interface: dbus_fast.introspection.Interface,
+        members: dict[tuple[str, str], Member],
+    ):
+        self.interfaces.append(interface)
+        self.interfaces_by_name[interface.name] = interface
+        self.members[interface.name] = members
+
+    def get_interface(
+        self, name: str
+    ) -> typing.Optional[dbus_fast.introspection.Interface]:
+        return self.interfaces_by_name.get(name)
+
+    def get_member(
+        self, interface_name: str, kind: str, name: str
+    ) -> typing.Optional[Member]:
+        members = self.members.get(interface_name)
+        if members is None:
+            return None
+        return members.get((kind, name))
+
+
+class InterfaceTable:
+    """Parsed interfaces interned by the digest of their XML definition.
+
+    Objects implementing the same interface share a single instance, which
+    must therefore never be modified. Members are sorted by name when an
+    interface is first parsed.
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+
+        self._interfaces: weakref.WeakValueDictionary[
+            bytes, dbus_fast.introspection.Interface
+        ] = weakref.WeakValueDictionary()
+        # NOTE:
+        # Members of an interface by (kind, name), shared by all nodes
+        # implementing it.
+        self._members: weakref.WeakKeyDictionary[
+            dbus_fast.introspection.Interface, dict[tuple[str, str], Member]
+        ] = weakref.WeakKeyDictionary()
+
+    def __len__(self) -> int:
+        return len(self._interfaces)
+
+    def intern(
+        self, element: xml.etree.ElementTree.Element
+    ) -> dbus_fast.introspection.Interface:
+        # NOTE:
+        # The tail is the whitespace following the element in its parent,
+        # which differs between otherwise identical interfaces.
+        element.tail = None
+        key = hashlib.blake2b(
+            xml.etree.ElementTree.tostring(element), digest_size=16
+        ).digest()
+
+        interface = self._interfaces.get(key)
+        if interface is not None:
+            self.hits += 1
+            return interface
+
+        self.misses += 1
+
+        interface = dbus_fast.introspection.Interface.from_xml(element)
+        list.sort(interface.methods, key=lambda method: method.name)
+        list.sort(interface.properties, key=lambda property: property.name)
+        list.sort(interface.signals, key=lambda signal: signal.name)
+
+        self._interfaces[key] = interface
+        self._members[interface] = {
+            (kind, member.name): member
+            for kind in MEMBER_KINDS
+            for member in get_interface_members(interface, kind)
+        }
+        return interface
+
+    def get_members(
+        self, interface: dbus_fast.introspection.Interface
+    ) -> dict[tuple[str, str], Member]:
+        return self._members[interface]
+
+    def parse(self, data: str) -> IndexedNode:
+        return self._parse_node(xml.etree.ElementTree.fromstring(data), True)
+
+    def _parse_node(
+        self, element: xml.etree.ElementTree.Element, is_root: bool
+    ) -> IndexedNode:
+        node = IndexedNode(element.attrib.get("name"), is_root=is_root)
+
+        for child in element:
+            if child.tag == "interface":
+                interface = self.intern(child)
+                node.add_interface(interface, self.get_members(interface))
+            elif child.tag == "node":
+                node.nodes.append(self._parse_node(child, False))
+
+        return node
+
+
+interface_table = InterfaceTable()
+
+
+class IntrospectionCache:
+    """Introspection results of one message bus.
+
+    Entries are keyed by (unique owner name, object path), evicted in LRU
+    order when either the entry count or the total size of the introspection
+    XML exceeds its bound, and invalidated by NameOwnerChanged and
+    ObjectManager signals.
+
+    With a store, results are also persisted across runs, keyed by the
+    identity of the executable of their owner. Results read from the store
+    are shown at once, and introspected again in background one by one.
+    """
+
+    REVALIDATION_INTERVAL = 0.1
+
+    def __init__(
+        self,
+        bus_daemon: utils.BusDaemon,
+        max_entries: int = 4096,
+        max_size: int = 8 * 1024 * 1024,
+        introspection_store: typing.Optional[store.IntrospectionStore] = None,
+        scope: str = "",
+    ):
+        self.bus_daemon = bus_daemon
+        self.bus = bus_daemon.bus
+        self.max_entries = max_entries
+        self.max_size = max_size
+        self.store = introspection_store
+        # NOTE: Tells apart the objects of the same executable on other buses.
+        self.scope = scope
+
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.store_hits = 0
+        self.outdated = 0
+
+        # NOTE:
+        # Called with the service, the object path and the introspection of
+        # every object fetched, e.g. to index it for searching.
+        self.listeners: list[
+            typing.Callable[[str, str, IndexedNode], None]
+        ] = []
+        # NOTE:
+        # Called the same way for objects read from the store which turn out
+        # to have changed since stored.
+        self.outdated_listeners: list[
+            typing.Callable[[str, str, IndexedNode], None]
+        ] = []
+        # NOTE:
+        # Called with the names of an owner and the object path invalidated,
+        # or None for all of its objects, which might be gone.
+        self.invalidated_listeners: list[
+            typing.Callable[[str, typing.Optional[str]], None]
+        ] = []
+
+        self._entries: collections.OrderedDict[
+            tuple[str, str], tuple[IndexedNode, int]
+        ] = collections.OrderedDict()
+        self._paths_by_owner: dict[str, set[str]] = {}
+        self._owners: dict[str, str] = {}
+        # NOTE:
+        # Keys of requests in flight, mapped to the number of such requests
+        # and whether they have been invalidated since sent.
+        self._pending_owners: dict[str, list] = {}
+        self._pending_entries: dict[tuple[str, str], list] = {}
+        self._subscribed = False
+        self._subscribe_lock = asyncio.Lock()
+
+        self._store_opened = False
+        self._store_lock = asyncio.Lock()
+        self._identities: dict[str, typing.Optional[str]] = {}
+        # NOTE:
+        # Owners and entries invalidated during this run, which are not read
+        # from the store any more, as it is known to be outdated for them.
+        self._outdated_owners: set[str] = set()
+        self._outdated_paths: dict[str, set[str]] = {}
+        self._all_outdated = False
+        # NOTE:
+        # Entries read from the store to introspect again, mapped to the
+        # service they were requested for and to their stored XML.
+        self._revalidations: collections.OrderedDict[
+            tuple[str, str], tuple[str, str]
+        ] = collections.OrderedDict()
+        self._revalidation_task: typing.Optional[asyncio.Task] = None
+        self._store_tasks: set[asyncio.Task] = set()
+
+    async def subscribe(self) -> None:
+        if self._subscribed:
+            return
+
+        async with self._subscribe_lock:
+            if self._subscribed:
+                return
+
+            self.bus.add_message_handler(self._on_message)
+            await self.bus_daemon.add_match(NAME_OWNER_CHANGED_MATCH_RULE)
+            await self.bus_daemon.add_match(OBJECT_MANAGER_MATCH_RULE)
+            self._subscribed = True
+
+    async def close(self) -> None:
+        if not self._subscribed:
+            return
+
+        self._subscribed = False
+        self.bus.remove_message_handler(self._on_message)
+
+        if self._revalidation_task is not None:
+            self._revalidation_task.cancel()
+        await self.bus_daemon.remove_match(NAME_OWNER_CHANGED_MATCH_RULE)
+        await self.bus_daemon.remove_match(OBJECT_MANAGER_MATCH_RULE)
+
+    async def get_owner(self, service: str) -> str:
+        if service.startswith(":"):
+            return service
+
+        await self.subscribe()
+
+        owner = self._owners.get(service)
+        if owner is not None:
+            return owner
+
+        begin_request(self._pending_owners, service)
+        try:
+            owner = await utils.get_dbus_service_unique_name(
+                self.bus_daemon, service
+            )
+        finally:
+            invalidated = end_request(self._pending_owners, service)
+
+        if not invalidated:
+            self._owners[service] = owner
+
+        return owner
+
+    async def introspect(
+        self, service: str, path: str, timeout: float = 30.0
+    ) -> IndexedNode:
+        owner = await self.get_owner(service)
+        key = (owner, path)
+
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+        self.misses += 1
+
+        store_key = await self._get_store_key(owner, path)
+        if store_key is not None:
+            introspection = await self._read_store(service, key, store_key)
+            if introspection is not None:
+                return introspection
+
+        begin_request(self._pending_entries, key)
+        try:
+            xml = await self._get_xml(owner, path, timeout)
+        finally:
+            invalidated = end_request(self._pending_entries, key)
+
+        # NOTE:
+        # Callers sharing the same request share the result parsed by the
+        # first one of them.
+        entry = self._entries.get(key)
+        if entry is not None and not invalidated:
+            return entry[0]
+
+        introspection = interface_table.parse(xml)
+
+        if not invalidated:
+            self._put(key, introspection, len(xml))
+            if store_key is not None:
+                self._write_store(store_key, xml)
+
+        for listener in self.listeners:
+            listener(service, path, introspection)
+
+        return introspection
+
+    async def _get_xml(
+        self, owner: str, path: str, timeout: float = 30.0
+    ) -> str:
+        # NOTE:
+        # The same object is often requested at once, e.g. by expanding its
+        # node and selecting it. Callers wait with their own timeout.
+        return await self.bus_daemon.requests.run(
+            ("Introspect", owner, path),
+            lambda: utils.get_dbus_object_introspection_xml(
+                self.bus, owner, path
+            ),
+            timeout,
+        )
+
+    async def _open_store(self) -> bool:
+        if self.store is None:
+            return False
+
+        async with self._store_lock:
+            if not self._store_opened:
+                try:
+                    await utils.run_io(self.store.open)
+                except Exception:
+                    # NOTE: Go on without, e.g. on a read-only home.
+                    self.store = None
+                    return False
+                self._store_opened = True
+
+        return True
+
+    async def _get_identity(self, owner: str) -> typing.Optional[str]:
+        if owner in self._identities:
+            return self._identities[owner]
+
+        identity = None
+        try:
+            pid = await utils.get_dbus_service_pid(self.bus_daemon, owner)
+            identity = await utils.run_io(utils.read_executable_identity, pid)
+        except Exception:
+            pass
+
+        self._identities[owner] = identity
+        return identity
+
+    async def _get_store_key(
+        self, owner: str, path: str
+    ) -> typing.Optional[bytes]:
+        if self.store is None or not await self._open_store():
+            return None
+
+        identity = await self._get_identity(owner)
+        if identity is None:
+            return None
+
+        return store.get_key(self.scope, identity, path)
+
+    def _is_outdated(self, key: tuple[str, str]) -> bool:
+        return (
+            self._all_outdated
+            or key[0] in self._outdated_owners
+            or key[1] in self._outdated_paths.get(key[0], ())
+        )
+
+    async def _read_store(
+        self, service: str, key: tuple[str, str], store_key: bytes
+    ) -> typing.Optional[IndexedNode]:
+        if self._is_outdated(key):
+            return None
+
+        assert self.store is not None
+        try:
+            xml = await utils.run_io(self.store.get, store_key)
+            if xml is None:
+                return None
+            introspection = interface_table.parse(xml)
+        except Exception:
+            return None
+
+        # NOTE: The entry might have been invalidated while reading it.
+        if self._is_outdated(key):
+            return None
+
+        self.store_hits += 1
+        self._put(key, introspection, len(xml))
+
+        for listener in self.listeners:
+            listener(service, key[1], introspection)
+
+        self._revalidations[key] = (service, xml)
+        if self._revalidation_task is None:
+            self._revalidation_task = asyncio.create_task(self._revalidate())
+
+        return introspection
+
+    def _write_store(self, store_key: bytes, xml: str):
+        assert self.store is not None
+
+        # NOTE: Nothing waits for the result to be stored.
+        task = asyncio.ensure_future(
+            utils.run_io(self.store.put, store_key, xml)
+        )
+        self._store_tasks.add(task)
+        task.add_done_callback(self._on_store_written)
+
+    def _on_store_written(self, task: asyncio.Task):
+        self._store_tasks.discard(task)
+        if not task.cancelled():
+            task.exception()
+
+    async def _revalidate(self):
+        """Introspects again the entries read from the store, one at a time
+        so as not to compete with the requests of the user."""
+
+        try:
+            while self._revalidations:
+                await asyncio.sleep(self.REVALIDATION_INTERVAL)
+                if not self._revalidations:
+                    break
+
+                key, (service, stored_xml) = self._revalidations.popitem(
+                    last=False
+                )
+                await self._revalidate_entry(service, key, stored_xml)
+        finally:
+            self._revalidation_task = None
+
+    async def _revalidate_entry(
+        self, service: str, key: tuple[str, str], stored_xml: str
+    ):
+        begin_request(self._pending_entries, key)
+        try:
+            xml = await self._get_xml(*key)
+        except Exception:
+            return
+        finally:
+            invalidated = end_request(self._pending_entries, key)
+
+        if xml == stored_xml or invalidated:
+            return
+
+        self.outdated += 1
+
+        store_key = await self._get_store_key(*key)
+        if store_key is not None:
+            self._write_store(store_key, xml)
+
+        introspection = interface_table.parse(xml)
+        self._put(key, introspection, len(xml))
+
+        for listener in self.listeners:
+            listener(service, key[1], introspection)
+        for listener in self.outdated_listeners:
+            listener(service, key[1], introspection)
+
+    def _put(
+        self,
+        key: tuple[str, str],
+        introspection: IndexedNode,
+        size: int,
+    ):
+        self._pop(key)
+
+        self._entries[key] = (introspection, size)
+        self._paths_by_owner.setdefault(key[0], set()).add(key[1])
+        self.size += size
+
+        while self._entries and (
+            len(self._entries) > self.max_entries or self.size > self.max_size
+        ):
+            self._pop(next(iter(self._entries)))
+
+    def _pop(self, key: tuple[str, str]):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+
+        self.size -= entry[1]
+
+        paths = self._paths_by_owner[key[0]]
+        paths.discard(key[1])
+        if not paths:
+            del self._paths_by_owner[key[0]]
+
+    def invalidate(
+        self,
+        owner: typing.Optional[str] = None,
+        path: typing.Optional[str] = None,
+    ):
+        if owner is None:
+            self._all_outdated = True
+            self._entries.clear()
+            self._paths_by_owner.clear()
+            self.size = 0
+            for pending in self._pending_entries.values():
+                pending[1] = True
+            return
+
+        if self.invalidated_listeners:
+            services = [owner] + self._get_names(owner)
+            for listener in self.invalidated_listeners:
+                for service in services:
+                    listener(service, path)
+
+        if path is None:
+            self._outdated_owners.add(owner)
+            for path in list(self._paths_by_owner.get(owner, ())):
+                self._pop((owner, path))
+            for key, pending in self._pending_entries.items():
+                if key[0] == owner:
+                    pending[1] = True
+            return
+
+        # NOTE:
+        # Adding or removing an object changes the child nodes listed in the
+        # introspection of its ancestors as well.
+        for path in [path] + get_object_path_ancestors(path):
+            self._outdated_paths.setdefault(owner, set()).add(path)
+            self._pop((owner, path))
+            if (owner, path) in self._pending_entries:
+                self._pending_entries[(owner, path)][1] = True
+
+    def _get_names(self, owner: str) -> list[str]:
+        """Returns the well-known names known to be owned by an owner."""
+
+        return [
+            service
+            for service, service_owner in self._owners.items()
+            if service_owner == owner
+        ]
+
+    def get_objects(self) -> typing.Iterator[tuple[str, str, IndexedNode]]:
+        """Yields the service, object path and introspection of the objects
+        cached, under the well-known names of their owner if any, e.g. for
+        listeners added late to learn what they missed."""
+
+        names: dict[str, list[str]] = {}
+        for (owner, path), (introspection, _) in list(self._entries.items()):
+            if owner not in names:
+                names[owner] = self._get_names(owner) or [owner]
+            for service in names[owner]:
+                yield service, path, introspection
+
+    def _forget_owner(self, owner: str):
+        """Forgets what is only known of a disconnected owner."""
+
+        self._identities.pop(owner, None)
+        self._outdated_owners.discard(owner)
+        self._outdated_paths.pop(owner, None)
+        for key in [key for key in self._revalidations if key[0] == owner]:
+            del self._revalidations[key]
+
+    def _on_message(self, message: dbus_fast.Message):
+        if message.message_type != dbus_fast.MessageType.SIGNAL:
+            return
+
+        if (
+            message.interface == "org.freedesktop.DBus"
+            and message.member == "NameOwnerChanged"
+            and message.sender == "org.freedesktop.DBus"
+        ):
+            name, old_owner, new_owner = message.body
+
+            # NOTE:
+            # A well-known name moving to another owner does not remove any
+            # object, only the disconnection of a unique name does.
+            if name.startswith(":"):
+                if not new_owner:
+                    self.invalidate(name)
+                    self._forget_owner(name)
+                return
+
+            if name in self._pending_owners:
+                self._pending_owners[name][1] = True
+
+            if new_owner:
+                self._owners[name] = new_owner
+            else:
+                self._owners.pop(name, None)
+            return
+
+        if message.interface == "org.freedesktop.DBus.ObjectManager" and (
+            message.member in ("InterfacesAdded", "InterfacesRemoved")
+        ):
+            if not message.sender or not message.body:
+                return
+            self.invalidate(message.sender, message.body[0])
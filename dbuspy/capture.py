@@ -0,0 +1,333 @@
+from . import pcap
+from . import utils
+import asyncio
+import os
+import socket
+import struct
+import threading
+import time
+import typing
+
+
+def get_default_path() -> str:
+    return os.path.join(
+        os.getcwd(), time.strftime("dbuspy-%Y%m%d-%H%M%S.pcap")
+    )
+
+
+def connect(bus_address: str) -> socket.socket:
+    """Opens a raw, authenticated connection to a bus, before Hello."""
+
+    error: typing.Optional[Exception] = None
+    for transport, options in utils.parse_bus_address(bus_address):
+        try:
+            if transport == "unix":
+                sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                if "path" in options:
+                    sock.connect(options["path"])
+                elif "abstract" in options:
+                    sock.connect("\0" + options["abstract"])
+                else:
+                    raise ValueError(f"unsupported unix address {options}")
+            elif transport == "tcp":
+                sock = socket.create_connection(
+                    (options["host"], int(options["port"]))
+                )
+            else:
+                raise ValueError(f"unsupported transport {transport}")
+        except Exception as e:
+            error = e
+            continue
+
+        try:
+            authenticate(sock)
+        except Exception:
+            sock.close()
+            raise
+        return sock
+
+    raise error or ValueError(f"invalid bus address {bus_address!r}")
+
+
+def authenticate(sock: socket.socket):
+    uid = str(os.getuid()).encode().hex()
+    sock.sendall(b"\0AUTH EXTERNAL " + uid.encode() + b"\r\n")
+
+    line = b""
+    while not line.endswith(b"\r\n"):
+        chunk = sock.recv(1)
+        if not chunk:
+            raise ConnectionError("connection closed while authenticating")
+        line += chunk
+
+    if not line.startswith(b"OK "):
+        raise PermissionError(f"authentication rejected: {line.decode()}")
+
+    sock.sendall(b"BEGIN\r\n")
+
+
+class MonitorConnection:
+    """A connection of its own to a bus, turned into a monitor of the
+    messages matching some match rules.
+
+    A thread reads the connection, so that monitoring stays out of the way
+    of the event loop and keeps up with busy buses. Only the lengths of
+    messages are read, to split the stream, and each message is passed to
+    on_message as received, without being unmarshalled.
+    """
+
+    # NOTE:
+    # Size of the buffer receiving messages, grown to fit larger ones.
+    # on_idle is called whenever the connection has been idle for
+    # IDLE_INTERVAL.
+    BUFFER_SIZE = 1024 * 1024
+    IDLE_INTERVAL = 1.0
+
+    def __init__(self, bus_address: str, match_rules: list[str]):
+        self.bus_address = bus_address
+        self.match_rules = match_rules
+
+        # NOTE: Messages received and their size, counted by the thread.
+        self.messages = 0
+        self.size = 0
+        self.error: typing.Optional[Exception] = None
+
+        self._sock: typing.Optional[socket.socket] = None
+        # NOTE: Received along with the reply to BecomeMonitor.
+        self._pending = b""
+        self._thread: typing.Optional[threading.Thread] = None
+        self._stopping = False
+        self._stopped: typing.Optional[asyncio.Future] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    async def start(self):
+        """Returns once the connection has become a monitor, or raises why it
+        could not."""
+
+        loop = asyncio.get_running_loop()
+        started = loop.create_future()
+        self._stopped = loop.create_future()
+
+        def resolve(future: asyncio.Future, error: typing.Optional[Exception]):
+            if future.done():
+                return
+            if error is None:
+                future.set_result(None)
+            else:
+                future.set_exception(error)
+
+        def notify(future: asyncio.Future, error=None):
+            try:
+                loop.call_soon_threadsafe(resolve, future, error)
+            except RuntimeError:
+                # NOTE: The event loop is gone already.
+                pass
+
+        def run():
+            try:
+                self._run(lambda: notify(started))
+            except Exception as e:
+                self.error = e
+                notify(started, e)
+            finally:
+                notify(started)
+                notify(self._stopped)
+
+        self._thread = threading.Thread(
+            target=run, name=f"monitor {self.bus_address}", daemon=True
+        )
+        self._thread.start()
+        await started
+
+    async def stop(self):
+        self._stopping = True
+        sock = self._sock
+        if sock is not None:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+        if self._stopped is not None:
+            await self._stopped
+
+    def _become_monitor(self, sock: socket.socket) -> str:
+        """Turns the connection into a monitor, returning its unique name."""
+
+        # NOTE:
+        # Only these two messages are ever sent, marshalled here as the
+        # connection does not go through dbus_fast.
+        hello = pcap.build_message(
+            1,
+            1,
+            destination="org.freedesktop.DBus",
+            path="/org/freedesktop/DBus",
+            interface="org.freedesktop.DBus",
+            member="Hello",
+        )
+        match_rules = b""
+        for match_rule in self.match_rules:
+            match_rules += pcap.pack_string(match_rule, 4 + len(match_rules))
+        body = struct.pack("<I", len(match_rules)) + match_rules
+        body += b"\0" * (pcap.align(len(body), 4) - len(body))
+        become_monitor = pcap.build_message(
+            1,
+            2,
+            body=body + struct.pack("<I", 0),
+            destination="org.freedesktop.DBus",
+            path="/org/freedesktop/DBus",
+            interface="org.freedesktop.DBus.Monitoring",
+            member="BecomeMonitor",
+            signature="asu",
+        )
+        sock.sendall(hello + become_monitor)
+
+        unique_name = ""
+        buffer = b""
+        while True:
+            while (
+                len(buffer) < pcap.FIXED_HEADER_SIZE
+                or len(buffer) < pcap.get_message_length(buffer)
+            ):
+                chunk = sock.recv(65536)
+                if not chunk:
+                    raise ConnectionError("connection closed by the bus")
+                buffer += chunk
+
+            length = pcap.get_message_length(buffer)
+            header = pcap.parse_header(buffer)
+            if header.reply_serial == 1 and header.message_type == 2:
+                unique_name = pcap.read_string(buffer, header) or ""
+            elif header.reply_serial in (1, 2) and header.message_type == 3:
+                raise PermissionError(
+                    f"{header.error_name}: {pcap.read_string(buffer, header)}"
+                )
+            elif header.reply_serial == 2 and header.message_type == 2:
+                # NOTE: Messages past the reply are kept for the capture.
+                self._pending = buffer[length:]
+                return unique_name
+
+            buffer = buffer[length:]
+
+    def _run(self, on_started: typing.Callable[[], None]):
+        sock = connect(self.bus_address)
+        self._sock = sock
+        try:
+            own_name = self._become_monitor(sock).encode()
+            if self._stopping:
+                return
+            self.open()
+            try:
+                on_started()
+                self._receive(sock, own_name)
+            finally:
+                self.close()
+        finally:
+            self._sock = None
+            sock.close()
+
+    def open(self):
+        """Called in the thread once the connection has become a monitor."""
+
+    def close(self):
+        """Called in the thread once the connection is closed."""
+
+    def on_message(self, data: memoryview, at: float):
+        """Called in the thread with every message received and its time.
+        The data is only valid during the call."""
+
+    def on_idle(self):
+        """Called in the thread when no message arrived for IDLE_INTERVAL."""
+
+    def _receive(self, sock: socket.socket, own_name: bytes):
+        buffer = bytearray(max(self.BUFFER_SIZE, len(self._pending)))
+        view = memoryview(buffer)
+        end = len(self._pending)
+        buffer[:end] = self._pending
+        start = 0
+
+        sock.settimeout(self.IDLE_INTERVAL)
+        at = time.time()
+        while True:
+            while end - start >= pcap.FIXED_HEADER_SIZE:
+                length = pcap.get_message_length(buffer, start)
+                if end - start < length:
+                    break
+
+                # NOTE:
+                # The bus tells the monitor it lost its name, which is not
+                # traffic of the bus. Names only appear in header fields, so
+                # the full header is only parsed for messages naming it.
+                if own_name and buffer.find(own_name, start, start + length) >= 0:
+                    header = pcap.parse_header(buffer, start)
+                    if header.destination == own_name.decode():
+                        start += length
+                        continue
+
+                self.on_message(view[start : start + length], at)
+                self.messages += 1
+                self.size += length
+                start += length
+
+            if start == end:
+                start = end = 0
+            elif end == len(buffer):
+                # NOTE: Make room for the rest of the message being received.
+                length = end - start
+                if pcap.FIXED_HEADER_SIZE <= length:
+                    length = max(length, pcap.get_message_length(buffer, start))
+                if length > len(buffer) // 2:
+                    view.release()
+                    buffer = buffer[start:end] + bytearray(
+                        max(length * 2, len(buffer)) - (end - start)
+                    )
+                    view = memoryview(buffer)
+                else:
+                    buffer[: end - start] = buffer[start:end]
+                end -= start
+                start = 0
+
+            try:
+                received = sock.recv_into(view[end:])
+            except socket.timeout:
+                self.on_idle()
+                continue
+            except OSError:
+                break
+            if not received:
+                break
+            end += received
+            at = time.time()
+
+
+class Capture(MonitorConnection):
+    """Records the messages matching some match rules on a bus to a pcap
+    file, as they are received.
+
+    The file is buffered, and flushed whenever the connection goes idle.
+    """
+
+    def __init__(self, bus_address: str, path: str, match_rules: list[str]):
+        super().__init__(bus_address, match_rules)
+        self.path = path
+        self._writer: typing.Optional[pcap.PcapWriter] = None
+
+    def open(self):
+        self._writer = pcap.PcapWriter(
+            open(self.path, "wb", buffering=self.BUFFER_SIZE)
+        )
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.file.close()
+
+    def on_message(self, data: memoryview, at: float):
+        assert self._writer is not None
+        self._writer.write(data, at)
+
+    def on_idle(self):
+        assert self._writer is not None
+        self._writer.file.flush()
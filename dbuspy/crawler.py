@@ -0,0 +1,224 @@
+from . import cache
+from . import utils
+import asyncio
+import collections
+import time
+import typing
+
+
+class TokenBucket:
+    """Allows rate acquisitions per second on average, and bursts of up to
+    burst acquisitions."""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    async def acquire(self):
+        while True:
+            now = time.monotonic()
+            self.tokens = min(
+                self.burst, self.tokens + (now - self.updated) * self.rate
+            )
+            self.updated = now
+
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class Crawler:
+    """Walks the object trees of services through the introspection cache,
+    so that browsing them later is instant and that its listeners, such as
+    the search index, learn every object.
+
+    Services are crawled in order of priority, lowest first. Requests are
+    capped by a global rate and concurrency, and by a per service
+    concurrency. Objects failing are skipped, and so are services once they
+    failed max_errors times.
+    """
+
+    def __init__(
+        self,
+        introspection_cache: cache.IntrospectionCache,
+        concurrency: int = 8,
+        service_concurrency: int = 2,
+        rate: float = 50.0,
+        timeout: float = 5.0,
+        max_errors: int = 3,
+    ):
+        self.introspection_cache = introspection_cache
+        self.concurrency = concurrency
+        self.service_concurrency = service_concurrency
+        self.timeout = timeout
+        self.max_errors = max_errors
+        self.rate_limiter = TokenBucket(rate, concurrency)
+
+        self.crawled_services: set[str] = set()
+        self.skipped_services: set[str] = set()
+        self.objects = 0
+        self.errors = 0
+
+        self._pending: dict[str, collections.deque[str]] = {}
+        self._running: dict[str, int] = {}
+        self._errors: dict[str, int] = {}
+        self._priorities: dict[str, int] = {}
+        self._wakeup: typing.Optional[asyncio.Event] = None
+
+    def add_services(self, services: list[str]):
+        for service in services:
+            if service in self.crawled_services:
+                continue
+            self.crawled_services.add(service)
+            self._pending[service] = collections.deque(["/"])
+
+        self._wake_up()
+
+    def forget_service(self, service: str):
+        self.crawled_services.discard(service)
+        self.skipped_services.discard(service)
+        self._pending.pop(service, None)
+        self._errors.pop(service, None)
+
+    def prioritize(self, priorities: dict[str, int]):
+        """Sets the priorities of services, the ones not given come last."""
+
+        self._priorities = priorities
+
+    def is_idle(self) -> bool:
+        return not self._pending and not self._running
+
+    def _wake_up(self):
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def _next(self) -> typing.Optional[tuple[str, str]]:
+        selected = None
+        selected_priority = 0
+
+        for service, paths in self._pending.items():
+            if not paths:
+                continue
+            if self._running.get(service, 0) >= self.service_concurrency:
+                continue
+
+            priority = self._priorities.get(service, len(self._priorities))
+            if selected is None or priority < selected_priority:
+                selected = service
+                selected_priority = priority
+
+        if selected is None:
+            return None
+
+        return selected, self._pending[selected].popleft()
+
+    async def run(self, until_idle: bool = False):
+        """Crawls the services added, until cancelled or, if until_idle, until
+        there is nothing left to crawl."""
+
+        # NOTE:
+        # A run cancelled to start another one may only finish after the
+        # new one has begun.
+        wakeup = self._wakeup = asyncio.Event()
+        tasks: set[asyncio.Task] = set()
+
+        try:
+            while True:
+                while len(tasks) < self.concurrency:
+                    # NOTE:
+                    # Tokens are only taken for actual requests, an idle
+                    # crawler does not use up the rate.
+                    request = self._next()
+                    if request is None:
+                        break
+
+                    service, path = request
+                    self._running[service] = self._running.get(service, 0) + 1
+                    try:
+                        await self.rate_limiter.acquire()
+                    except BaseException:
+                        self._on_visited(tasks, None, service, path)
+                        raise
+
+                    task = asyncio.create_task(self._visit(service, path))
+                    tasks.add(task)
+                    task.add_done_callback(
+                        lambda task, service=service, path=path: (
+                            self._on_visited(tasks, task, service, path)
+                        )
+                    )
+
+                if until_idle and self.is_idle():
+                    return
+
+                wakeup.clear()
+                await wakeup.wait()
+        finally:
+            if self._wakeup is wakeup:
+                self._wakeup = None
+            for task in tasks:
+                task.cancel()
+
+    def _on_visited(
+        self,
+        tasks: set[asyncio.Task],
+        task: typing.Optional[asyncio.Task],
+        service: str,
+        path: str,
+    ):
+        # NOTE:
+        # Objects of a cancelled run are visited again on the next one,
+        # including the one waiting for a token, without a task yet.
+        if (
+            (task is None or task.cancelled())
+            and service in self.crawled_services
+            and service not in self.skipped_services
+        ):
+            self._pending.setdefault(service, collections.deque()).appendleft(
+                path
+            )
+
+        self._running[service] -= 1
+        if not self._running[service]:
+            del self._running[service]
+            if service in self._pending and not self._pending[service]:
+                del self._pending[service]
+
+        # NOTE:
+        # Wake up only once the task is out of the set, or the loop would
+        # find no room for another request and wait forever.
+        if task is not None:
+            tasks.discard(task)
+        self._wake_up()
+
+    async def crawl(self, services: list[str]):
+        self.add_services(services)
+        await self.run(until_idle=True)
+
+    async def _visit(self, service: str, path: str):
+        try:
+            introspection = await self.introspection_cache.introspect(
+                service, path, self.timeout
+            )
+        except Exception:
+            self.errors += 1
+            self._errors[service] = self._errors.get(service, 0) + 1
+
+            # NOTE:
+            # Only the object failing is skipped, unless the service keeps
+            # failing, as services slow or broken are not worth waking up.
+            if self._errors[service] >= self.max_errors:
+                self.skipped_services.add(service)
+                self._pending.pop(service, None)
+        else:
+            self.objects += 1
+
+            paths = self._pending.get(service)
+            if paths is not None:
+                for child in introspection.nodes:
+                    if child.name:
+                        paths.append(utils.join_object_path(path, child.name))
@@ -0,0 +1,828 @@
+from . import capture
+from . import monitor
+from . import properties
+from . import utils
+import dbus_fast.introspection
+import rich.text
+import textual.app
+import textual.binding
+import textual.containers
+import textual.screen
+import textual.timer
+import textual.widgets
+import typing
+
+
+class MethodDetails(textual.containers.Container):
+    DEFAULT_CSS = """
+    MethodDetails {
+        height: auto;
+    }
+    MethodDetails > Label {
+        padding-bottom: 1;
+    }
+    MethodDetails > HorizontalScroll {
+        height: auto;
+    }
+    MethodDetails > HorizontalScroll > Label {
+        width: 1fr;
+        height: 100%;
+        content-align: center middle;
+    }
+    MethodDetails > HorizontalScroll > TextArea {
+        width: 4fr;
+        height: auto;
+    }
+    MethodDetails > Collapsible > Contents {
+        height: auto;
+    }
+    MethodDetails > Collapsible > Contents > HorizontalScroll {
+        height: auto;
+    }
+    MethodDetails > Collapsible > Contents > HorizontalScroll > Label {
+        width: auto;
+        margin-right: 2;
+        height: 100%;
+        content-align: center middle;
+    }
+    MethodDetails > HorizontalScroll > #monitor-status {
+        width: auto;
+        margin-left: 2;
+    }
+    """
+
+    # NOTE: Progress of captures is shown at this rate.
+    STATUS_INTERVAL = 1 / 2
+
+    def __init__(
+        self,
+        bus_daemon: utils.BusDaemon,
+        service: str,
+        path: str,
+        interface: str,
+        introspection: dbus_fast.introspection.Method,
+    ):
+        self.bus_daemon = bus_daemon
+        self.service = service
+        self.path = path
+        self.interface = interface
+        self.introspection = introspection
+        self.capture: typing.Optional[capture.Capture] = None
+        self.status_timer: typing.Optional[textual.timer.Timer] = None
+        super().__init__()
+
+    def compose(self) -> textual.app.ComposeResult:
+        if self.introspection.annotations:
+
+            yield textual.widgets.Label(
+                rich.text.Text("Annotation(s)", style="bold")
+            )
+            for key, value in self.introspection.annotations.items():
+                with textual.widgets.Collapsible(
+                    title=key,
+                ):
+                    yield textual.widgets.Label(value)
+
+            yield textual.widgets.Rule()
+
+        if self.introspection.in_args:
+
+            yield textual.widgets.Label(
+                rich.text.Text("Input(s)", style="bold")
+            )
+
+            for index, arg in enumerate(self.introspection.in_args):
+                with textual.containers.HorizontalScroll():
+                    yield textual.widgets.Label(
+                        arg.name or "arg_" + str(index),
+                    )
+                    yield textual.widgets.Label(str(arg.signature))
+                    yield textual.widgets.TextArea(
+                        tab_behavior="indent",
+                        soft_wrap=False,
+                    )
+                if arg.annotations:
+                    with textual.widgets.Collapsible(
+                        title="Annotation(s) of "
+                        + (arg.name or "arg_" + str(index)),
+                    ):
+                        table = textual.widgets.DataTable(show_header=False)
+                        yield table
+                        table.add_column("Key")
+                        table.add_column("Value")
+                        for key, value in arg.annotations.items():
+                            table.add_row(key, value)
+
+            yield textual.widgets.Rule()
+
+        yield textual.widgets.Label(rich.text.Text("Operations", style="bold"))
+
+        with textual.containers.HorizontalScroll():
+            yield textual.widgets.Button("Execute")
+            yield textual.widgets.Button("Monitor", id="monitor")
+            yield textual.widgets.Label(id="monitor-status")
+
+        yield textual.widgets.Rule()
+
+        if self.introspection.out_args:
+
+            yield textual.widgets.Label(
+                rich.text.Text("Output(s)", style="bold")
+            )
+
+            for index, arg in enumerate(self.introspection.out_args):
+                with textual.containers.HorizontalScroll():
+                    yield textual.widgets.Label(
+                        arg.name or "arg_" + str(index),
+                    )
+                    yield textual.widgets.Label(str(arg.signature))
+                    yield textual.widgets.TextArea(
+                        soft_wrap=False,
+                        read_only=True,
+                    )
+
+            yield textual.widgets.Rule()
+
+        yield textual.widgets.Label(
+            rich.text.Text("Utilities", style="bold"),
+        )
+
+        with textual.widgets.Collapsible(
+            title="Generate method call command",
+            collapsed=True,
+        ):
+            with textual.containers.HorizontalScroll():
+                yield textual.widgets.Button("dbus-send")
+                yield textual.widgets.Button("gdbus")
+                yield textual.widgets.Button("qdbus")
+                yield textual.widgets.Button("busctl")
+
+        with textual.widgets.Collapsible(
+            title="Generate monitor command",
+            collapsed=True,
+        ):
+            with textual.containers.HorizontalScroll():
+                yield textual.widgets.Button("dbus-send")
+                yield textual.widgets.Button("gdbus")
+                yield textual.widgets.Button("qdbus")
+                yield textual.widgets.Button("busctl")
+
+    def get_match_rules(self) -> list[str]:
+        """Returns match rules for the calls of the method, and for the
+        replies and errors sent by the service, to any call of it."""
+
+        return [
+            monitor.get_match_rule(
+                type="method_call",
+                path=self.path,
+                interface=self.interface,
+                member=self.introspection.name,
+            ),
+            monitor.get_match_rule(type="method_return", sender=self.service),
+            monitor.get_match_rule(type="error", sender=self.service),
+        ]
+
+    def on_button_pressed(self, event: textual.widgets.Button.Pressed):
+        if event.button.id == "monitor":
+            event.stop()
+            self.toggle_capture()
+
+    @textual.work(exclusive=True, group="capture")
+    async def toggle_capture(self):
+        button = self.query_one("#monitor", textual.widgets.Button)
+
+        if self.capture is not None:
+            self.render_capture_status(await self.stop_capture())
+            button.label = "Monitor"
+            return
+
+        if self.bus_daemon.bus_address == None:
+            self.notify("Address of the bus unknown", severity="error")
+            return
+
+        method_capture = capture.Capture(
+            self.bus_daemon.bus_address,
+            capture.get_default_path(),
+            self.get_match_rules(),
+        )
+        try:
+            await method_capture.start()
+        except Exception as e:
+            self.notify(f"Failed to monitor: {e}", severity="error")
+            return
+
+        self.capture = method_capture
+        button.label = "Stop"
+        self.status_timer = self.set_interval(
+            self.STATUS_INTERVAL, self.render_capture_status
+        )
+        self.render_capture_status()
+
+    async def stop_capture(self) -> typing.Optional[capture.Capture]:
+        if self.status_timer is not None:
+            self.status_timer.stop()
+            self.status_timer = None
+
+        method_capture = self.capture
+        if method_capture is not None:
+            self.capture = None
+            await method_capture.stop()
+        return method_capture
+
+    def render_capture_status(
+        self, method_capture: typing.Optional[capture.Capture] = None
+    ):
+        method_capture = method_capture or self.capture
+        if method_capture is None:
+            return
+
+        status = (
+            f"{method_capture.messages} messages, "
+            + f"{method_capture.size} bytes to {method_capture.path}"
+        )
+        if method_capture.error is not None:
+            status += f" (stopped: {method_capture.error})"
+        self.query_one("#monitor-status", textual.widgets.Label).update(status)
+
+    async def on_unmount(self):
+        await self.stop_capture()
+
+
+class SignalDetails(textual.containers.Container):
+
+    DEFAULT_CSS = """
+    SignalDetails {
+        height: auto;
+    }
+    SignalDetails > Label {
+        padding-bottom: 1;
+    }
+    SignalDetails > HorizontalScroll {
+        height: auto;
+    }
+    SignalDetails > HorizontalScroll > Label {
+        width: 1fr;
+        height: 100%;
+        content-align: center middle;
+    }
+    SignalDetails > Collapsible > Contents {
+        height: auto;
+    }
+    SignalDetails > Collapsible > Contents > HorizontalScroll {
+        height: auto;
+    }
+    SignalDetails > Collapsible > Contents > HorizontalScroll > Label {
+        width: auto;
+        margin-right: 2;
+        height: 100%;
+        content-align: center middle;
+    }
+    SignalDetails > Log {
+        height: 20;
+        display: none;
+    }
+    SignalDetails > Log.-listening {
+        display: block;
+    }
+    """
+
+    # NOTE:
+    # Signals are rendered in batches at this rate, at most that many lines
+    # at once. Lines older than the last MAX_LINES are dropped.
+    FRAME_INTERVAL = 1 / 10
+    MAX_LINES_PER_FRAME = 256
+    MAX_LINES = 2048
+
+    def __init__(
+        self,
+        bus_daemon: utils.BusDaemon,
+        service: str,
+        path: str,
+        interface: str,
+        introspection: dbus_fast.introspection.Signal,
+    ):
+        self.bus_daemon = bus_daemon
+        self.service = service
+        self.path = path
+        self.interface = interface
+        self.introspection = introspection
+        self.monitor: typing.Optional[monitor.SignalMonitor] = None
+        self.render_timer: typing.Optional[textual.timer.Timer] = None
+        super().__init__()
+
+    def compose(self) -> textual.app.ComposeResult:
+        if self.introspection.annotations:
+
+            yield textual.widgets.Label(
+                rich.text.Text("Annotation(s)", style="bold")
+            )
+            for key, value in self.introspection.annotations.items():
+                with textual.widgets.Collapsible(
+                    title=key,
+                ):
+                    yield textual.widgets.Label(value)
+
+            yield textual.widgets.Rule()
+
+        if self.introspection.args:
+
+            table = textual.widgets.DataTable(cursor_type="row")
+            yield table
+            table.add_columns("Name", "Signature")
+
+            for index, arg in enumerate(self.introspection.args):
+                table.add_row(
+                    arg.name or "arg_" + str(index), str(arg.signature)
+                )
+
+            yield textual.widgets.Rule()
+
+        yield textual.widgets.Label(rich.text.Text("Operations", style="bold"))
+
+        with textual.containers.HorizontalScroll():
+            yield textual.widgets.Button("Listen", id="listen")
+            yield textual.widgets.Label(id="listen-status")
+
+        yield textual.widgets.Log(max_lines=self.MAX_LINES)
+
+        yield textual.widgets.Rule()
+
+        yield textual.widgets.Label(
+            rich.text.Text("Utilities", style="bold"),
+        )
+
+        with textual.widgets.Collapsible(
+            title="Generate monitor command",
+            collapsed=True,
+        ):
+            with textual.containers.HorizontalScroll():
+                yield textual.widgets.Button("dbus-send")
+                yield textual.widgets.Button("gdbus")
+                yield textual.widgets.Button("qdbus")
+                yield textual.widgets.Button("busctl")
+
+    def on_button_pressed(self, event: textual.widgets.Button.Pressed):
+        if event.button.id == "listen":
+            event.stop()
+            self.toggle_listening()
+
+    @textual.work(exclusive=True, group="listen")
+    async def toggle_listening(self):
+        button = self.query_one("#listen", textual.widgets.Button)
+        log = self.query_one(textual.widgets.Log)
+
+        if self.monitor is not None:
+            await self.stop_listening()
+            button.label = "Listen"
+            log.remove_class("-listening")
+            return
+
+        signal_monitor = monitor.SignalMonitor(
+            self.bus_daemon,
+            self.service,
+            self.path,
+            self.interface,
+            self.introspection.name,
+        )
+        try:
+            await signal_monitor.start()
+        except Exception as e:
+            self.notify(f"Failed to listen: {e}", severity="error")
+            return
+
+        self.monitor = signal_monitor
+        button.label = "Stop"
+        log.add_class("-listening")
+        self.render_timer = self.set_interval(
+            self.FRAME_INTERVAL, self.render_signals
+        )
+
+    async def stop_listening(self):
+        if self.render_timer is not None:
+            self.render_timer.stop()
+            self.render_timer = None
+
+        if self.monitor is not None:
+            signal_monitor = self.monitor
+            self.monitor = None
+            await signal_monitor.stop()
+
+    def render_signals(self):
+        if self.monitor is None:
+            return
+
+        records = self.monitor.read(self.MAX_LINES_PER_FRAME)
+        if records:
+            self.query_one(textual.widgets.Log).write_lines(
+                [monitor.format_record(record) for record in records]
+            )
+
+        self.query_one("#listen-status", textual.widgets.Label).update(
+            f"{self.monitor.received} received, {self.monitor.dropped} dropped"
+        )
+
+    async def on_unmount(self):
+        await self.stop_listening()
+
+
+class PropertyDetails(textual.containers.Container):
+
+    DEFAULT_CSS = """
+    PropertyDetails {
+        height: auto;
+    }
+    PropertyDetails > HorizontalScroll {
+        height: auto;
+    }
+    PropertyDetails > Label {
+        padding-bottom: 1;
+    }
+    PropertyDetails > TextArea {
+        height: auto;
+    }
+    PropertyDetails > Collapsible > Contents {
+        height: auto;
+    }
+    PropertyDetails > Collapsible > Contents > HorizontalScroll {
+        height: auto;
+    }
+    PropertyDetails > HorizontalScroll > #monitor-status {
+        width: auto;
+        margin-left: 2;
+        height: 100%;
+        content-align: center middle;
+    }
+    """
+
+    # NOTE: Changes of the value are shown at this rate, coalesced.
+    FRAME_INTERVAL = 1 / 10
+
+    def __init__(
+        self,
+        bus_daemon: utils.BusDaemon,
+        properties_cache: properties.PropertiesCache,
+        service: str,
+        path: str,
+        interface: str,
+        introspection: dbus_fast.introspection.Property,
+    ):
+        self.bus_daemon = bus_daemon
+        self.properties_cache = properties_cache
+        self.service = service
+        self.path = path
+        self.interface = interface
+        self.introspection = introspection
+        self.monitoring = False
+        self.changes = 0
+        self.rendered_generation: typing.Optional[int] = None
+        self.render_timer: typing.Optional[textual.timer.Timer] = None
+        super().__init__()
+
+    def compose(self) -> textual.app.ComposeResult:
+        if self.introspection.annotations:
+
+            yield textual.widgets.Label(
+                rich.text.Text("Annotation(s)", style="bold")
+            )
+            for key, value in self.introspection.annotations.items():
+                with textual.widgets.Collapsible(
+                    title=key,
+                ):
+                    yield textual.widgets.Label(value)
+
+            yield textual.widgets.Rule()
+
+        yield textual.widgets.Label(
+            rich.text.Text("Value", style="bold"),
+        )
+
+        yield textual.widgets.TextArea(
+            id="value",
+            soft_wrap=False,
+            read_only=not self.introspection.access.writable(),
+        )
+
+        yield textual.widgets.Rule()
+
+        yield textual.widgets.Label(
+            rich.text.Text("Operations", style="bold"),
+        )
+
+        with textual.containers.HorizontalScroll():
+            yield textual.widgets.Button(
+                "Get",
+                id="get",
+                disabled=not self.introspection.access.readable(),
+            )
+            yield textual.widgets.Button(
+                "Set",
+                id="set",
+                disabled=not self.introspection.access.writable(),
+            )
+            yield textual.widgets.Button("Monitor", id="monitor")
+            yield textual.widgets.Label(id="monitor-status")
+
+        yield textual.widgets.Rule()
+
+        yield textual.widgets.Label(
+            rich.text.Text("Utilities", style="bold"),
+        )
+
+        with textual.widgets.Collapsible(
+            title="Generate command to get property",
+            collapsed=True,
+        ):
+            with textual.containers.HorizontalScroll():
+                yield textual.widgets.Button("dbus-send")
+                yield textual.widgets.Button("gdbus")
+                yield textual.widgets.Button("qdbus")
+                yield textual.widgets.Button("busctl")
+
+        with textual.widgets.Collapsible(
+            title="Generate command to set property",
+            collapsed=True,
+        ):
+            with textual.containers.HorizontalScroll():
+                yield textual.widgets.Button("dbus-send")
+                yield textual.widgets.Button("gdbus")
+                yield textual.widgets.Button("qdbus")
+                yield textual.widgets.Button("busctl")
+
+    def on_mount(self):
+        if self.introspection.access.readable():
+            self.get_value()
+
+    def on_button_pressed(self, event: textual.widgets.Button.Pressed):
+        if event.button.id == "get":
+            event.stop()
+            self.get_value()
+        elif event.button.id == "set":
+            event.stop()
+            self.set_value()
+        elif event.button.id == "monitor":
+            event.stop()
+            self.toggle_monitoring()
+
+    def show_value(self, value: dbus_fast.Variant):
+        text_area = self.query_one("#value", textual.widgets.TextArea)
+        text = properties.format_value(value)
+        if text == text_area.text:
+            return
+
+        if self.monitoring and text_area.text:
+            self.changes += 1
+        text_area.text = text
+
+    @textual.work(exclusive=True, group="get")
+    async def get_value(self):
+        try:
+            value = await self.properties_cache.get(
+                self.service,
+                self.path,
+                self.interface,
+                self.introspection.name,
+                refresh=True,
+            )
+        except Exception as e:
+            self.notify(f"Failed to get: {e}", severity="error")
+            return
+
+        self.show_value(value)
+
+    @textual.work(exclusive=True, group="set")
+    async def set_value(self):
+        text_area = self.query_one("#value", textual.widgets.TextArea)
+        try:
+            value = properties.parse_value(
+                self.introspection.signature, text_area.text
+            )
+        except ValueError as e:
+            self.notify(f"Invalid value: {e}", severity="error")
+            return
+
+        try:
+            await self.properties_cache.set(
+                self.service,
+                self.path,
+                self.interface,
+                self.introspection.name,
+                value,
+            )
+        except Exception as e:
+            self.notify(f"Failed to set: {e}", severity="error")
+            return
+
+        if self.introspection.access.readable():
+            self.get_value()
+
+    @textual.work(exclusive=True, group="monitor")
+    async def toggle_monitoring(self):
+        button = self.query_one("#monitor", textual.widgets.Button)
+
+        if self.monitoring:
+            await self.stop_monitoring()
+            button.label = "Monitor"
+            return
+
+        try:
+            await self.properties_cache.watch(
+                self.service, self.path, self.interface
+            )
+        except Exception as e:
+            self.notify(f"Failed to monitor: {e}", severity="error")
+            return
+
+        self.monitoring = True
+        self.changes = 0
+        self.rendered_generation = None
+        button.label = "Stop"
+        self.render_timer = self.set_interval(
+            self.FRAME_INTERVAL, self.render_value
+        )
+
+    async def stop_monitoring(self):
+        if self.render_timer is not None:
+            self.render_timer.stop()
+            self.render_timer = None
+
+        if self.monitoring:
+            self.monitoring = False
+            await self.properties_cache.unwatch(
+                self.service, self.path, self.interface
+            )
+
+    def render_value(self):
+        entry = self.properties_cache.get_entry(
+            self.service, self.path, self.interface
+        )
+        if entry is None or entry.generation == self.rendered_generation:
+            return
+        self.rendered_generation = entry.generation
+
+        # NOTE:
+        # Invalidated values are fetched again only now that they are shown,
+        # once per frame however often they change.
+        name = self.introspection.name
+        if name in entry.values:
+            self.show_value(entry.values[name])
+        elif name in entry.invalidated:
+            self.get_value()
+
+        self.query_one("#monitor-status", textual.widgets.Label).update(
+            f"{self.changes} changes"
+        )
+
+    async def on_unmount(self):
+        await self.stop_monitoring()
+
+
+class MemberDetailsPage(textual.containers.Container):
+    DEFAULT_CSS = """
+    MemberDetailsPage {
+        border: round $border;
+        border-title-align: center;
+        border-title-style: bold;
+        padding: 0 1 0 1;
+        width: 90%;
+        height: 90%;
+    }
+    MemberDetailsPage > Center {
+        height: auto;
+        margin-top: 1
+    }
+    """
+
+    def __init__(
+        self,
+        bus_daemon: utils.BusDaemon,
+        properties_cache: properties.PropertiesCache,
+        service: str,
+        path: str,
+        interface: dbus_fast.introspection.Interface,
+        member_kind: str,
+        member: typing.Union[
+            dbus_fast.introspection.Method,
+            dbus_fast.introspection.Property,
+            dbus_fast.introspection.Signal,
+        ],
+    ):
+        self.bus_daemon = bus_daemon
+        self.properties_cache = properties_cache
+        super().__init__()
+        self.service = service
+        self.path = path
+        self.interface = interface
+        self.member_kind = member_kind
+        self.member = member
+
+    def compose(self) -> textual.app.ComposeResult:
+        with textual.containers.Center():
+            yield textual.widgets.Label(
+                rich.text.Text(
+                    self.interface.name + "." + self.member.name, style="bold"
+                ),
+            )
+
+        yield textual.widgets.Rule()
+
+        with textual.containers.VerticalScroll():
+
+            table = textual.widgets.DataTable(
+                show_header=False,
+                show_cursor=False,
+            )
+            yield table
+            table.add_column("Key", key="key")
+            table.add_column("Value", key="value")
+            table.add_row("Service name", self.service)
+            table.add_row("Object path", self.path)
+            table.add_row("Interface", self.interface.name)
+            table.add_row("Name", self.member.name)
+
+            yield textual.widgets.Rule()
+
+            if self.member_kind == "method":
+                assert isinstance(self.member, dbus_fast.introspection.Method)
+                table.add_row("Type", "Method")
+
+                yield MethodDetails(
+                    self.bus_daemon,
+                    self.service,
+                    self.path,
+                    self.interface.name,
+                    self.member,
+                )
+                return
+
+            if self.member_kind == "property":
+                assert isinstance(self.member, dbus_fast.introspection.Property)
+                table.add_row("Type", "Property")
+                table.add_row("Signature", self.member.signature)
+
+                yield PropertyDetails(
+                    self.bus_daemon,
+                    self.properties_cache,
+                    self.service,
+                    self.path,
+                    self.interface.name,
+                    self.member,
+                )
+                return
+
+            assert isinstance(self.member, dbus_fast.introspection.Signal)
+            table.add_row("Type", "Signal")
+
+            yield SignalDetails(
+                self.bus_daemon,
+                self.service,
+                self.path,
+                self.interface.name,
+                self.member,
+            )
+
+
+class MemberScreen(textual.screen.Screen):
+    DEFAULT_CSS = """
+    MemberScreen {
+        align: center middle;
+        background: $surface 50%;
+    }
+    """
+    BINDINGS = [
+        textual.binding.Binding("escape,q", "app.pop_screen", "Close"),
+    ]
+
+    def __init__(
+        self,
+        bus_daemon: utils.BusDaemon,
+        properties_cache: properties.PropertiesCache,
+        service: str,
+        path: str,
+        interface: dbus_fast.introspection.Interface,
+        member_kind: str,
+        member: typing.Union[
+            dbus_fast.introspection.Method,
+            dbus_fast.introspection.Property,
+            dbus_fast.introspection.Signal,
+        ],
+    ):
+        self.bus_daemon = bus_daemon
+        self.properties_cache = properties_cache
+        self.service = service
+        self.path = path
+        self.interface = interface
+        self.member_kind = member_kind
+        self.member = member
+        super().__init__()
+
+    def compose(self) -> textual.app.ComposeResult:
+        yield textual.widgets.Footer()
+        yield MemberDetailsPage(
+            self.bus_daemon,
+            self.properties_cache,
+            self.service,
+            self.path,
+            self.interface,
+            self.member_kind,
+            self.member,
+        )
@@ -0,0 +1,221 @@
+from . import utils
+import dbus_fast
+import time
+import typing
+
+# NOTE:
+# Records are (time, sender, path, interface, member, signature, body),
+# kept as tuples to cost as little as possible per message.
+Record = tuple[float, str, str, str, str, str, list]
+
+
+def get_match_rule(**fields: typing.Optional[str]) -> str:
+    """Returns a match rule matching the given fields, skipping None."""
+
+    return ",".join(
+        f"{key}='{value}'" for key, value in fields.items() if value is not None
+    )
+
+
+def format_value(value: typing.Any, limit: int = 200) -> str:
+    """Formats a value of a message body compactly, unwrapping variants,
+    cut at limit characters."""
+
+    def format(value: typing.Any) -> str:
+        if isinstance(value, dbus_fast.Variant):
+            return format(value.value)
+        if isinstance(value, dict):
+            return (
+                "{"
+                + ", ".join(
+                    f"{format(key)}: {format(item)}"
+                    for key, item in value.items()
+                )
+                + "}"
+            )
+        if isinstance(value, (list, tuple)):
+            return "[" + ", ".join(format(item) for item in value) + "]"
+        return repr(value)
+
+    text = format(value)
+    if len(text) > limit:
+        return text[: limit - 1] + "…"
+    return text
+
+
+def format_record(record: Record) -> str:
+    at, sender, path, interface, member, _, body = record
+    return (
+        time.strftime("%H:%M:%S", time.localtime(at))
+        + f".{int(at * 1000) % 1000:03d} {sender} {path} "
+        + f"{interface}.{member} "
+        + " ".join(format_value(value) for value in body)
+    )
+
+
+class RingBuffer:
+    """The latest capacity records, addressed by the sequence number of
+    their arrival."""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        # NOTE: Sequence number of the next record.
+        self.end = 0
+        self._records: list[typing.Optional[Record]] = [None] * capacity
+
+    def __len__(self) -> int:
+        return min(self.end, self.capacity)
+
+    @property
+    def start(self) -> int:
+        return max(self.end - self.capacity, 0)
+
+    def append(self, record: Record):
+        self._records[self.end % self.capacity] = record
+        self.end += 1
+
+    def read(self, position: int, limit: int) -> tuple[list[Record], int]:
+        """Returns up to limit of the latest records from sequence number
+        position on, and the number of records skipped."""
+
+        start = max(position, self.start, self.end - limit)
+        return [
+            typing.cast(Record, self._records[index % self.capacity])
+            for index in range(start, self.end)
+        ], start - position
+
+
+class SignalMonitor:
+    """Captures the signals matching a match rule into a ring buffer.
+
+    Receiving a signal only appends a record to the buffer. Readers poll it
+    at their own pace, and records overwritten or skipped before they are
+    read are counted as dropped instead of piling up.
+    """
+
+    def __init__(
+        self,
+        bus_daemon: utils.BusDaemon,
+        service: typing.Optional[str] = None,
+        path: typing.Optional[str] = None,
+        interface: typing.Optional[str] = None,
+        member: typing.Optional[str] = None,
+        capacity: int = 4096,
+    ):
+        self.bus_daemon = bus_daemon
+        self.service = service
+        self.path = path
+        self.interface = interface
+        self.member = member
+        self.match_rule = get_match_rule(
+            type="signal",
+            sender=service,
+            path=path,
+            interface=interface,
+            member=member,
+        )
+
+        self.buffer = RingBuffer(capacity)
+        self.dropped = 0
+
+        # NOTE:
+        # Signals are sent by the unique name owning the service, resolved
+        # when starting and followed through NameOwnerChanged.
+        self._senders: set[str] = set()
+        self.owner_match_rule: typing.Optional[str] = None
+        if service is not None and not service.startswith(":"):
+            self.owner_match_rule = get_match_rule(
+                type="signal",
+                sender="org.freedesktop.DBus",
+                interface="org.freedesktop.DBus",
+                member="NameOwnerChanged",
+                arg0=service,
+            )
+        self._position = 0
+        self._started = False
+
+    @property
+    def received(self) -> int:
+        return self.buffer.end
+
+    async def start(self):
+        if self._started:
+            return
+
+        self.bus_daemon.bus.add_message_handler(self._on_message)
+        self._started = True
+        try:
+            # NOTE: Subscribed first, so that no change of owner is missed.
+            if self.owner_match_rule is not None:
+                await self.bus_daemon.add_match(self.owner_match_rule)
+            if self.service is not None:
+                self._senders.add(self.service)
+                if not self.service.startswith(":"):
+                    self._senders.add(
+                        await self.bus_daemon.call(
+                            "get_name_owner", self.service
+                        )
+                    )
+            await self.bus_daemon.add_match(self.match_rule)
+        except Exception:
+            await self.stop()
+            raise
+
+    async def stop(self):
+        if not self._started:
+            return
+
+        self._started = False
+        self.bus_daemon.bus.remove_message_handler(self._on_message)
+        await self.bus_daemon.remove_match(self.match_rule)
+        if self.owner_match_rule is not None:
+            await self.bus_daemon.remove_match(self.owner_match_rule)
+
+    def _on_message(self, message: dbus_fast.Message):
+        if (
+            message.member == "NameOwnerChanged"
+            and self.owner_match_rule is not None
+            and message.sender == "org.freedesktop.DBus"
+            and message.interface == "org.freedesktop.DBus"
+            and message.body[0] == self.service
+        ):
+            # NOTE: The service restarted, or moved to another connection.
+            self._senders = {self.service}
+            if message.body[2]:
+                self._senders.add(message.body[2])
+
+        # NOTE:
+        # Every message of the connection goes through here, including the
+        # ones matched by the rules of others, drop them as early as possible.
+        if (
+            message.message_type != dbus_fast.MessageType.SIGNAL
+            or (self.member is not None and message.member != self.member)
+            or (
+                self.interface is not None
+                and message.interface != self.interface
+            )
+            or (self.path is not None and message.path != self.path)
+            or (self._senders and message.sender not in self._senders)
+        ):
+            return
+
+        self.buffer.append(
+            (
+                time.time(),
+                message.sender,
+                message.path,
+                message.interface,
+                message.member,
+                message.signature,
+                message.body,
+            )
+        )
+
+    def read(self, limit: int) -> list[Record]:
+        """Returns up to limit of the latest records not read yet, counting
+        the older ones as dropped."""
+
+        records, skipped = self.buffer.read(self._position, limit)
+        self.dropped += skipped
+        self._position = self.buffer.end
+        return records
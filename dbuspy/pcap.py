@@ -0,0 +1,256 @@
+import mmap
+import struct
+import typing
+
+# NOTE:
+# Captures use the classic pcap format with the D-Bus link type, as written
+# by busctl capture: every record holds one message as sent on the wire.
+PCAP_MAGIC = 0xA1B2C3D4
+PCAP_NANOSECOND_MAGIC = 0xA1B23C4D
+PCAP_HEADER = struct.Struct("<IHHiIII")
+RECORD_HEADER = struct.Struct("<IIII")
+LINKTYPE_DBUS = 231
+SNAPLEN = 128 * 1024 * 1024
+
+MESSAGE_TYPES = {
+    1: "method_call",
+    2: "method_return",
+    3: "error",
+    4: "signal",
+}
+
+NO_REPLY_EXPECTED = 0x1
+
+# NOTE: Codes of the header fields, and the signatures of their values.
+HEADER_FIELDS = {
+    1: ("path", "o"),
+    2: ("interface", "s"),
+    3: ("member", "s"),
+    4: ("error_name", "s"),
+    5: ("reply_serial", "u"),
+    6: ("destination", "s"),
+    7: ("sender", "s"),
+    8: ("signature", "g"),
+    9: ("unix_fds", "u"),
+}
+
+FIXED_HEADER_SIZE = 16
+
+
+def align(offset: int, alignment: int) -> int:
+    return (offset + alignment - 1) & -alignment
+
+
+def get_byte_order(data: typing.Union[bytes, bytearray, memoryview], offset=0):
+    return "<" if data[offset] == ord("l") else ">"
+
+
+def get_message_length(
+    data: typing.Union[bytes, bytearray, memoryview], offset: int = 0
+) -> int:
+    """Returns the length of the message starting at offset, given at least
+    its fixed size header."""
+
+    body_length, _, fields_length = struct.unpack_from(
+        get_byte_order(data, offset) + "III", data, offset + 4
+    )
+    return align(FIXED_HEADER_SIZE + fields_length, 8) + body_length
+
+
+class Header:
+    """The header of a message, parsed without unmarshalling its body."""
+
+    def __init__(self):
+        self.message_type = 0
+        self.flags = 0
+        self.serial = 0
+        self.body_offset = 0
+        self.body_length = 0
+        self.path: typing.Optional[str] = None
+        self.interface: typing.Optional[str] = None
+        self.member: typing.Optional[str] = None
+        self.error_name: typing.Optional[str] = None
+        self.reply_serial: typing.Optional[int] = None
+        self.destination: typing.Optional[str] = None
+        self.sender: typing.Optional[str] = None
+        self.signature: typing.Optional[str] = None
+        self.unix_fds: typing.Optional[int] = None
+
+
+_INTEGERS = {
+    "<": (struct.Struct("<I"), struct.Struct("<III")),
+    ">": (struct.Struct(">I"), struct.Struct(">III")),
+}
+
+
+def parse_fields(
+    data: typing.Union[bytes, bytearray, memoryview, mmap.mmap],
+    offset: int = 0,
+) -> tuple[int, int, int, int, int, list]:
+    """Returns the type, flags, serial, body length and body offset of the
+    message starting at offset, and the raw values of its header fields by
+    code: strings as bytes, None for the missing ones.
+
+    Offsets within the message are relative to its start, as alignment is.
+    """
+
+    u32, fixed = _INTEGERS["<" if data[offset] == 108 else ">"]
+    body_length, serial, fields_length = fixed.unpack_from(data, offset + 4)
+
+    fields: list = [None] * 10
+    position = FIXED_HEADER_SIZE
+    end = FIXED_HEADER_SIZE + fields_length
+    while position < end:
+        position = (position + 7) & -8
+        start = offset + position
+        code = data[start]
+        if data[start + 1] != 1:
+            raise ValueError("unexpected header field signature")
+        signature = data[start + 2]
+
+        # NOTE:
+        # Fields are aligned to 8, their values right after their signature
+        # are aligned to 4 already.
+        start += 4
+        if signature == 115 or signature == 111:  # s, o
+            (length,) = u32.unpack_from(data, start)
+            value = data[start + 4 : start + 4 + length]
+            position += 9 + length
+        elif signature == 117:  # u
+            (value,) = u32.unpack_from(data, start)
+            position += 8
+        elif signature == 103:  # g
+            length = data[start]
+            value = data[start + 1 : start + 1 + length]
+            position += 6 + length
+        else:
+            raise ValueError("unexpected header field signature")
+
+        if code < 10:
+            fields[code] = value
+
+    return (
+        data[offset + 1],
+        data[offset + 2],
+        serial,
+        body_length,
+        (end + 7) & -8,
+        fields,
+    )
+
+
+def parse_header(
+    data: typing.Union[bytes, bytearray, memoryview, mmap.mmap],
+    offset: int = 0,
+) -> Header:
+    """Parses the header of the message starting at offset."""
+
+    (
+        message_type,
+        flags,
+        serial,
+        body_length,
+        body_offset,
+        fields,
+    ) = parse_fields(data, offset)
+
+    header = Header()
+    header.message_type = message_type
+    header.flags = flags
+    header.serial = serial
+    header.body_length = body_length
+    header.body_offset = body_offset
+    for code, (name, signature) in HEADER_FIELDS.items():
+        value = fields[code]
+        if value is not None and signature != "u":
+            value = bytes(value).decode(errors="replace")
+        setattr(header, name, value)
+    return header
+
+
+def read_string(
+    data: typing.Union[bytes, bytearray, memoryview],
+    header: Header,
+    offset: int = 0,
+) -> typing.Optional[str]:
+    """Returns the first argument of the body of a message if it is a
+    string, such as the message of an error."""
+
+    if not header.signature or header.signature[0] != "s":
+        return None
+
+    position = offset + header.body_offset
+    (length,) = struct.unpack_from(
+        get_byte_order(data, offset) + "I", data, position
+    )
+    return bytes(data[position + 4 : position + 4 + length]).decode(
+        errors="replace"
+    )
+
+
+def pack_string(value: str, offset: int = 0) -> bytes:
+    """Marshals a string, padded to start at an aligned offset."""
+
+    encoded = value.encode()
+    return (
+        b"\0" * (align(offset, 4) - offset)
+        + struct.pack("<I", len(encoded))
+        + encoded
+        + b"\0"
+    )
+
+
+def build_message(
+    message_type: int,
+    serial: int,
+    flags: int = 0,
+    body: bytes = b"",
+    **fields: typing.Union[str, int],
+) -> bytes:
+    """Marshals a little endian message from its header fields, named as in
+    HEADER_FIELDS, and its body, marshalled already."""
+
+    codes = {name: code for code, (name, _) in HEADER_FIELDS.items()}
+    data = b""
+    for name, value in fields.items():
+        code = codes[name]
+        signature = HEADER_FIELDS[code][1]
+        data += b"\0" * (align(len(data), 8) - len(data))
+        data += bytes([code, 1]) + signature.encode() + b"\0"
+        if signature == "u":
+            data += struct.pack("<I", value)
+        elif signature == "g":
+            encoded = str(value).encode()
+            data += bytes([len(encoded)]) + encoded + b"\0"
+        else:
+            data += pack_string(str(value), len(data))
+
+    message = struct.pack(
+        "<cBBBIII", b"l", message_type, flags, 1, len(body), serial, len(data)
+    )
+    message += data
+    return message + b"\0" * (align(len(message), 8) - len(message)) + body
+
+
+class PcapWriter:
+    """Writes messages to a pcap file, as they are."""
+
+    def __init__(self, file: typing.BinaryIO):
+        self.file = file
+        self.messages = 0
+        self.size = PCAP_HEADER.size
+
+        file.write(
+            PCAP_HEADER.pack(PCAP_MAGIC, 2, 4, 0, 0, SNAPLEN, LINKTYPE_DBUS)
+        )
+
+    def write(self, data: typing.Union[bytes, memoryview], at: float):
+        seconds = int(at)
+        self.file.write(
+            RECORD_HEADER.pack(
+                seconds, int((at - seconds) * 1e6), len(data), len(data)
+            )
+        )
+        self.file.write(data)
+        self.messages += 1
+        self.size += RECORD_HEADER.size + len(data)
@@ -0,0 +1,291 @@
+from . import monitor
+from . import utils
+import ast
+import dbus_fast
+import dbus_fast.errors
+import typing
+
+# NOTE: Properties are looked up by (service, path, interface).
+Key = tuple[str, str, str]
+
+
+def get_match_rule(service: str, path: str, interface: str) -> str:
+    return monitor.get_match_rule(
+        type="signal",
+        sender=service,
+        path=path,
+        interface="org.freedesktop.DBus.Properties",
+        member="PropertiesChanged",
+        arg0=interface,
+    )
+
+
+def format_value(value: typing.Any) -> str:
+    """Formats a value as a Python literal, unwrapping variants, to be
+    edited and parsed back by parse_value."""
+
+    def unwrap(value: typing.Any) -> typing.Any:
+        if isinstance(value, dbus_fast.Variant):
+            return unwrap(value.value)
+        if isinstance(value, dict):
+            return {unwrap(key): unwrap(item) for key, item in value.items()}
+        if isinstance(value, (list, tuple)):
+            return [unwrap(item) for item in value]
+        return value
+
+    return repr(unwrap(value))
+
+
+def parse_value(signature: str, text: str) -> dbus_fast.Variant:
+    """Parses a Python literal into a value of a signature, raising
+    ValueError if it does not fit."""
+
+    try:
+        return dbus_fast.Variant(signature, ast.literal_eval(text.strip()))
+    except dbus_fast.errors.SignatureBodyMismatchError as e:
+        raise ValueError(str(e)) from e
+    except (SyntaxError, ValueError) as e:
+        raise ValueError(f"Invalid literal: {e}") from e
+
+
+class InterfaceProperties:
+    """Values of the properties of an interface of an object.
+
+    Properties invalidated by PropertiesChanged lose their value, and are
+    only fetched again once asked for. The generation grows with every
+    change, so that views redraw only when it moved.
+    """
+
+    def __init__(self):
+        self.values: dict[str, dbus_fast.Variant] = {}
+        self.invalidated: set[str] = set()
+        self.generation = 0
+        # NOTE: Whether every property has been fetched, by GetAll.
+        self.loaded = False
+        self.error: typing.Optional[Exception] = None
+
+    def update(
+        self,
+        changed: dict[str, dbus_fast.Variant],
+        invalidated: typing.Iterable[str] = (),
+    ):
+        self.values.update(changed)
+        self.invalidated.difference_update(changed)
+        for name in invalidated:
+            self.values.pop(name, None)
+            self.invalidated.add(name)
+        self.generation += 1
+
+
+class PropertiesCache:
+    """Values of properties on a bus, fetched with a single GetAll per
+    interface and kept current through PropertiesChanged while watched.
+
+    Entries only live while watched, counted like match rules. Requests are
+    shared through the bus daemon, so that views asking for the same values
+    at once send a single message.
+    """
+
+    def __init__(self, bus_daemon: utils.BusDaemon):
+        self.bus_daemon = bus_daemon
+        self._entries: dict[Key, InterfaceProperties] = {}
+        self._watchers: dict[Key, int] = {}
+        # NOTE:
+        # Signals are sent by the unique name owning a service, resolved
+        # when watching it.
+        self._owners: dict[str, str] = {}
+        # NOTE: Services watched by path and interface, to look signals up.
+        self._services: dict[tuple[str, str], set[str]] = {}
+        self._handler_added = False
+
+    def get_entry(
+        self, service: str, path: str, interface: str
+    ) -> typing.Optional[InterfaceProperties]:
+        return self._entries.get((service, path, interface))
+
+    async def watch(
+        self, service: str, path: str, interface: str
+    ) -> InterfaceProperties:
+        key = (service, path, interface)
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._watchers[key] += 1
+            return entry
+
+        entry = InterfaceProperties()
+        self._entries[key] = entry
+        self._watchers[key] = 1
+        self._services.setdefault((path, interface), set()).add(service)
+
+        if not self._handler_added:
+            self.bus_daemon.bus.add_message_handler(self._on_message)
+            self._handler_added = True
+
+        try:
+            if not service.startswith(":") and service not in self._owners:
+                self._owners[service] = await self.bus_daemon.call(
+                    "get_name_owner", service
+                )
+            # NOTE:
+            # Subscribed before fetching any value, so that no change is
+            # missed in between.
+            await self.bus_daemon.add_match(
+                get_match_rule(service, path, interface)
+            )
+        except Exception:
+            await self.unwatch(service, path, interface)
+            raise
+
+        return entry
+
+    async def unwatch(self, service: str, path: str, interface: str):
+        key = (service, path, interface)
+        if key not in self._watchers:
+            return
+
+        self._watchers[key] -= 1
+        if self._watchers[key] > 0:
+            return
+
+        del self._watchers[key]
+        del self._entries[key]
+        services = self._services[(path, interface)]
+        services.discard(service)
+        if not services:
+            del self._services[(path, interface)]
+        if not any(key[0] == service for key in self._entries):
+            self._owners.pop(service, None)
+
+        await self.bus_daemon.remove_match(
+            get_match_rule(service, path, interface)
+        )
+
+    async def close(self):
+        for key in list(self._watchers):
+            self._watchers[key] = 1
+            await self.unwatch(*key)
+
+        if self._handler_added:
+            self.bus_daemon.bus.remove_message_handler(self._on_message)
+            self._handler_added = False
+
+    async def load(
+        self, service: str, path: str, interface: str
+    ) -> InterfaceProperties:
+        """Returns the values of every property of an interface, fetched with
+        a single GetAll unless watched and fetched already."""
+
+        key = (service, path, interface)
+        entry = self._entries.get(key)
+        if entry is not None and entry.loaded:
+            return entry
+        generation = entry.generation if entry is not None else 0
+
+        try:
+            values = await self.bus_daemon.requests.run(
+                ("GetAll", service, path, interface),
+                lambda: utils.get_dbus_properties(
+                    self.bus_daemon.bus, service, path, interface
+                ),
+            )
+        except Exception as e:
+            if entry is not None and self._entries.get(key) is entry:
+                entry.error = e
+                entry.generation += 1
+            raise
+
+        # NOTE: The entry may have been watched, or unwatched, meanwhile.
+        entry = self._entries.get(key) or InterfaceProperties()
+        if entry.generation != generation:
+            # NOTE: Values changed while in flight are newer than the reply.
+            values = {
+                name: value
+                for name, value in values.items()
+                if name not in entry.values and name not in entry.invalidated
+            }
+        entry.update(values)
+        entry.loaded = True
+        entry.error = None
+        return entry
+
+    async def get(
+        self,
+        service: str,
+        path: str,
+        interface: str,
+        name: str,
+        refresh: bool = False,
+    ) -> dbus_fast.Variant:
+        """Returns the value of a property, fetched with Get unless watched
+        and still valid, or refresh is set."""
+
+        key = (service, path, interface)
+        entry = self._entries.get(key)
+        if not refresh and entry is not None and name in entry.values:
+            return entry.values[name]
+
+        try:
+            value = await self.bus_daemon.requests.run(
+                ("Get", service, path, interface, name),
+                lambda: utils.get_dbus_property(
+                    self.bus_daemon.bus, service, path, interface, name
+                ),
+            )
+        except Exception:
+            # NOTE: Not asked for again until invalidated by another signal.
+            entry = self._entries.get(key)
+            if entry is not None and name in entry.invalidated:
+                entry.invalidated.discard(name)
+                entry.generation += 1
+            raise
+
+        entry = self._entries.get(key)
+        if entry is not None and (refresh or name not in entry.values):
+            entry.update({name: value})
+        return value
+
+    async def set(
+        self,
+        service: str,
+        path: str,
+        interface: str,
+        name: str,
+        value: dbus_fast.Variant,
+    ):
+        await utils.set_dbus_property(
+            self.bus_daemon.bus, service, path, interface, name, value
+        )
+
+        # NOTE:
+        # Services are not bound to emit PropertiesChanged, the value is
+        # fetched again the next time it is asked for.
+        entry = self._entries.get((service, path, interface))
+        if entry is not None:
+            entry.update({}, [name])
+
+    def _on_message(self, message: dbus_fast.Message):
+        # NOTE:
+        # Every message of the connection goes through here, drop the ones
+        # of others as early as possible.
+        if (
+            message.message_type != dbus_fast.MessageType.SIGNAL
+            or message.member != "PropertiesChanged"
+            or message.interface != "org.freedesktop.DBus.Properties"
+            or message.signature != "sa{sv}as"
+        ):
+            return
+
+        interface, changed, invalidated = message.body
+        services = self._services.get((message.path, interface))
+        if not services:
+            return
+
+        for service in services:
+            if (
+                message.sender != service
+                and self._owners.get(service) != message.sender
+            ):
+                continue
+            self._entries[(service, message.path, interface)].update(
+                changed, invalidated
+            )
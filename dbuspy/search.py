@@ -0,0 +1,386 @@
+from . import cache
+from . import crawler
+import bisect
+import heapq
+import re
+import rich.text
+import textual.app
+import textual.binding
+import textual.containers
+import textual.screen
+import textual.timer
+import textual.widgets
+import typing
+
+# NOTE:
+# Entries are (kind, service, object path, interface, member), with the
+# fields a kind does not have left empty.
+Entry = tuple[str, str, str, str, str]
+
+KINDS = ("service", "object", "interface", "method", "property", "signal")
+
+_WORD_PATTERN = re.compile(r"[A-Z]+(?![a-z])|[A-Z]?[a-z]+|[0-9]+")
+
+
+def tokenize(name: str) -> set[str]:
+    """Returns the lowercased words of a name, split on separators and on
+    camel case, along with every dotted, slashed or underscored component
+    as a whole."""
+
+    tokens = set()
+    for component in re.split(r"[./:_\-]+", name):
+        if not component:
+            continue
+        tokens.add(component.lower())
+        for word in _WORD_PATTERN.findall(component):
+            tokens.add(word.lower())
+    return tokens
+
+
+def get_entry_name(entry: Entry) -> str:
+    kind, service, path, interface, member = entry
+    if kind == "service":
+        return service
+    if kind == "object":
+        return path
+    if kind == "interface":
+        return interface
+    return member
+
+
+class SearchIndex:
+    """An inverted index from name tokens to entries.
+
+    Tokens are kept in a sorted list, so that every token starting with a
+    query term is found by bisection. Tokens added or dropped since the last
+    query are merged into that list on the next one. Ids of removed entries
+    are reused, so that services coming and going do not grow the index.
+    """
+
+    def __init__(self):
+        # NOTE:
+        # Bumped on every change, for views to tell whether to query again.
+        self.generation = 0
+
+        self._entries: list[typing.Optional[Entry]] = []
+        self._free_entry_ids: list[int] = []
+        # NOTE:
+        # Ranks of entries packed into integers, shorter names and kinds
+        # listed first in KINDS first, then older entries first.
+        self._ranks: list[int] = []
+        self._entry_ids: dict[Entry, int] = {}
+        self._entries_by_service: dict[str, set[int]] = {}
+        # NOTE: Entries of objects and of their members, by service and path.
+        self._entries_by_object: dict[tuple[str, str], set[int]] = {}
+        self._postings: dict[str, set[int]] = {}
+        # NOTE: Entries whose whole name is a single token, by that token.
+        self._names: dict[str, set[int]] = {}
+        self._tokens: list[str] = []
+        self._new_tokens: list[str] = []
+        # NOTE: Tokens without postings still to be removed from the lists.
+        self._dropped_tokens: set[str] = set()
+
+    def __len__(self) -> int:
+        return len(self._entry_ids)
+
+    def add(self, entry: Entry):
+        if entry in self._entry_ids:
+            return
+
+        name = get_entry_name(entry)
+        if self._free_entry_ids:
+            entry_id = self._free_entry_ids.pop()
+        else:
+            entry_id = len(self._entries)
+            self._entries.append(None)
+            self._ranks.append(0)
+        self._entries[entry_id] = entry
+        self._ranks[entry_id] = (
+            (((len(name) << 3) | KINDS.index(entry[0])) << 32) | entry_id
+        )
+        self._entry_ids[entry] = entry_id
+        self._entries_by_service.setdefault(entry[1], set()).add(entry_id)
+        if entry[0] != "service":
+            self._entries_by_object.setdefault((entry[1], entry[2]), set()).add(
+                entry_id
+            )
+
+        tokens = tokenize(name)
+        for token in tokens:
+            postings = self._postings.get(token)
+            if postings is None:
+                postings = self._postings[token] = set()
+                if token in self._dropped_tokens:
+                    self._dropped_tokens.discard(token)
+                else:
+                    self._new_tokens.append(token)
+            postings.add(entry_id)
+
+        if name.lower() in tokens:
+            self._names.setdefault(name.lower(), set()).add(entry_id)
+
+        self.generation += 1
+
+    def add_service(self, service: str):
+        # NOTE:
+        # Unique names are not worth searching for, and would add a new
+        # token for every connection made to the bus.
+        if service.startswith(":"):
+            return
+        self.add(("service", service, "", "", ""))
+
+    def add_object(
+        self, service: str, path: str, introspection: cache.IndexedNode
+    ):
+        """Adds the entries of an object, replacing the ones of an older
+        introspection of it."""
+
+        entries = [("object", service, path, "", "")]
+        for interface in introspection.interfaces:
+            entries.append(("interface", service, path, interface.name, ""))
+            for kind in cache.MEMBER_KINDS:
+                for member in cache.get_interface_members(interface, kind):
+                    entries.append(
+                        (kind, service, path, interface.name, member.name)
+                    )
+
+        new_entries = set(entries)
+        for entry_id in list(self._entries_by_object.get((service, path), ())):
+            if self._entries[entry_id] not in new_entries:
+                self._remove(entry_id)
+
+        for entry in entries:
+            self.add(entry)
+
+    def remove_object(self, service: str, path: typing.Optional[str]):
+        """Removes the entries of an object, or of every object of a service
+        if path is None, keeping the entry of the service."""
+
+        if path is not None:
+            entry_ids = list(self._entries_by_object.get((service, path), ()))
+        else:
+            entry_ids = [
+                entry_id
+                for entry_id in self._entries_by_service.get(service, ())
+                if self._entries[entry_id][0] != "service"
+            ]
+
+        for entry_id in entry_ids:
+            self._remove(entry_id)
+
+    def remove_service(self, service: str):
+        entry_ids = self._entries_by_service.get(service)
+        if not entry_ids:
+            return
+
+        for entry_id in list(entry_ids):
+            self._remove(entry_id)
+
+    def _remove(self, entry_id: int):
+        entry = self._entries[entry_id]
+        assert entry is not None
+        del self._entry_ids[entry]
+        self._entries[entry_id] = None
+        self._free_entry_ids.append(entry_id)
+
+        for entry_ids, key in (
+            (self._entries_by_service, entry[1]),
+            (self._entries_by_object, (entry[1], entry[2])),
+        ):
+            ids = entry_ids.get(key)
+            if ids is not None:
+                ids.discard(entry_id)
+                if not ids:
+                    del entry_ids[key]
+
+        name = get_entry_name(entry)
+        for token in tokenize(name):
+            postings = self._postings[token]
+            postings.discard(entry_id)
+            if not postings:
+                del self._postings[token]
+                self._dropped_tokens.add(token)
+
+        names = self._names.get(name.lower())
+        if names is not None:
+            names.discard(entry_id)
+            if not names:
+                del self._names[name.lower()]
+
+        self.generation += 1
+
+    def _merge_new_tokens(self):
+        if self._dropped_tokens:
+            dropped = self._dropped_tokens
+            self._tokens = [
+                token for token in self._tokens if token not in dropped
+            ]
+            self._new_tokens = [
+                token for token in self._new_tokens if token not in dropped
+            ]
+            self._dropped_tokens = set()
+
+        if not self._new_tokens:
+            return
+
+        self._tokens = list(
+            heapq.merge(self._tokens, sorted(self._new_tokens))
+        )
+        self._new_tokens = []
+
+    def _find(self, term: str) -> set[int]:
+        entry_ids: set[int] = set()
+
+        index = bisect.bisect_left(self._tokens, term)
+        while index < len(self._tokens) and self._tokens[index].startswith(
+            term
+        ):
+            entry_ids |= self._postings[self._tokens[index]]
+            index += 1
+
+        return entry_ids
+
+    def search(self, query: str, limit: int = 200) -> list[Entry]:
+        """Returns entries whose name has a token starting with every word
+        of the query, exact and short names first."""
+
+        terms = [term.lower() for term in query.split()]
+        if not terms:
+            return []
+
+        self._merge_new_tokens()
+
+        # NOTE: Longer terms tend to match fewer entries, start from them.
+        entry_ids: typing.Optional[set[int]] = None
+        for term in sorted(terms, key=len, reverse=True):
+            found = self._find(term)
+            entry_ids = found if entry_ids is None else entry_ids & found
+            if not entry_ids:
+                return []
+
+        assert entry_ids is not None
+
+        # NOTE: Names equal to a single word query come first.
+        exact = []
+        if len(terms) == 1:
+            exact = sorted(
+                self._names.get(terms[0], set()) & entry_ids,
+                key=self._ranks.__getitem__,
+            )[:limit]
+            entry_ids = entry_ids.difference(exact)
+
+        return [
+            typing.cast(Entry, self._entries[entry_id])
+            for entry_id in exact
+            + heapq.nsmallest(
+                limit - len(exact), entry_ids, key=self._ranks.__getitem__
+            )
+        ]
+
+
+class SearchScreen(textual.screen.Screen[typing.Optional[Entry]]):
+    """Searches the index of a bus, refreshing results while the crawler
+    adds to it. Dismissed with the selected entry."""
+
+    DEFAULT_CSS = """
+    SearchScreen {
+        align: center middle;
+        background: $surface 50%;
+    }
+    SearchScreen > Container {
+        border: round $border;
+        padding: 0 1 0 1;
+        width: 90%;
+        height: 90%;
+    }
+    SearchScreen DataTable {
+        height: 1fr;
+    }
+    """
+    BINDINGS = [
+        textual.binding.Binding("escape", "cancel", "Close"),
+    ]
+
+    QUERY_DELAY = 0.1
+    REFRESH_INTERVAL = 0.5
+
+    def __init__(self, index: SearchIndex, crawler: crawler.Crawler):
+        super().__init__()
+        self.index = index
+        self.crawler = crawler
+        self.search_query = ""
+        self.shown: typing.Optional[tuple[str, int]] = None
+        self.query_timer: typing.Optional[textual.timer.Timer] = None
+
+    def compose(self) -> textual.app.ComposeResult:
+        yield textual.widgets.Footer()
+        with textual.containers.Container():
+            yield textual.widgets.Label(rich.text.Text("Search", style="bold"))
+            yield textual.widgets.Input(
+                placeholder="Service, object path, interface or member name"
+            )
+            yield textual.widgets.Label(id="status")
+            yield textual.widgets.DataTable(cursor_type="row")
+
+    def on_mount(self):
+        table = self.query_one(textual.widgets.DataTable)
+        table.add_column("Kind", key="kind")
+        table.add_column("Service", key="service")
+        table.add_column("Object path", key="path")
+        table.add_column("Interface", key="interface")
+        table.add_column("Member", key="member")
+
+        self.query_one(textual.widgets.Input).focus()
+        self.set_interval(self.REFRESH_INTERVAL, self.update_results)
+        self.update_results()
+
+    def on_input_changed(self, event: textual.widgets.Input.Changed):
+        self.search_query = event.value
+
+        # NOTE: Query once typing pauses.
+        if self.query_timer is not None:
+            self.query_timer.stop()
+        self.query_timer = self.set_timer(self.QUERY_DELAY, self.update_results)
+
+    def on_input_submitted(self):
+        self.query_one(textual.widgets.DataTable).focus()
+
+    def update_results(self):
+        self.query_one("#status", textual.widgets.Label).update(
+            f"{len(self.index)} entries indexed, "
+            f"{self.crawler.objects} objects crawled"
+        )
+
+        shown = (self.search_query, self.index.generation)
+        if shown == self.shown:
+            return
+        self.shown = shown
+
+        table = self.query_one(textual.widgets.DataTable)
+
+        # NOTE:
+        # Results are refreshed while the crawler adds to the index, keep
+        # the cursor on the same result rather than back at the top.
+        selected = None
+        if table.row_count:
+            selected = tuple(table.get_row_at(table.cursor_row))
+        scroll_y = table.scroll_y
+
+        table.clear()
+
+        entries = self.index.search(self.search_query)
+        for entry in entries:
+            table.add_row(*entry)
+
+        if selected in entries:
+            table.scroll_to(y=scroll_y, animate=False, immediate=True)
+            table.move_cursor(row=entries.index(selected), scroll=False)
+
+    def on_data_table_row_selected(
+        self, event: textual.widgets.DataTable.RowSelected
+    ):
+        row = event.data_table.get_row(event.row_key)
+        self.dismiss(typing.cast(Entry, tuple(row)))
+
+    def action_cancel(self):
+        self.dismiss(None)
@@ -0,0 +1,63 @@
+import os
+import time
+import typing
+
+_start = time.perf_counter()
+_marks: list[tuple[str, float]] = []
+
+enabled = False
+
+
+def enable():
+    global enabled
+    enabled = True
+
+
+def mark(phase: str):
+    """Records the end of a startup phase, only the first time it ends."""
+
+    if not enabled:
+        return
+
+    if any(name == phase for name, _ in _marks):
+        return
+
+    _marks.append((phase, time.perf_counter()))
+
+
+def get_interpreter_startup_time() -> typing.Optional[float]:
+    """Returns the time from the start of this process to the import of this
+    module, at the resolution of clock ticks."""
+
+    try:
+        with open("/proc/self/stat") as f:
+            start_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+    except (OSError, IndexError, ValueError):
+        return None
+
+    elapsed = uptime - start_ticks / os.sysconf("SC_CLK_TCK")
+    return max(elapsed - (time.perf_counter() - _start), 0.0)
+
+
+def report() -> str:
+    lines = [f"{'phase':<32} {'duration':>10} {'elapsed':>10}"]
+
+    interpreter_startup_time = get_interpreter_startup_time()
+    if interpreter_startup_time != None:
+        lines.append(
+            f"{'start interpreter':<32} "
+            f"{interpreter_startup_time * 1000:>7.1f} ms {'':>10}"
+        )
+
+    previous = _start
+    for phase, at in _marks:
+        lines.append(
+            f"{phase:<32} "
+            f"{(at - previous) * 1000:>7.1f} ms "
+            f"{(at - _start) * 1000:>7.1f} ms"
+        )
+        previous = at
+
+    return "\n".join(lines)
@@ -0,0 +1,243 @@
+import hashlib
+import mmap
+import os
+import struct
+import threading
+import typing
+import zlib
+
+MAGIC = b"DBuSPY introspection 1\n"
+
+# NOTE:
+# Every record is this header, followed by the compressed XML. The header
+# holds the key, the digest of the XML and the length of the compressed XML.
+RECORD_HEADER = struct.Struct("<16s8sI")
+
+enabled = True
+
+
+def disable():
+    global enabled
+    enabled = False
+
+
+def get_cache_path(*names: str) -> str:
+    cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.join(
+        os.path.expanduser("~"), ".cache"
+    )
+    return os.path.join(cache_home, "dbuspy", *names)
+
+
+def get_default_path() -> str:
+    return get_cache_path("introspection")
+
+
+def get_key(scope: str, identity: str, path: str) -> bytes:
+    """Returns the key of an object, given the bus it is on, the identity of
+    the executable of its owner and its path."""
+
+    return hashlib.blake2b(
+        "\0".join([scope, identity, path]).encode(
+            errors="surrogateescape"
+        ),
+        digest_size=16,
+    ).digest()
+
+
+def get_digest(data: bytes) -> bytes:
+    return hashlib.blake2b(data, digest_size=8).digest()
+
+
+class IntrospectionStore:
+    """Introspection XML persisted across runs in a single append-only file.
+
+    The file is memory-mapped, and only the headers of its records are read
+    when opening it, to index them by key. A record superseding another one
+    of the same key is appended after it. Once the file outgrows max_size, it
+    is rewritten with the latest record of each key, the oldest ones dropped
+    until it fits in half of max_size.
+
+    Methods block on the filesystem, call them from an I/O thread.
+    """
+
+    def __init__(self, path: str, max_size: int = 32 * 1024 * 1024):
+        self.path = path
+        self.max_size = max_size
+
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+
+        self._lock = threading.Lock()
+        self._file: typing.Optional[typing.BinaryIO] = None
+        self._map: typing.Optional[mmap.mmap] = None
+        self._size = 0
+        # NOTE: Offsets, lengths and digests of records, by key.
+        self._index: dict[bytes, tuple[int, int, bytes]] = {}
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def open(self):
+        with self._lock:
+            if self._file is not None:
+                return
+
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+
+            try:
+                if os.path.getsize(self.path) > self.max_size:
+                    self._compact()
+            except FileNotFoundError:
+                pass
+
+            self._file = open(self.path, "a+b")
+            self._map_file()
+            self._index_records()
+
+    def close(self):
+        with self._lock:
+            if self._map is not None:
+                self._map.close()
+                self._map = None
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            self._index.clear()
+
+    def _map_file(self):
+        assert self._file is not None
+
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+
+        self._size = os.fstat(self._file.fileno()).st_size
+        if self._size:
+            self._map = mmap.mmap(
+                self._file.fileno(), self._size, access=mmap.ACCESS_READ
+            )
+
+    def _index_records(self):
+        assert self._file is not None
+
+        if self._map is None or self._map[: len(MAGIC)] != MAGIC:
+            # NOTE: Unknown or empty files are started over.
+            self._file.truncate(0)
+            self._file.write(MAGIC)
+            self._file.flush()
+            self._map_file()
+            return
+
+        self._index.clear()
+        offset = len(MAGIC)
+        while offset + RECORD_HEADER.size <= self._size:
+            key, digest, length = RECORD_HEADER.unpack_from(self._map, offset)
+            if offset + RECORD_HEADER.size + length > self._size:
+                # NOTE: A record cut short by a crash, written over next.
+                break
+            self._index[key] = (offset + RECORD_HEADER.size, length, digest)
+            offset += RECORD_HEADER.size + length
+
+        if offset != self._size:
+            self._file.truncate(offset)
+            self._map_file()
+
+    def _compact(self):
+        records = []
+        with open(self.path, "rb") as f:
+            data = f.read()
+
+        if data[: len(MAGIC)] == MAGIC:
+            latest: dict[bytes, tuple[int, int]] = {}
+            offset = len(MAGIC)
+            while offset + RECORD_HEADER.size <= len(data):
+                key, _, length = RECORD_HEADER.unpack_from(data, offset)
+                end = offset + RECORD_HEADER.size + length
+                if end > len(data):
+                    break
+                latest[key] = (offset, end)
+                offset = end
+
+            # NOTE:
+            # Dictionaries keep keys in the order they were first inserted,
+            # not in the one of their latest records.
+            records = [
+                data[start:end] for start, end in sorted(latest.values())
+            ]
+
+        size = len(MAGIC) + sum(len(record) for record in records)
+        while records and size > self.max_size // 2:
+            size -= len(records.pop(0))
+
+        temporary_path = self.path + ".tmp"
+        with open(temporary_path, "wb") as f:
+            f.write(MAGIC)
+            for record in records:
+                f.write(record)
+        os.replace(temporary_path, self.path)
+
+    def get(self, key: bytes) -> typing.Optional[str]:
+        with self._lock:
+            record = self._index.get(key)
+            if record is None:
+                self.misses += 1
+                return None
+
+            offset, length, _ = record
+            if offset + length > self._size:
+                self._map_file()
+            assert self._map is not None
+
+            try:
+                data = zlib.decompress(self._map[offset : offset + length])
+            except zlib.error:
+                del self._index[key]
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            return data.decode()
+
+    def put(self, key: bytes, xml: str):
+        data = xml.encode()
+        digest = get_digest(data)
+
+        with self._lock:
+            if self._file is None:
+                return
+
+            record = self._index.get(key)
+            if record is not None and record[2] == digest:
+                return
+
+            compressed = zlib.compress(data)
+
+            # NOTE:
+            # The file is opened for appending, a record is written by a
+            # single call so that other instances never interleave with it.
+            self._file.write(
+                RECORD_HEADER.pack(key, digest, len(compressed)) + compressed
+            )
+            self._file.flush()
+            end = self._file.tell()
+
+            self._index[key] = (end - len(compressed), len(compressed), digest)
+            self.writes += 1
+
+
+_default_store: typing.Optional[IntrospectionStore] = None
+
+
+def get_default_store() -> typing.Optional[IntrospectionStore]:
+    """Returns the store shared by all buses, not opened yet, or None if
+    disabled."""
+
+    global _default_store
+
+    if not enabled:
+        return None
+
+    if _default_store is None:
+        _default_store = IntrospectionStore(get_default_path())
+    return _default_store
@@ -0,0 +1,125 @@
+from . import browser
+from . import pcap
+import os
+
+
+def call(serial: int, sender: str, member: str, flags: int = 0) -> bytes:
+    return pcap.build_message(
+        1,
+        serial,
+        flags,
+        path="/a",
+        interface="org.example.Item",
+        member=member,
+        destination=":1.1",
+        sender=sender,
+    )
+
+
+def reply(serial: int, reply_serial: int, destination: str) -> bytes:
+    return pcap.build_message(
+        2,
+        serial,
+        reply_serial=reply_serial,
+        destination=destination,
+        sender=":1.1",
+    )
+
+
+def write_capture(path: str, messages: list[tuple[bytes, float]]):
+    with open(path, "wb") as f:
+        writer = pcap.PcapWriter(f)
+        for message, at in messages:
+            writer.write(message, at)
+
+
+def test_capture_index(tmp_path):
+    capture_path = str(tmp_path / "capture.pcap")
+    index_path = str(tmp_path / "capture.index")
+    write_capture(
+        capture_path,
+        [
+            (call(5, ":1.2", "Ping"), 10.0),
+            (call(5, ":1.3", "Ping"), 10.1),
+            (call(6, ":1.2", "Set", flags=pcap.NO_REPLY_EXPECTED), 10.2),
+            (reply(7, 5, ":1.3"), 10.25),
+            (reply(8, 5, ":1.2"), 10.5),
+            (reply(9, 6, ":1.2"), 10.6),
+        ],
+    )
+
+    capture_index = browser.CaptureIndex(capture_path, index_path)
+    capture_index.open()
+    assert len(capture_index) == 6
+
+    assert capture_index.get_message(0)[7:] == (
+        ":1.2",
+        ":1.1",
+        "/a",
+        "org.example.Item",
+        "Ping",
+        4,
+    )
+    assert capture_index.get_message(1)[-1] == 3
+    assert capture_index.get_message(2)[-1] == -1
+    assert capture_index.get_message(5)[-1] == -1
+    assert abs(capture_index.get_latency(4) - 0.5) < 1e-6
+
+    assert list(capture_index.select()) == list(range(6))
+    assert list(capture_index.select(sender=":1.2")) == [0, 2]
+    assert list(capture_index.select(destination=":1.2")) == [4, 5]
+    assert list(capture_index.select(member="Ping", sender=":1.3")) == [1]
+    assert list(capture_index.select(serial="5")) == [0, 1, 3, 4]
+    assert list(capture_index.select(serial="6", sender=":1.1")) == [5]
+    assert list(capture_index.select(interface="org.example.Other")) == []
+
+    row = capture_index.get_row(4)
+    assert row[:5] == ("5", "0.500000", "method_return", "8", "5")
+    assert row[-1] == "500.000 ms"
+    capture_index.close()
+
+    # NOTE: Opened again from the index, until the capture changes.
+    mtime = os.stat(index_path).st_mtime_ns
+    capture_index = browser.CaptureIndex(capture_path, index_path)
+    capture_index.open()
+    assert os.stat(index_path).st_mtime_ns == mtime
+    assert list(capture_index.select(member="Set")) == [2]
+    capture_index.close()
+
+    with open(capture_path, "ab") as f:
+        f.write(b"\0" * 4)
+    capture_index = browser.CaptureIndex(capture_path, index_path)
+    capture_index.open()
+    assert os.stat(index_path).st_mtime_ns != mtime
+    assert len(capture_index) == 6
+    capture_index.close()
+
+
+def test_capture_index_empty(tmp_path):
+    capture_path = tmp_path / "capture.pcap"
+    capture_path.write_bytes(b"")
+
+    capture_index = browser.CaptureIndex(
+        str(capture_path), str(tmp_path / "capture.index")
+    )
+    try:
+        capture_index.open()
+    except ValueError:
+        pass
+    else:
+        assert False
+    assert capture_index._capture_file is None
+
+
+def test_parse_filters():
+    assert browser.parse_filters("sender=:1.2  serial=3") == {
+        "sender": ":1.2",
+        "serial": "3",
+    }
+    for query in ("Ping", "path=/a", "serial=x"):
+        try:
+            browser.parse_filters(query)
+        except ValueError:
+            pass
+        else:
+            assert False, query
@@ -0,0 +1,59 @@
+from . import bustop
+from .test_browser import call
+from .test_browser import reply
+
+
+def test_counter():
+    counter = bustop.Counter(100)
+    for _ in range(10):
+        counter.add(100, 50)
+    counter.add(105, 100)
+    for latency in [1e-3] * 98 + [1.0] * 2:
+        counter.add_latency(105, latency)
+
+    assert counter.get_rates(105, 10.0) == (1.1, 60.0)
+    p50, p90, p99 = counter.get_percentiles(105)
+    assert 0.8e-3 < p50 < 1.2e-3
+    assert p90 == p50
+    assert 0.8 < p99 < 1.2
+
+    # NOTE: Seconds out of the window are not counted any more.
+    assert counter.get_rates(112, 10.0) == (0.1, 10.0)
+    counter.add(115, 10)
+    assert counter.get_rates(115, 10.0) == (0.1, 1.0)
+    assert counter.get_percentiles(115) == [None, None, None]
+    assert counter.total == 12
+
+
+def test_bus_statistics():
+    statistics = bustop.BusStatistics("")
+    statistics.started_at = 100.0
+    statistics.on_message(memoryview(call(5, ":1.2", "Ping")), 100.0)
+    statistics.on_message(memoryview(call(6, ":1.2", "Ping")), 100.5)
+    statistics.on_message(memoryview(reply(7, 5, ":1.2")), 100.25)
+
+    assert {
+        group: {
+            key: counter.total for key, counter in counters.items()
+        }
+        for group, counters in statistics.counters.items()
+    } == {
+        "sender": {b":1.2": 2, b":1.1": 1},
+        "destination": {b":1.1": 2, b":1.2": 1},
+        "interface": {b"org.example.Item": 3},
+        "member": {b"Ping": 3},
+    }
+
+    member = statistics.counters["member"][b"Ping"]
+    p50, _, _ = member.get_percentiles(100)
+    assert 0.2 < p50 < 0.3
+    assert statistics.counters["sender"][b":1.1"].latencies is None
+    assert list(statistics._calls) == [(b":1.2", 6)]
+
+    rows = statistics.get_rows("sender", 1, 3, now=101.0)
+    assert [row[0] for row in rows] == [":1.2"]
+
+    # NOTE: Keys without messages in the window are forgotten.
+    statistics.on_message(memoryview(call(8, ":1.3", "Ping")), 105.0)
+    assert statistics.get_rows("sender", 10, 3, now=112.0)[0][0] == ":1.3"
+    assert list(statistics.counters["sender"]) == [b":1.3"]
@@ -0,0 +1,208 @@
+from . import cache
+from . import store
+from . import utils
+import asyncio
+import dbus_fast
+
+
+class FakeBus:
+    def __init__(self):
+        self.unique_name = ":1.0"
+        self.connected = True
+        self.calls = []
+        self.xml = '<node><node name="child"/></node>'
+
+    async def call(self, message: dbus_fast.Message) -> dbus_fast.Message:
+        self.calls.append((message.destination, message.path))
+        return dbus_fast.Message(
+            message_type=dbus_fast.MessageType.METHOD_RETURN,
+            reply_serial=1,
+            signature="s",
+            body=[self.xml],
+        )
+
+
+def test_get_object_path_ancestors():
+    assert cache.get_object_path_ancestors("/") == []
+    assert cache.get_object_path_ancestors("/a") == ["/"]
+    assert cache.get_object_path_ancestors("/a/b/c") == ["/a/b", "/a", "/"]
+
+
+def test_introspection_cache():
+    async def run():
+        bus = FakeBus()
+        introspection_cache = cache.IntrospectionCache(
+            utils.BusDaemon(bus), max_entries=2
+        )
+
+        first = await introspection_cache.introspect(":1.1", "/a")
+        assert await introspection_cache.introspect(":1.1", "/a") is first
+        assert [node.name for node in first.nodes] == ["child"]
+        assert len(bus.calls) == 1
+
+        await introspection_cache.introspect(":1.1", "/")
+        await introspection_cache.introspect(":1.2", "/")
+        assert len(bus.calls) == 3
+
+        # NOTE: "/a" of ":1.1" is the least recently used one.
+        await introspection_cache.introspect(":1.1", "/a")
+        assert len(bus.calls) == 4
+
+        introspection_cache.invalidate(":1.1", "/a/b")
+        await introspection_cache.introspect(":1.1", "/a")
+        assert len(bus.calls) == 5
+        await introspection_cache.introspect(":1.2", "/")
+        assert len(bus.calls) == 5
+
+        introspection_cache.invalidate(":1.2")
+        await introspection_cache.introspect(":1.2", "/")
+        assert len(bus.calls) == 6
+
+    asyncio.run(run())
+
+
+def test_introspection_cache_name_owner_changed():
+    async def run():
+        bus = FakeBus()
+        introspection_cache = cache.IntrospectionCache(utils.BusDaemon(bus))
+
+        await introspection_cache.introspect(":1.1", "/")
+        introspection_cache._on_message(
+            dbus_fast.Message(
+                message_type=dbus_fast.MessageType.SIGNAL,
+                sender="org.freedesktop.DBus",
+                path="/org/freedesktop/DBus",
+                interface="org.freedesktop.DBus",
+                member="NameOwnerChanged",
+                signature="sss",
+                body=[":1.1", ":1.1", ""],
+            )
+        )
+        await introspection_cache.introspect(":1.1", "/")
+        assert len(bus.calls) == 2
+
+    asyncio.run(run())
+
+
+def test_introspection_cache_concurrent_requests():
+    async def run():
+        bus = FakeBus()
+        introspection_cache = cache.IntrospectionCache(utils.BusDaemon(bus))
+
+        results = await asyncio.gather(
+            *[introspection_cache.introspect(":1.1", "/") for _ in range(4)]
+        )
+        await introspection_cache.introspect(":1.1", "/")
+        assert len(bus.calls) == 1
+        assert introspection_cache.bus_daemon.requests.saved == 3
+        assert all(result is results[0] for result in results)
+        assert list(introspection_cache.get_objects()) == [
+            (":1.1", "/", results[0])
+        ]
+
+    asyncio.run(run())
+
+
+def test_interface_table():
+    interface_table = cache.InterfaceTable()
+
+    def xml(path: str) -> str:
+        return f"""
+        <node name="{path}">
+          <interface name="org.example.Item">
+            <method name="Set"><arg type="s" direction="in"/></method>
+            <method name="Get"><arg type="s" direction="out"/></method>
+            <property name="Number" type="i" access="read"/>
+          </interface>
+          <interface name="org.example.Other"/>
+          <node name="child"/>
+        </node>
+        """
+
+    first = interface_table.parse(xml("/a"))
+    second = interface_table.parse(xml("/b"))
+
+    assert first.name == "/a" and second.name == "/b"
+    assert [node.name for node in first.nodes] == ["child"]
+    assert first.interfaces[0] is second.interfaces[0]
+    assert first.interfaces[1] is second.interfaces[1]
+    assert [method.name for method in first.interfaces[0].methods] == [
+        "Get",
+        "Set",
+    ]
+    assert interface_table.hits == 2 and interface_table.misses == 2
+
+    assert first.get_interface("org.example.Item") is first.interfaces[0]
+    assert first.get_interface("org.example.Missing") is None
+    assert (
+        first.get_member("org.example.Item", "method", "Set")
+        is first.interfaces[0].methods[1]
+    )
+    assert (
+        second.get_member("org.example.Item", "property", "Number")
+        is first.interfaces[0].properties[0]
+    )
+    assert first.get_member("org.example.Item", "signal", "Set") is None
+    assert first.get_member("org.example.Other", "method", "Set") is None
+    assert len(interface_table) == 2
+
+    del first, second
+    assert len(interface_table) == 0
+
+
+def test_introspection_cache_store(tmp_path):
+    async def run():
+        introspection_store = store.IntrospectionStore(
+            str(tmp_path / "introspection")
+        )
+
+        def create_cache(bus: FakeBus) -> cache.IntrospectionCache:
+            introspection_cache = cache.IntrospectionCache(
+                utils.BusDaemon(bus),
+                introspection_store=introspection_store,
+                scope="session",
+            )
+            introspection_cache.REVALIDATION_INTERVAL = 0
+            introspection_cache._identities[":1.1"] = "identity"
+            return introspection_cache
+
+        bus = FakeBus()
+        await create_cache(bus).introspect(":1.1", "/")
+        await asyncio.sleep(0.1)
+        assert introspection_store.writes == 1
+
+        # NOTE:
+        # Another run shows the stored result at once, then finds the object
+        # changed when introspecting it again.
+        bus = FakeBus()
+        bus.xml = "<node/>"
+        introspection_cache = create_cache(bus)
+        outdated = []
+        introspection_cache.outdated_listeners.append(
+            lambda service, path, introspection: outdated.append(
+                introspection
+            )
+        )
+
+        introspection = await introspection_cache.introspect(":1.1", "/")
+        assert [node.name for node in introspection.nodes] == ["child"]
+        assert introspection_cache.store_hits == 1
+        assert bus.calls == []
+
+        await asyncio.sleep(0.1)
+        assert len(bus.calls) == 1
+        assert len(outdated) == 1 and outdated[0].nodes == []
+        assert (
+            await introspection_cache.introspect(":1.1", "/") is outdated[0]
+        )
+        assert introspection_store.writes == 2
+
+        # NOTE: Invalidated objects are not read from the store any more.
+        introspection_cache.invalidate(":1.1", "/")
+        await introspection_cache.introspect(":1.1", "/")
+        assert introspection_cache.store_hits == 1
+        assert len(bus.calls) == 2
+
+        introspection_store.close()
+
+    asyncio.run(run())
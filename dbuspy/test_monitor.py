@@ -0,0 +1,107 @@
+from . import monitor
+from . import utils
+import dbus_fast
+
+
+class FakeBus:
+    def __init__(self):
+        self.unique_name = ":1.0"
+        self.connected = True
+
+
+def signal(member: str, value: int, sender: str = ":1.1") -> dbus_fast.Message:
+    return dbus_fast.Message(
+        message_type=dbus_fast.MessageType.SIGNAL,
+        sender=sender,
+        path="/a",
+        interface="org.example.Item",
+        member=member,
+        signature="u",
+        body=[value],
+    )
+
+
+def test_get_match_rule():
+    assert (
+        monitor.get_match_rule(type="signal", sender=None, path="/a")
+        == "type='signal',path='/a'"
+    )
+
+
+def test_format_value():
+    assert (
+        monitor.format_value(
+            {"a": dbus_fast.Variant("as", ["x"]), "b": dbus_fast.Variant("u", 1)}
+        )
+        == "{'a': ['x'], 'b': 1}"
+    )
+    assert monitor.format_value("x" * 10, limit=5) == "'xxx…"
+
+
+def test_ring_buffer():
+    buffer = monitor.RingBuffer(4)
+    for i in range(6):
+        buffer.append((float(i), "", "", "", "", "", []))
+
+    assert len(buffer) == 4 and buffer.start == 2
+
+    records, skipped = buffer.read(0, 10)
+    assert [record[0] for record in records] == [2.0, 3.0, 4.0, 5.0]
+    assert skipped == 2
+
+    records, skipped = buffer.read(3, 2)
+    assert [record[0] for record in records] == [4.0, 5.0]
+    assert skipped == 1
+
+
+def test_signal_monitor():
+    signal_monitor = monitor.SignalMonitor(
+        utils.BusDaemon(FakeBus()),
+        path="/a",
+        interface="org.example.Item",
+        member="Changed",
+        capacity=8,
+    )
+    assert signal_monitor.match_rule == (
+        "type='signal',path='/a',interface='org.example.Item',member='Changed'"
+    )
+
+    for i in range(4):
+        signal_monitor._on_message(signal("Changed", i))
+        signal_monitor._on_message(signal("Other", i))
+
+    records = signal_monitor.read(100)
+    assert [record[6] for record in records] == [[0], [1], [2], [3]]
+    assert signal_monitor.received == 4 and signal_monitor.dropped == 0
+
+    # NOTE: Records overwritten or over the limit are dropped.
+    for i in range(20):
+        signal_monitor._on_message(signal("Changed", i))
+
+    records = signal_monitor.read(2)
+    assert [record[6] for record in records] == [[18], [19]]
+    assert signal_monitor.dropped == 18
+    assert signal_monitor.read(2) == []
+
+
+def test_signal_monitor_owner_changed():
+    signal_monitor = monitor.SignalMonitor(
+        utils.BusDaemon(FakeBus()), service="org.example.Test"
+    )
+    signal_monitor._senders = {"org.example.Test", ":1.1"}
+
+    signal_monitor._on_message(
+        dbus_fast.Message(
+            message_type=dbus_fast.MessageType.SIGNAL,
+            sender="org.freedesktop.DBus",
+            path="/org/freedesktop/DBus",
+            interface="org.freedesktop.DBus",
+            member="NameOwnerChanged",
+            signature="sss",
+            body=["org.example.Test", ":1.1", ":1.5"],
+        )
+    )
+    signal_monitor._on_message(signal("Changed", 1))
+    signal_monitor._on_message(signal("Changed", 2, sender=":1.5"))
+
+    assert [record[6] for record in signal_monitor.read(10)] == [[2]]
@@ -0,0 +1,136 @@
+from . import capture
+from . import pcap
+import dbus_fast
+import io
+import socket
+import threading
+
+
+def marshall(**kwargs) -> bytes:
+    return dbus_fast.Message(serial=7, **kwargs)._marshall(False)
+
+
+def test_parse_header():
+    data = b"\0" * 3 + marshall(
+        message_type=dbus_fast.MessageType.ERROR,
+        destination=":1.2",
+        error_name="org.example.Error.Failed",
+        reply_serial=3,
+        signature="s",
+        body=["failed"],
+    )
+
+    assert pcap.get_message_length(data, 3) == len(data) - 3
+
+    header = pcap.parse_header(data, 3)
+    assert pcap.MESSAGE_TYPES[header.message_type] == "error"
+    assert header.serial == 7
+    assert header.reply_serial == 3
+    assert header.destination == ":1.2"
+    assert header.error_name == "org.example.Error.Failed"
+    assert header.path is None
+    assert pcap.read_string(data, header, 3) == "failed"
+
+    header = pcap.parse_header(
+        marshall(path="/a", interface="org.example.Item", member="Ping")
+    )
+    assert pcap.MESSAGE_TYPES[header.message_type] == "method_call"
+    assert (header.path, header.interface, header.member) == (
+        "/a",
+        "org.example.Item",
+        "Ping",
+    )
+    assert header.signature is None
+
+
+def test_build_message():
+    # NOTE: Marshalled the same as dbus_fast does.
+    assert pcap.build_message(
+        1,
+        7,
+        body=pcap.pack_string("x"),
+        path="/a",
+        interface="org.example.Item",
+        member="Ping",
+        destination="org.freedesktop.DBus",
+        signature="s",
+    ) == marshall(
+        destination="org.freedesktop.DBus",
+        path="/a",
+        interface="org.example.Item",
+        member="Ping",
+        signature="s",
+        body=["x"],
+    )
+
+
+def test_pcap_writer():
+    message = marshall(path="/a", interface="org.example.Item", member="Ping")
+
+    f = io.BytesIO()
+    writer = pcap.PcapWriter(f)
+    writer.write(message, 12.5)
+
+    data = f.getvalue()
+    assert writer.size == len(data)
+    assert pcap.PCAP_HEADER.unpack_from(data)[-1] == pcap.LINKTYPE_DBUS
+    assert pcap.RECORD_HEADER.unpack_from(data, pcap.PCAP_HEADER.size) == (
+        12,
+        500000,
+        len(message),
+        len(message),
+    )
+    assert data[pcap.PCAP_HEADER.size + pcap.RECORD_HEADER.size :] == message
+
+
+def test_capture_record():
+    small = marshall(path="/a", interface="org.example.Item", member="Ping")
+    large = marshall(
+        path="/a",
+        interface="org.example.Item",
+        member="Set",
+        signature="s",
+        body=["x" * 5000],
+    )
+    name_lost = marshall(
+        message_type=dbus_fast.MessageType.SIGNAL,
+        destination=":1.5",
+        path="/org/freedesktop/DBus",
+        interface="org.freedesktop.DBus",
+        member="NameLost",
+        signature="s",
+        body=[":1.5"],
+    )
+
+    sender, receiver = socket.socketpair()
+
+    def send():
+        sender.sendall(small[10:] + large + small)
+        sender.close()
+
+    thread = threading.Thread(target=send)
+    thread.start()
+
+    # NOTE: Smaller than the large message, which has to grow the buffer.
+    method_capture = capture.Capture("", "", [])
+    method_capture.BUFFER_SIZE = 1024
+    # NOTE: Received along with the reply to BecomeMonitor.
+    method_capture._pending = name_lost + small[:10]
+    f = io.BytesIO()
+    method_capture._writer = pcap.PcapWriter(f)
+    with receiver:
+        method_capture._receive(receiver, b":1.5")
+    thread.join()
+
+    data = f.getvalue()
+    offset = pcap.PCAP_HEADER.size
+    messages = []
+    while offset < len(data):
+        length = pcap.RECORD_HEADER.unpack_from(data, offset)[2]
+        offset += pcap.RECORD_HEADER.size
+        messages.append(data[offset : offset + length])
+        offset += length
+
+    assert method_capture.messages == 3
+    assert method_capture.size == len(small) * 2 + len(large)
+    assert messages == [small, large, small]
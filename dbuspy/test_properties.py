@@ -0,0 +1,138 @@
+from . import properties
+from . import utils
+import asyncio
+import dbus_fast
+
+
+class FakeBus:
+    def __init__(self):
+        self.unique_name = ":1.0"
+        self.connected = True
+        self.calls = []
+        self.handlers = []
+
+    def add_message_handler(self, handler):
+        self.handlers.append(handler)
+
+    def remove_message_handler(self, handler):
+        self.handlers.remove(handler)
+
+    async def call(self, message: dbus_fast.Message) -> dbus_fast.Message:
+        self.calls.append(message.member)
+        if message.member == "GetAll":
+            signature = "a{sv}"
+            body = [
+                {
+                    "A": dbus_fast.Variant("u", 1),
+                    "B": dbus_fast.Variant("s", "b"),
+                }
+            ]
+        else:
+            signature = "v"
+            body = [dbus_fast.Variant("u", 3)]
+        return dbus_fast.Message(
+            message_type=dbus_fast.MessageType.METHOD_RETURN,
+            reply_serial=1,
+            signature=signature,
+            body=body,
+        )
+
+
+class FakeProxy:
+    def __init__(self):
+        self.match_rules = []
+
+    async def call_get_name_owner(self, name: str) -> str:
+        return ":1.1"
+
+    async def call_add_match(self, match_rule: str):
+        self.match_rules.append(match_rule)
+
+    async def call_remove_match(self, match_rule: str):
+        self.match_rules.remove(match_rule)
+
+
+def properties_changed(
+    sender: str, changed: dict, invalidated: list[str]
+) -> dbus_fast.Message:
+    return dbus_fast.Message(
+        message_type=dbus_fast.MessageType.SIGNAL,
+        sender=sender,
+        path="/a",
+        interface="org.freedesktop.DBus.Properties",
+        member="PropertiesChanged",
+        signature="sa{sv}as",
+        body=["org.example.Item", changed, invalidated],
+    )
+
+
+def test_parse_value():
+    value = properties.parse_value("a(si)", "[('a', 1)]")
+    assert value == dbus_fast.Variant("a(si)", [("a", 1)])
+    assert properties.format_value(value) == "[['a', 1]]"
+    assert properties.format_value(
+        dbus_fast.Variant("a{sv}", {"a": dbus_fast.Variant("u", 1)})
+    ) == "{'a': 1}"
+
+    for text in ("x", "'x'", "[1"):
+        try:
+            properties.parse_value("u", text)
+        except ValueError:
+            pass
+        else:
+            assert False, text
+
+
+def test_properties_cache():
+    async def run():
+        bus = FakeBus()
+        bus_daemon = utils.BusDaemon(bus)
+        proxy = FakeProxy()
+        bus_daemon._proxy = proxy
+        bus_daemon._proxy_unique_name = bus.unique_name
+        properties_cache = properties.PropertiesCache(bus_daemon)
+        key = ("org.example.Test", "/a", "org.example.Item")
+
+        entry = await properties_cache.watch(*key)
+        assert await properties_cache.watch(*key) is entry
+        assert proxy.match_rules == [properties.get_match_rule(*key)]
+
+        # NOTE: A single GetAll, shared by the loads in flight.
+        await asyncio.gather(
+            properties_cache.load(*key), properties_cache.load(*key)
+        )
+        await properties_cache.load(*key)
+        assert bus.calls == ["GetAll"]
+        assert entry.values["A"].value == 1
+
+        generation = entry.generation
+        for handler in bus.handlers:
+            handler(
+                properties_changed(
+                    ":1.1", {"A": dbus_fast.Variant("u", 2)}, ["B"]
+                )
+            )
+            # NOTE: Sent by another owner.
+            handler(
+                properties_changed(":1.2", {"B": dbus_fast.Variant("s", "")}, [])
+            )
+        assert entry.generation == generation + 1
+        assert entry.values["A"].value == 2
+        assert "B" not in entry.values and entry.invalidated == {"B"}
+
+        # NOTE: Invalidated values are fetched again once asked for.
+        assert (await properties_cache.get(*key, "A")).value == 2
+        assert (await properties_cache.get(*key, "B")).value == 3
+        assert bus.calls == ["GetAll", "Get"]
+        assert entry.invalidated == set()
+
+        await properties_cache.unwatch(*key)
+        assert properties_cache.get_entry(*key) is entry
+        await properties_cache.unwatch(*key)
+        assert properties_cache.get_entry(*key) is None
+        assert proxy.match_rules == []
+
+        await properties_cache.close()
+        assert bus.handlers == []
+
+    asyncio.run(run())
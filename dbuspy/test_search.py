@@ -0,0 +1,238 @@
+from . import cache
+from . import crawler
+from . import search
+from . import utils
+import asyncio
+import dbus_fast
+
+
+def test_tokenize():
+    assert search.tokenize("GetUnitByPID") == {
+        "getunitbypid",
+        "get",
+        "unit",
+        "by",
+        "pid",
+    }
+    assert search.tokenize("org.freedesktop.DBus") == {
+        "org",
+        "freedesktop",
+        "dbus",
+        "d",
+        "bus",
+    }
+    assert search.tokenize("/org/example/item_12") == {
+        "org",
+        "example",
+        "item",
+        "12",
+    }
+
+
+def test_search_index():
+    interface_table = cache.InterfaceTable()
+    introspection = interface_table.parse(
+        """
+        <node>
+          <interface name="org.freedesktop.systemd1.Manager">
+            <method name="GetUnitByPID"/>
+            <method name="GetUnit"/>
+            <property name="Version" type="s" access="read"/>
+          </interface>
+        </node>
+        """
+    )
+
+    index = search.SearchIndex()
+    index.add_service("org.freedesktop.systemd1")
+    index.add_object(
+        "org.freedesktop.systemd1", "/org/freedesktop/systemd1", introspection
+    )
+
+    assert len(index) == 6
+
+    results = index.search("getunit")
+    assert [entry[4] for entry in results] == ["GetUnit", "GetUnitByPID"]
+    assert results[0] == (
+        "method",
+        "org.freedesktop.systemd1",
+        "/org/freedesktop/systemd1",
+        "org.freedesktop.systemd1.Manager",
+        "GetUnit",
+    )
+
+    assert [entry[4] for entry in index.search("unit by")] == ["GetUnitByPID"]
+    assert [entry[0] for entry in index.search("systemd1")] == [
+        "service",
+        "object",
+        "interface",
+    ]
+    assert index.search("missing") == []
+    assert index.search("") == []
+
+    # NOTE: Introspected again, members gone are not found any more.
+    index.add_object(
+        "org.freedesktop.systemd1",
+        "/org/freedesktop/systemd1",
+        interface_table.parse(
+            """
+            <node>
+              <interface name="org.freedesktop.systemd1.Manager">
+                <method name="GetUnit"/>
+              </interface>
+            </node>
+            """
+        ),
+    )
+    assert len(index) == 4
+    assert [entry[4] for entry in index.search("getunit")] == ["GetUnit"]
+
+    index.remove_object("org.freedesktop.systemd1", None)
+    assert [entry[0] for entry in index.search("systemd1")] == ["service"]
+    index.add_object(
+        "org.freedesktop.systemd1", "/org/freedesktop/systemd1", introspection
+    )
+
+    generation = index.generation
+    index.remove_service("org.freedesktop.systemd1")
+    assert index.generation != generation
+    assert len(index) == 0
+    assert index.search("getunit") == []
+
+    index.add_service("org.freedesktop.systemd1")
+    assert [entry[0] for entry in index.search("systemd1")] == ["service"]
+
+
+class FakeBus:
+    def __init__(self):
+        self.unique_name = ":1.0"
+        self.connected = True
+
+    async def call(self, message: dbus_fast.Message) -> dbus_fast.Message:
+        depth = message.path.count("/") if message.path != "/" else 0
+        children = "".join(
+            f'<node name="{name}"/>' for name in ("a", "b") if depth < 3
+        )
+        return dbus_fast.Message(
+            message_type=dbus_fast.MessageType.METHOD_RETURN,
+            reply_serial=1,
+            signature="s",
+            body=[f"<node>{children}</node>"],
+        )
+
+
+def test_crawler():
+    async def run():
+        introspection_cache = cache.IntrospectionCache(
+            utils.BusDaemon(FakeBus())
+        )
+        index = search.SearchIndex()
+        introspection_cache.listeners.append(index.add_object)
+
+        objects_crawler = crawler.Crawler(introspection_cache, concurrency=3)
+        await objects_crawler.crawl([":1.1"])
+
+        assert objects_crawler.objects == 1 + 2 + 4 + 8
+        assert len(index) == 15
+        assert [entry[2] for entry in index.search("b")][:2] == ["/b", "/a/b"]
+
+        await objects_crawler.crawl([":1.1"])
+        assert objects_crawler.objects == 15
+
+    asyncio.run(run())
+
+
+def test_crawler_priorities():
+    async def run():
+        introspection_cache = cache.IntrospectionCache(
+            utils.BusDaemon(FakeBus())
+        )
+        visited = []
+        introspection_cache.listeners.append(
+            lambda service, path, introspection: visited.append(service)
+        )
+
+        objects_crawler = crawler.Crawler(
+            introspection_cache, concurrency=1, rate=1000.0
+        )
+        objects_crawler.add_services([":1.1", ":1.2"])
+        objects_crawler.prioritize({":1.2": 0, ":1.1": 1})
+        await objects_crawler.run(until_idle=True)
+
+        assert visited == [":1.2"] * 15 + [":1.1"] * 15
+
+    asyncio.run(run())
+
+
+class SlowBus(FakeBus):
+    async def call(self, message: dbus_fast.Message) -> dbus_fast.Message:
+        if message.path == "/a":
+            await asyncio.sleep(1)
+        return await super().call(message)
+
+
+def test_crawler_timeout():
+    async def run():
+        introspection_cache = cache.IntrospectionCache(
+            utils.BusDaemon(SlowBus())
+        )
+        objects_crawler = crawler.Crawler(
+            introspection_cache, rate=1000.0, timeout=0.05
+        )
+        await objects_crawler.crawl([":1.1"])
+
+        # NOTE: Only the object timing out, and its children, are missed.
+        assert objects_crawler.objects == 1 + 1 + 2 + 4
+        assert objects_crawler.skipped_services == set()
+
+        # NOTE: Waiting for work takes no token.
+        tokens = objects_crawler.rate_limiter.tokens
+        task = asyncio.create_task(objects_crawler.run())
+        await asyncio.sleep(0.01)
+        task.cancel()
+        assert objects_crawler.rate_limiter.tokens == tokens
+
+    asyncio.run(run())
+
+
+def test_crawler_cancel():
+    async def run():
+        introspection_cache = cache.IntrospectionCache(
+            utils.BusDaemon(FakeBus())
+        )
+        objects_crawler = crawler.Crawler(introspection_cache, concurrency=2)
+        objects_crawler.add_services([":1.1"])
+
+        task = asyncio.create_task(objects_crawler.run())
+        await asyncio.sleep(0)
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        await asyncio.sleep(0)
+
+        assert not objects_crawler.is_idle()
+
+        await objects_crawler.run(until_idle=True)
+        assert objects_crawler.objects == 15
+
+    asyncio.run(run())
+
+
+def test_search_index_churn():
+    index = search.SearchIndex()
+
+    for i in range(1000):
+        index.add_service(f":1.{i}")
+        index.add_service(f"org.example.Client{i}")
+        index.remove_service(f"org.example.Client{i}")
+        index.search("client")
+
+    index.add_service("org.example.Client")
+    assert [entry[1] for entry in index.search("client")] == [
+        "org.example.Client"
+    ]
+    assert len(index) == 1
+    assert len(index._entries) == 1
+    assert len(index._postings) == len(index._tokens) == 3
@@ -0,0 +1,54 @@
+from . import store
+import os
+
+
+def test_introspection_store(tmp_path):
+    path = str(tmp_path / "introspection")
+    key = store.get_key("system", "identity", "/a")
+    other_key = store.get_key("session", "identity", "/a")
+    assert key != other_key
+
+    introspection_store = store.IntrospectionStore(path)
+    introspection_store.open()
+    assert introspection_store.get(key) is None
+
+    introspection_store.put(key, "<node/>")
+    introspection_store.put(key, "<node/>")
+    assert introspection_store.writes == 1
+    assert introspection_store.get(key) == "<node/>"
+
+    introspection_store.put(key, '<node><node name="a"/></node>')
+    introspection_store.put(other_key, "<node/>")
+    introspection_store.close()
+
+    # NOTE: A record cut short is dropped when opening the file again.
+    with open(path, "ab") as f:
+        f.write(store.RECORD_HEADER.pack(key, b"\0" * 8, 100) + b"x")
+
+    introspection_store = store.IntrospectionStore(path)
+    introspection_store.open()
+    assert len(introspection_store) == 2
+    assert introspection_store.get(key) == '<node><node name="a"/></node>'
+    assert introspection_store.get(other_key) == "<node/>"
+    introspection_store.close()
+
+
+def test_introspection_store_compaction(tmp_path):
+    path = str(tmp_path / "introspection")
+
+    introspection_store = store.IntrospectionStore(path, max_size=4096)
+    introspection_store.open()
+    for i in range(64):
+        introspection_store.put(
+            store.get_key("", "identity", f"/{i}"),
+            f'<node name="{i}">{os.urandom(64).hex()}</node>',
+        )
+    introspection_store.close()
+    assert os.path.getsize(path) > 4096
+
+    introspection_store = store.IntrospectionStore(path, max_size=4096)
+    introspection_store.open()
+    assert os.path.getsize(path) <= 2048
+    assert introspection_store.get(store.get_key("", "identity", "/0")) is None
+    assert introspection_store.get(store.get_key("", "identity", "/63"))
+    introspection_store.close()
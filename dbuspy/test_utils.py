@@ -1,4 +1,7 @@
 from . import utils
+import asyncio
+import os
+import time
 
 
 def test_sort_dbus_services():
@@ -77,3 +80,270 @@ def test_sort_dbus_services():
         assert len(case.input) == len(case.expected)
         for i in range(len(case.input)):
             assert case.input[i] == case.expected[i]
+
+
+def test_parse_bus_address():
+    assert utils.parse_bus_address(
+        "unix:path=/run/a%20b,guid=1;tcp:host=localhost,port=4;"
+    ) == [
+        ("unix", {"path": "/run/a b", "guid": "1"}),
+        ("tcp", {"host": "localhost", "port": "4"}),
+    ]
+    try:
+        utils.parse_bus_address("invalid")
+    except ValueError:
+        pass
+    else:
+        assert False
+
+
+def test_bus_daemon_proxy_cache():
+    class FakeProxyObject:
+        def get_interface(self, name: str):
+            return object()
+
+    class FakeBus:
+        def __init__(self):
+            self.unique_name = ":1.1"
+            self.connected = True
+            self.introspect_count = 0
+
+        async def introspect(self, bus_name: str, path: str):
+            self.introspect_count += 1
+            return None
+
+        def get_proxy_object(self, bus_name: str, path: str, introspection):
+            return FakeProxyObject()
+
+    async def run():
+        bus = FakeBus()
+        bus_daemon = utils.BusDaemon(bus)
+
+        proxies = await asyncio.gather(
+            *[bus_daemon.get_proxy() for _ in range(8)]
+        )
+        assert bus.introspect_count == 1
+        assert all(proxy is proxies[0] for proxy in proxies)
+
+        assert await bus_daemon.get_proxy() is proxies[0]
+        assert bus.introspect_count == 1
+
+        bus.unique_name = ":1.2"
+        assert await bus_daemon.get_proxy() is not proxies[0]
+        assert bus.introspect_count == 2
+
+    asyncio.run(run())
+
+
+def test_managed_objects():
+    managed_objects = utils.ManagedObjects("/org/example")
+
+    assert managed_objects.add("/org/other", ["org.example.A"]) is None
+    assert (
+        managed_objects.add("/org/example/a/b", ["org.example.A"])
+        == "/org/example/a"
+    )
+    assert managed_objects.add("/org/example/a/c", ["org.example.A"]) == (
+        "/org/example/a/c"
+    )
+    assert managed_objects.add("/org/example/a/c", ["org.example.B"]) is None
+
+    introspection = managed_objects.get_introspection("/org/example/a")
+    assert introspection.interfaces == []
+    assert [node.name for node in introspection.nodes] == ["b", "c"]
+
+    introspection = managed_objects.get_introspection("/org/example/a/c")
+    assert [interface.name for interface in introspection.interfaces] == [
+        "org.example.A",
+        "org.example.B",
+    ]
+
+    assert managed_objects.remove("/org/example/a/c", ["org.example.A"]) is None
+    assert (
+        managed_objects.remove("/org/example/a/c", ["org.example.B"])
+        == "/org/example/a/c"
+    )
+    assert (
+        managed_objects.remove("/org/example/a/b", ["org.example.A"])
+        == "/org/example/a"
+    )
+    assert not managed_objects.contains("/org/example/a")
+    assert managed_objects.children["/org/example"] == set()
+
+
+def test_insert_and_remove_dbus_service():
+    services = [
+        "org.freedesktop.DBus",
+        "org.freedesktop.systemd1",
+        ":1.2",
+        ":1.10",
+    ]
+
+    assert utils.insert_dbus_service(services, ":1.9") == 3
+    assert utils.insert_dbus_service(services, "org.freedesktop.login1") == 1
+    assert utils.insert_dbus_service(services, ":1.11") == 6
+    assert utils.insert_dbus_service(services, ":1.2") is None
+    assert services == [
+        "org.freedesktop.DBus",
+        "org.freedesktop.login1",
+        "org.freedesktop.systemd1",
+        ":1.2",
+        ":1.9",
+        ":1.10",
+        ":1.11",
+    ]
+
+    assert utils.remove_dbus_service(services, ":1.10") == 5
+    assert utils.remove_dbus_service(services, ":1.10") is None
+    assert utils.remove_dbus_service(services, "org.freedesktop.DBus") == 0
+    assert services == [
+        "org.freedesktop.login1",
+        "org.freedesktop.systemd1",
+        ":1.2",
+        ":1.9",
+        ":1.11",
+    ]
+
+
+def test_process_info_cache():
+    async def run():
+        process_info_cache = utils.ProcessInfoCache()
+
+        process_info = await process_info_cache.get(os.getpid())
+        assert process_info.pid == os.getpid()
+        assert process_info.parent_pid == os.getppid()
+        assert process_info.cwd == os.getcwd()
+        assert await process_info_cache.get(os.getpid()) is process_info
+
+        parents = await process_info_cache.get_parents(process_info)
+        assert parents[0].pid == os.getppid()
+
+        process_info_cache.add_owner(":1.1", process_info)
+        process_info_cache.add_owner(":1.2", process_info)
+        process_info_cache.forget_owner(":1.1")
+        assert await process_info_cache.get(os.getpid()) is process_info
+        process_info_cache.forget_owner(":1.2")
+        assert await process_info_cache.get(os.getpid()) is not process_info
+
+    asyncio.run(run())
+
+
+def test_io_executor():
+    async def run():
+        io_executor = utils.IOExecutor(max_workers=2, timeout=0.05)
+
+        assert await io_executor.run(os.getpid) == os.getpid()
+
+        results = await io_executor.run_batch(int, ["1", "x", "3"])
+        assert results[0] == 1 and results[2] == 3
+        assert isinstance(results[1], ValueError)
+
+        for _ in range(2):
+            try:
+                await io_executor.run(time.sleep, 1)
+            except asyncio.TimeoutError:
+                pass
+            else:
+                assert False
+
+        # NOTE: Both workers are stuck sleeping, the pool must be replaced.
+        assert io_executor.replaced_pools == 1
+        assert await io_executor.run(os.getpid) == os.getpid()
+
+        process_info_cache = utils.ProcessInfoCache()
+        process_info_cache._hung[os.getpid()] = time.monotonic()
+        try:
+            await process_info_cache.get(os.getpid())
+        except asyncio.TimeoutError:
+            pass
+        else:
+            assert False
+
+    asyncio.run(run())
+
+
+def test_parse_passwd():
+    assert utils.parse_passwd(
+        "\n".join(
+            [
+                "# comment",
+                "root:x:0:0:root:/root:/bin/bash",
+                "",
+                "malformed",
+                "bad:x:not-a-number:0::/:/bin/false",
+                "toor:x:0:0:root:/root:/bin/sh",
+                "  nobody:x:65534:65534::/nonexistent:/usr/sbin/nologin  ",
+            ]
+        )
+    ) == {0: "root", 65534: "nobody"}
+
+
+def test_user_name_resolver(tmp_path):
+    passwd = tmp_path / "passwd"
+    passwd.write_text("alice:x:1000:1000::/home/alice:/bin/sh\n")
+
+    async def run():
+        resolver = utils.UserNameResolver(str(passwd), refresh_interval=0)
+        assert await resolver.get(1000) == "alice"
+
+        passwd.write_text("bob:x:1000:1000::/home/bob:/bin/sh\n")
+        os.utime(passwd, ns=(0, 1))
+        assert await resolver.get(1000) == "bob"
+
+        # NOTE: Slow NSS lookups count as misses, and are not waited again.
+        calls = []
+
+        def get_nss_user_name(uid: int):
+            calls.append(uid)
+            time.sleep(0.2)
+
+        resolver = utils.UserNameResolver(
+            str(passwd), refresh_interval=60, timeout=0.05
+        )
+        resolver._get_nss_user_name = get_nss_user_name
+        assert await resolver.get(2000) is None
+        assert await resolver.get(2000) is None
+        assert calls == [2000]
+
+    asyncio.run(run())
+
+
+def test_single_flight():
+    async def run():
+        requests = utils.SingleFlight()
+        calls = []
+
+        async def request(value: int) -> int:
+            calls.append(value)
+            await asyncio.sleep(0.01)
+            if value < 0:
+                raise ValueError(value)
+            return value
+
+        assert await asyncio.gather(
+            requests.run("a", lambda: request(1)),
+            requests.run("a", lambda: request(2)),
+            requests.run("b", lambda: request(3)),
+        ) == [1, 1, 3]
+        assert calls == [1, 3]
+        assert requests.calls == 2 and requests.saved == 1
+
+        # NOTE: A caller timing out does not cancel the request of others.
+        results = await asyncio.gather(
+            requests.run("a", lambda: request(4), timeout=0.001),
+            requests.run("a", lambda: request(5)),
+            return_exceptions=True,
+        )
+        assert isinstance(results[0], asyncio.TimeoutError)
+        assert results[1] == 4
+
+        results = await asyncio.gather(
+            requests.run("c", lambda: request(-1)),
+            requests.run("c", lambda: request(-1)),
+            return_exceptions=True,
+        )
+        assert all(isinstance(result, ValueError) for result in results)
+
+        assert await requests.run("a", lambda: request(6)) == 6
+
+    asyncio.run(run())
@@ -1,45 +1,485 @@
+import asyncio
+import collections
+import concurrent.futures
 import dbus_fast.aio
 import os
+import pwd
+import time
 import typing
+import urllib.parse
+
+T = typing.TypeVar("T")
+A = typing.TypeVar("A")
+
+
+def get_dbus_service_sort_key(name: str):
+    components = name.split(":")
+    if components[0] == "":
+        return (
+            True,
+            [int(x) for x in str.join("", components[1:]).split(".")],
+            "",
+        )
+    return False, [], components
 
 
 def sort_dbus_services(services: list[str]) -> None:
-    def dbus_service_sort_key(name: str):
-        components = name.split(":")
-        if components[0] == "":
-            return (
-                True,
-                [int(x) for x in str.join("", components[1:]).split(".")],
-                "",
+    list.sort(services, key=get_dbus_service_sort_key)
+
+
+def find_dbus_service(services: list[str], name: str) -> int:
+    """Returns the index where name is or should be inserted in the sorted
+    services."""
+
+    key = get_dbus_service_sort_key(name)
+    low, high = 0, len(services)
+    while low < high:
+        middle = (low + high) // 2
+        if get_dbus_service_sort_key(services[middle]) < key:
+            low = middle + 1
+        else:
+            high = middle
+    return low
+
+
+def insert_dbus_service(
+    services: list[str], name: str
+) -> typing.Optional[int]:
+    index = find_dbus_service(services, name)
+    if index < len(services) and services[index] == name:
+        return None
+    services.insert(index, name)
+    return index
+
+
+def remove_dbus_service(
+    services: list[str], name: str
+) -> typing.Optional[int]:
+    index = find_dbus_service(services, name)
+    if index == len(services) or services[index] != name:
+        return None
+    del services[index]
+    return index
+
+
+class SingleFlight:
+    """Shares the result of a request with the identical ones made while it
+    is in flight, so that a single message is sent for all of them.
+
+    Requests are identical when their keys are equal. A caller cancelled or
+    timing out stops waiting without cancelling the request of the others.
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.saved = 0
+        self._pending: dict[typing.Hashable, asyncio.Future] = {}
+
+    async def run(
+        self,
+        key: typing.Hashable,
+        function: typing.Callable[[], typing.Awaitable[T]],
+        timeout: typing.Optional[float] = None,
+    ) -> T:
+        future = self._pending.get(key)
+        if future is None:
+            self.calls += 1
+            future = asyncio.ensure_future(function())
+            self._pending[key] = future
+            future.add_done_callback(
+                lambda future: self._on_done(key, future)
             )
-        return False, [], components
+        else:
+            self.saved += 1
 
-    list.sort(services, key=dbus_service_sort_key)
+        return await asyncio.wait_for(asyncio.shield(future), timeout)
 
+    def _on_done(self, key: typing.Hashable, future: asyncio.Future):
+        if self._pending.get(key) is future:
+            del self._pending[key]
+
+        # NOTE: Nobody might be waiting for the result any more.
+        if not future.cancelled():
+            future.exception()
+
+
+def get_bus_address(bus_type: dbus_fast.BusType) -> str:
+    """Returns the address of a bus, as the D-Bus specification tells
+    clients to find it."""
+
+    if bus_type == dbus_fast.BusType.SYSTEM:
+        return os.environ.get(
+            "DBUS_SYSTEM_BUS_ADDRESS",
+            "unix:path=/var/run/dbus/system_bus_socket",
+        )
+
+    address = os.environ.get("DBUS_SESSION_BUS_ADDRESS")
+    if address:
+        return address
+    return "unix:path=" + os.path.join(
+        os.environ.get("XDG_RUNTIME_DIR", f"/run/user/{os.getuid()}"), "bus"
+    )
+
+
+def parse_bus_address(address: str) -> list[tuple[str, dict[str, str]]]:
+    """Returns the transports of an address, each with its options, in the
+    order they are to be tried."""
+
+    transports = []
+    for part in address.split(";"):
+        if not part:
+            continue
+        transport, separator, options = part.partition(":")
+        if not separator:
+            raise ValueError(f"invalid bus address {address!r}")
+        transports.append(
+            (
+                transport,
+                {
+                    key: urllib.parse.unquote(value)
+                    for key, _, value in (
+                        option.partition("=")
+                        for option in options.split(",")
+                        if option
+                    )
+                },
+            )
+        )
+    return transports
 
-async def get_bus_proxy_object(
-    bus: dbus_fast.aio.message_bus.MessageBus,
-) -> dbus_fast.aio.proxy_object.ProxyInterface:
-    return bus.get_proxy_object(
-        "org.freedesktop.DBus",
-        "/org/freedesktop/DBus",
-        await bus.introspect(
-            bus_name="org.freedesktop.DBus", path="/org/freedesktop/DBus"
-        ),
-    ).get_interface("org.freedesktop.DBus")
+
+class BusDaemon:
+    """Client of the org.freedesktop.DBus interface of a message bus.
+
+    The proxy is built from a single introspection of the bus daemon and
+    shared by every caller until the connection is re-established.
+    """
+
+    def __init__(
+        self,
+        bus: dbus_fast.aio.message_bus.MessageBus,
+        bus_address: typing.Optional[str] = None,
+    ):
+        self.bus = bus
+        # NOTE: Address to open connections of our own to the bus, if known.
+        self.bus_address = bus_address
+        # NOTE:
+        # Requests to the bus, and to the services on it, sharing the ones
+        # in flight.
+        self.requests = SingleFlight()
+        self._proxy: typing.Optional[
+            dbus_fast.aio.proxy_object.ProxyInterface
+        ] = None
+        self._proxy_unique_name: typing.Optional[str] = None
+        self._proxy_lock = asyncio.Lock()
+        self._match_rules: dict[str, int] = {}
+
+    def _proxy_is_valid(self) -> bool:
+        return (
+            self._proxy is not None
+            and self.bus.connected
+            and self._proxy_unique_name == self.bus.unique_name
+        )
+
+    async def get_proxy(self) -> dbus_fast.aio.proxy_object.ProxyInterface:
+        if self._proxy_is_valid():
+            assert self._proxy is not None
+            return self._proxy
+
+        async with self._proxy_lock:
+            if self._proxy_is_valid():
+                assert self._proxy is not None
+                return self._proxy
+
+            unique_name = self.bus.unique_name
+            introspection = await self.bus.introspect(
+                bus_name="org.freedesktop.DBus", path="/org/freedesktop/DBus"
+            )
+            self._proxy = self.bus.get_proxy_object(
+                "org.freedesktop.DBus",
+                "/org/freedesktop/DBus",
+                introspection,
+            ).get_interface("org.freedesktop.DBus")
+            self._proxy_unique_name = unique_name
+
+            return self._proxy
+
+    async def call(self, method: str, *args) -> typing.Any:
+        """Calls a method of the bus daemon, named as the call_<method>
+        function of its proxy, e.g. "get_name_owner"."""
+
+        async def call():
+            return await getattr(await self.get_proxy(), "call_" + method)(
+                *args
+            )
+
+        return await self.requests.run(
+            ("org.freedesktop.DBus", method, args), call
+        )
+
+    async def add_match(self, match_rule: str) -> None:
+        if self._match_rules.get(match_rule, 0) > 0:
+            self._match_rules[match_rule] += 1
+            return
+
+        self._match_rules[match_rule] = 1
+
+        try:
+            await (await self.get_proxy()).call_add_match(match_rule)
+        except Exception:
+            self._match_rules.pop(match_rule, None)
+            raise
+
+    async def remove_match(self, match_rule: str) -> None:
+        if match_rule not in self._match_rules:
+            return
+
+        self._match_rules[match_rule] -= 1
+        if self._match_rules[match_rule] > 0:
+            return
+
+        del self._match_rules[match_rule]
+
+        if not self.bus.connected:
+            return
+
+        await (await self.get_proxy()).call_remove_match(match_rule)
 
 
 async def list_dbus_services(
-    bus: dbus_fast.aio.message_bus.MessageBus,
+    bus_daemon: BusDaemon,
 ) -> list[str]:
 
-    bus_proxy = await get_bus_proxy_object(bus)
-    services = await bus_proxy.call_list_names()
+    services = list(await bus_daemon.call("list_names"))
     sort_dbus_services(services)
 
     return services
 
 
+def check_dbus_reply(
+    reply: dbus_fast.Message,
+) -> dbus_fast.Message:
+    if reply.message_type == dbus_fast.MessageType.ERROR:
+        raise dbus_fast.DBusError(
+            reply.error_name or "unknown",
+            reply.body[0] if reply.body else "",
+            reply,
+        )
+    return reply
+
+
+async def get_dbus_object_introspection_xml(
+    bus: dbus_fast.aio.message_bus.MessageBus,
+    service: str,
+    path: str,
+    timeout: float = 30.0,
+) -> str:
+    reply = await asyncio.wait_for(
+        bus.call(
+            dbus_fast.Message(
+                destination=service,
+                path=path,
+                interface="org.freedesktop.DBus.Introspectable",
+                member="Introspect",
+            )
+        ),
+        timeout,
+    )
+    return check_dbus_reply(reply).body[0]
+
+
+async def get_dbus_managed_objects(
+    bus: dbus_fast.aio.message_bus.MessageBus,
+    service: str,
+    path: str,
+    timeout: float = 30.0,
+) -> dict[str, dict[str, dict[str, dbus_fast.Variant]]]:
+    reply = await asyncio.wait_for(
+        bus.call(
+            dbus_fast.Message(
+                destination=service,
+                path=path,
+                interface="org.freedesktop.DBus.ObjectManager",
+                member="GetManagedObjects",
+            )
+        ),
+        timeout,
+    )
+    return check_dbus_reply(reply).body[0]
+
+
+async def get_dbus_properties(
+    bus: dbus_fast.aio.message_bus.MessageBus,
+    service: str,
+    path: str,
+    interface: str,
+    timeout: float = 30.0,
+) -> dict[str, dbus_fast.Variant]:
+    reply = await asyncio.wait_for(
+        bus.call(
+            dbus_fast.Message(
+                destination=service,
+                path=path,
+                interface="org.freedesktop.DBus.Properties",
+                member="GetAll",
+                signature="s",
+                body=[interface],
+            )
+        ),
+        timeout,
+    )
+    return check_dbus_reply(reply).body[0]
+
+
+async def get_dbus_property(
+    bus: dbus_fast.aio.message_bus.MessageBus,
+    service: str,
+    path: str,
+    interface: str,
+    name: str,
+    timeout: float = 30.0,
+) -> dbus_fast.Variant:
+    reply = await asyncio.wait_for(
+        bus.call(
+            dbus_fast.Message(
+                destination=service,
+                path=path,
+                interface="org.freedesktop.DBus.Properties",
+                member="Get",
+                signature="ss",
+                body=[interface, name],
+            )
+        ),
+        timeout,
+    )
+    return check_dbus_reply(reply).body[0]
+
+
+async def set_dbus_property(
+    bus: dbus_fast.aio.message_bus.MessageBus,
+    service: str,
+    path: str,
+    interface: str,
+    name: str,
+    value: dbus_fast.Variant,
+    timeout: float = 30.0,
+):
+    reply = await asyncio.wait_for(
+        bus.call(
+            dbus_fast.Message(
+                destination=service,
+                path=path,
+                interface="org.freedesktop.DBus.Properties",
+                member="Set",
+                signature="ssv",
+                body=[interface, name, value],
+            )
+        ),
+        timeout,
+    )
+    check_dbus_reply(reply)
+
+
+def get_object_path_parent(path: str) -> str:
+    return path.rsplit("/", 1)[0] or "/"
+
+
+def join_object_path(parent: str, name: str) -> str:
+    if parent == "/":
+        return "/" + name
+    return parent + "/" + name
+
+
+class ManagedObjects:
+    """Objects reported by the org.freedesktop.DBus.ObjectManager at path.
+
+    Paths between the manager and its objects which are not objects
+    themselves are kept as well, so that the whole subtree can be listed
+    without introspecting it.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.interfaces: dict[str, list[str]] = {}
+        self.children: dict[str, set[str]] = {path: set()}
+
+    def contains(self, path: str) -> bool:
+        return path in self.children
+
+    def is_ancestor_of(self, path: str) -> bool:
+        return path != self.path and path.startswith(
+            join_object_path(self.path, "")
+        )
+
+    def add(
+        self, path: str, interfaces: typing.Iterable[str]
+    ) -> typing.Optional[str]:
+        """Add interfaces to an object, returns the topmost new path."""
+
+        if not self.is_ancestor_of(path):
+            return None
+
+        self.interfaces[path] = sorted(
+            set(self.interfaces.get(path, [])).union(interfaces)
+        )
+
+        created = []
+        while path not in self.children:
+            self.children[path] = set()
+            created.append(path)
+            path = get_object_path_parent(path)
+
+        for path in created:
+            self.children[get_object_path_parent(path)].add(
+                path.rsplit("/", 1)[1]
+            )
+
+        return created[-1] if created else None
+
+    def remove(
+        self, path: str, interfaces: typing.Iterable[str]
+    ) -> typing.Optional[str]:
+        """Remove interfaces from an object, returns the topmost path which
+        is no longer in the subtree."""
+
+        if path not in self.interfaces:
+            return None
+
+        remaining = sorted(set(self.interfaces[path]).difference(interfaces))
+        if remaining:
+            self.interfaces[path] = remaining
+            return None
+
+        del self.interfaces[path]
+
+        topmost = None
+        while (
+            path != self.path
+            and path not in self.interfaces
+            and not self.children[path]
+        ):
+            del self.children[path]
+            parent = get_object_path_parent(path)
+            self.children[parent].discard(path.rsplit("/", 1)[1])
+            topmost = path
+            path = parent
+
+        return topmost
+
+    def get_introspection(self, path: str) -> dbus_fast.introspection.Node:
+        introspection = dbus_fast.introspection.Node(
+            interfaces=[
+                dbus_fast.introspection.Interface(name)
+                for name in self.interfaces.get(path, [])
+            ]
+        )
+        introspection.nodes = [
+            dbus_fast.introspection.Node(name, is_root=False)
+            for name in sorted(self.children.get(path, ()))
+        ]
+        return introspection
+
+
 async def list_dbus_object_children(
     bus: dbus_fast.aio.message_bus.MessageBus, service: str, path: str
 ):
@@ -48,42 +488,526 @@ async def list_dbus_object_children(
 
 
 async def get_dbus_service_pid(
-    bus: dbus_fast.aio.message_bus.MessageBus, service: str
+    bus_daemon: BusDaemon, service: str
 ) -> int:
-    bus_proxy = await get_bus_proxy_object(bus)
-    return await bus_proxy.call_get_connection_unix_process_id(service)
+    return await bus_daemon.call("get_connection_unix_process_id", service)
+
 
+async def get_dbus_service_credentials(
+    bus_daemon: BusDaemon, service: str
+) -> dict[str, typing.Any]:
+    try:
+        credentials = await bus_daemon.call(
+            "get_connection_credentials", service
+        )
+    except (AttributeError, dbus_fast.DBusError) as e:
+        # NOTE:
+        # GetConnectionCredentials is not available before dbus 1.7.
+        if isinstance(e, dbus_fast.DBusError) and (
+            e.type != "org.freedesktop.DBus.Error.UnknownMethod"
+        ):
+            raise
 
-async def get_executable(pid: int) -> typing.Optional[str]:
+        pid, uid = await asyncio.gather(
+            get_dbus_service_pid(bus_daemon, service),
+            get_dbus_service_uid(bus_daemon, service),
+        )
+        return {"ProcessID": pid, "UnixUserID": uid}
+
+    return {
+        key: value.value if isinstance(value, dbus_fast.Variant) else value
+        for key, value in credentials.items()
+    }
+
+
+def get_security_label(label: typing.Optional[bytes]) -> typing.Optional[str]:
+    if label == None:
+        return None
+    return bytes(label).rstrip(b"\0").decode(errors="replace")
+
+
+class IOExecutor:
+    """Runs blocking filesystem reads, such as the ones of /proc, in a
+    bounded thread pool, so that a slow kernel or a hung process never stalls
+    the event loop.
+
+    A thread blocked in a read cannot be interrupted, timing out only stops
+    waiting for it. Once such stuck jobs hold every worker, the pool is
+    replaced by a new one and the stuck threads are left to finish, or not,
+    in the old one.
+    """
+
+    def __init__(self, max_workers: int = 4, timeout: float = 2.0):
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.stuck = 0
+        self.replaced_pools = 0
+        self._executor = self._create_executor()
+
+    def _create_executor(self) -> concurrent.futures.ThreadPoolExecutor:
+        return concurrent.futures.ThreadPoolExecutor(
+            max_workers=self.max_workers,
+            thread_name_prefix="dbuspy-io",
+        )
+
+    async def run(
+        self,
+        function: typing.Callable[..., T],
+        *args,
+        timeout: typing.Optional[float] = None,
+    ) -> T:
+        executor = self._executor
+        future = executor.submit(function, *args)
+
+        try:
+            return await asyncio.wait_for(
+                asyncio.wrap_future(future),
+                timeout if timeout is not None else self.timeout,
+            )
+        except asyncio.TimeoutError:
+            if executor is self._executor and future.running():
+                self._on_stuck(future)
+            raise
+
+    def _on_stuck(self, future: concurrent.futures.Future):
+        self.stuck += 1
+
+        if self.stuck < self.max_workers:
+            loop = asyncio.get_running_loop()
+            executor = self._executor
+
+            def on_done(_):
+                def unstuck():
+                    if self._executor is executor:
+                        self.stuck -= 1
+
+                # NOTE: The loop might be gone when the read returns.
+                try:
+                    loop.call_soon_threadsafe(unstuck)
+                except RuntimeError:
+                    pass
+
+            future.add_done_callback(on_done)
+            return
+
+        self._executor.shutdown(wait=False)
+        self._executor = self._create_executor()
+        self.stuck = 0
+        self.replaced_pools += 1
+
+    async def run_batch(
+        self,
+        function: typing.Callable[[A], T],
+        items: typing.Iterable[A],
+        timeout: typing.Optional[float] = None,
+    ) -> list[typing.Union[T, Exception]]:
+        """Runs function for every item in a single thread pool job."""
+
+        def run_all() -> list[typing.Union[T, Exception]]:
+            results: list[typing.Union[T, Exception]] = []
+            for item in items:
+                try:
+                    results.append(function(item))
+                except Exception as e:
+                    results.append(e)
+            return results
+
+        return await self.run(run_all, timeout=timeout)
+
+
+_io_executor = IOExecutor()
+
+
+async def run_io(
+    function: typing.Callable[..., T],
+    *args,
+    timeout: typing.Optional[float] = None,
+) -> T:
+    return await _io_executor.run(function, *args, timeout=timeout)
+
+
+async def run_io_batch(
+    function: typing.Callable[[A], T],
+    items: typing.Iterable[A],
+    timeout: typing.Optional[float] = None,
+) -> list[typing.Union[T, Exception]]:
+    return await _io_executor.run_batch(function, items, timeout=timeout)
+
+
+def read_process_stat(pid: int) -> tuple[int, int]:
+    """Returns the parent pid and the start time of a process."""
+
+    with open(f"/proc/{pid}/stat") as f:
+        # NOTE:
+        # The command name in the second field may contain spaces and
+        # parentheses, fields after it are counted from its last ")".
+        fields = f.read().rsplit(")", 1)[1].split()
+    return int(fields[1]), int(fields[19])
+
+
+def read_executable(pid: int) -> typing.Optional[str]:
     return os.readlink(f"/proc/{pid}/exe")
 
 
-async def get_command_line(pid: int) -> typing.Optional[list[str]]:
+def read_command_line(pid: int) -> typing.Optional[list[str]]:
     with open(f"/proc/{pid}/cmdline") as f:
         return f.read().split("\0")[:-1]
 
 
+def read_cwd(pid: int) -> typing.Optional[str]:
+    return os.readlink(f"/proc/{pid}/cwd")
+
+
+def read_cgroup(pid: int) -> typing.Optional[str]:
+    with open(f"/proc/{pid}/cgroup") as f:
+        lines = f.read().splitlines()
+
+    # NOTE:
+    # Prefer the unified cgroup v2 hierarchy, whose line is "0::<path>".
+    for line in lines:
+        if line.startswith("0::"):
+            return line[3:]
+    return lines[0].split(":", 2)[2] if lines else None
+
+
+def read_executable_identity(pid: int) -> typing.Optional[str]:
+    """Returns a string identifying the executable of a process and the
+    arguments it was started with, which changes when the executable file is
+    replaced, or None if the executable is not known."""
+
+    command_line = read_command_line(pid) or []
+
+    # NOTE:
+    # The executable of processes of other users is not readable, fall back
+    # to the first argument if it is an absolute path.
+    try:
+        executable = read_executable(pid)
+        stat = os.stat(f"/proc/{pid}/exe")
+    except OSError:
+        if not command_line or not command_line[0].startswith("/"):
+            return None
+        executable = command_line[0]
+        stat = os.stat(executable)
+
+    return "\0".join(
+        [
+            executable or "",
+            str(stat.st_dev),
+            str(stat.st_ino),
+            str(stat.st_mtime_ns),
+        ]
+        + command_line
+    )
+
+
+class ProcessInfo:
+    def __init__(self, pid: int, parent_pid: int, start_time: int):
+        self.pid = pid
+        self.parent_pid = parent_pid
+        self.start_time = start_time
+        self.executable: typing.Optional[str] = None
+        self.command_line: typing.Optional[list[str]] = None
+        self.cwd: typing.Optional[str] = None
+        self.cgroup: typing.Optional[str] = None
+
+
+def read_process_info(
+    pid: int, stat: typing.Optional[tuple[int, int]] = None
+) -> ProcessInfo:
+    process_info = ProcessInfo(pid, *(stat or read_process_stat(pid)))
+
+    # NOTE:
+    # Some of these are not readable for processes of other users.
+    for attribute, read in (
+        ("executable", read_executable),
+        ("command_line", read_command_line),
+        ("cwd", read_cwd),
+        ("cgroup", read_cgroup),
+    ):
+        try:
+            setattr(process_info, attribute, read(pid))
+        except OSError:
+            pass
+
+    return process_info
+
+
+class ProcessInfoCache:
+    """Information about processes, keyed by pid and process start time.
+
+    The start time is read again on every lookup, so that a reused pid never
+    serves the information of an exited process. Entries of processes owning
+    D-Bus names are kept until all their names are forgotten.
+    """
+
+    HUNG_RETRY_INTERVAL = 30.0
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        # NOTE: Pids whose reads timed out, mapped to when they did.
+        self._hung: dict[int, float] = {}
+        self._entries: collections.OrderedDict[
+            tuple[int, int], ProcessInfo
+        ] = collections.OrderedDict()
+        self._owners: dict[str, tuple[int, int]] = {}
+        self._owned: dict[tuple[int, int], set[str]] = {}
+
+    def _read(
+        self,
+        pids: list[int],
+        cached: frozenset[tuple[int, int]],
+        parents: bool = False,
+    ) -> list[typing.Union[ProcessInfo, tuple[int, int], OSError]]:
+        """Runs in an I/O thread. Returns the keys of processes in cached,
+        a snapshot of the keys of the entries, the information of other ones,
+        or the error reading them. With parents, pids[0] is followed up to the
+        root of the process tree instead."""
+
+        results: list[typing.Union[ProcessInfo, tuple[int, int], OSError]]
+        results = []
+
+        pids = list(pids)
+        while pids:
+            pid = pids.pop(0)
+
+            try:
+                stat = read_process_stat(pid)
+            except OSError as e:
+                results.append(e)
+                continue
+
+            key = (pid, stat[1])
+            if key in cached:
+                results.append(key)
+            else:
+                results.append(read_process_info(pid, stat))
+
+            if parents and stat[0] > 0 and len(results) < 64:
+                pids.append(stat[0])
+
+        return results
+
+    def _put(
+        self, result: typing.Union[ProcessInfo, tuple[int, int], OSError]
+    ) -> typing.Optional[ProcessInfo]:
+        if isinstance(result, OSError):
+            return None
+
+        if isinstance(result, tuple):
+            process_info = self._entries.get(result)
+            if process_info is not None:
+                self._entries.move_to_end(result)
+            return process_info
+
+        self._entries[(result.pid, result.start_time)] = result
+
+        for key in list(self._entries):
+            if len(self._entries) <= self.max_entries:
+                break
+            if key in self._owned:
+                continue
+            del self._entries[key]
+
+        return result
+
+    async def _run_read(self, pid: int, *args) -> typing.Any:
+        # NOTE:
+        # Reads of a hung process would only hold another I/O thread, fail
+        # them at once for a while.
+        hung = self._hung.get(pid)
+        if hung is not None:
+            if time.monotonic() - hung < self.HUNG_RETRY_INTERVAL:
+                raise asyncio.TimeoutError()
+            del self._hung[pid]
+
+        try:
+            return await run_io(*args)
+        except asyncio.TimeoutError:
+            self._hung[pid] = time.monotonic()
+            raise
+
+    async def get(self, pid: int) -> ProcessInfo:
+        results = await self._run_read(
+            pid, self._read, [pid], frozenset(self._entries)
+        )
+        if isinstance(results[0], OSError):
+            raise results[0]
+
+        # NOTE:
+        # The entry might have been evicted while the read was in flight.
+        process_info = self._put(results[0])
+        if process_info is None:
+            process_info = await self._run_read(pid, read_process_info, pid)
+            self._put(process_info)
+
+        return process_info
+
+    async def get_parents(self, process_info: ProcessInfo) -> list[ProcessInfo]:
+        if process_info.parent_pid <= 0:
+            return []
+
+        results = await self._run_read(
+            process_info.parent_pid,
+            self._read,
+            [process_info.parent_pid],
+            frozenset(self._entries),
+            True,
+        )
+
+        parents = []
+        for result in results:
+            parent = self._put(result)
+            if parent is None:
+                break
+            parents.append(parent)
+        return parents
+
+    def add_owner(self, owner: str, process_info: ProcessInfo):
+        key = (process_info.pid, process_info.start_time)
+        self.forget_owner(owner)
+        self._owners[owner] = key
+        self._owned.setdefault(key, set()).add(owner)
+
+    def forget_owner(self, owner: str):
+        key = self._owners.pop(owner, None)
+        if key is None:
+            return
+
+        owners = self._owned[key]
+        owners.discard(owner)
+        if owners:
+            return
+
+        del self._owned[key]
+        self._entries.pop(key, None)
+
+
 async def get_dbus_service_uid(
-    bus: dbus_fast.aio.message_bus.MessageBus, service: str
+    bus_daemon: BusDaemon, service: str
 ) -> int:
-    bus_proxy = await get_bus_proxy_object(bus)
-    return await bus_proxy.call_get_connection_unix_user(service)
+    return await bus_daemon.call("get_connection_unix_user", service)
 
 
 async def get_dbus_service_unique_name(
-    bus: dbus_fast.aio.message_bus.MessageBus, service: str
+    bus_daemon: BusDaemon, service: str
 ) -> str:
-    bus_proxy = await get_bus_proxy_object(bus)
-    return await bus_proxy.call_get_name_owner(service)
+    return await bus_daemon.call("get_name_owner", service)
+
+
+def parse_passwd(content: str) -> dict[int, str]:
+    user_names: dict[int, str] = {}
+
+    for line in content.splitlines():
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+
+        parts = line.split(":")
+        if len(parts) < 3:
+            continue
+
+        try:
+            uid = int(parts[2])
+        except ValueError:
+            continue
+
+        # NOTE: Like getpwuid(3), the first entry of an uid wins.
+        user_names.setdefault(uid, parts[0])
+
+    return user_names
+
+
+class UserNameResolver:
+    """Resolves uids to user names without blocking the event loop.
+
+    The passwd file is indexed once and indexed again only when its mtime
+    changes. Uids missing from it are looked up through NSS (LDAP,
+    systemd-homed, ...) in a worker thread, and misses, including lookups
+    timing out, are remembered for negative_ttl seconds.
+    """
+
+    def __init__(
+        self,
+        passwd: str = "/etc/passwd",
+        refresh_interval: float = 1.0,
+        negative_ttl: float = 60.0,
+        timeout: typing.Optional[float] = None,
+    ):
+        self.passwd = passwd
+        self.refresh_interval = refresh_interval
+        self.negative_ttl = negative_ttl
+        self.timeout = timeout
+
+        self._user_names: dict[int, str] = {}
+        self._passwd_mtime: typing.Optional[int] = None
+        self._next_refresh = 0.0
+        self._nss_user_names: dict[int, str] = {}
+        self._nss_misses: dict[int, float] = {}
+
+    def _refresh(self):
+        try:
+            mtime = os.stat(self.passwd).st_mtime_ns
+        except OSError:
+            mtime = None
+
+        if mtime == self._passwd_mtime:
+            return
+
+        user_names = {}
+        if mtime is not None:
+            with open(self.passwd, errors="replace") as f:
+                user_names = parse_passwd(f.read())
+
+        # NOTE:
+        # Run in a worker thread while the event loop reads these, so they
+        # are replaced rather than cleared.
+        self._user_names = user_names
+        self._passwd_mtime = mtime
+        self._nss_user_names = {}
+        self._nss_misses = {}
+
+    @staticmethod
+    def _get_nss_user_name(uid: int) -> typing.Optional[str]:
+        try:
+            return pwd.getpwuid(uid).pw_name
+        except KeyError:
+            return None
+
+    async def get(self, uid: int) -> typing.Optional[str]:
+        if time.monotonic() >= self._next_refresh:
+            self._next_refresh = time.monotonic() + self.refresh_interval
+            try:
+                await run_io(self._refresh, timeout=self.timeout)
+            except (asyncio.TimeoutError, OSError):
+                # NOTE: The index read last, if any, is used meanwhile.
+                pass
+
+        user_name = self._user_names.get(uid) or self._nss_user_names.get(uid)
+        if user_name is not None:
+            return user_name
+
+        if self._nss_misses.get(uid, 0.0) > time.monotonic():
+            return None
+
+        try:
+            user_name = await run_io(
+                self._get_nss_user_name, uid, timeout=self.timeout
+            )
+        except (asyncio.TimeoutError, OSError):
+            user_name = None
+        if user_name is None:
+            self._nss_misses[uid] = time.monotonic() + self.negative_ttl
+            return None
+
+        self._nss_user_names[uid] = user_name
+        return user_name
+
+
+_user_name_resolver = UserNameResolver()
 
 
 async def get_user_name(uid: int) -> typing.Optional[str]:
-    with open("/etc/passwd") as f:
-        for line in f:
-            parts = line.split(":")
-            if int(parts[2]) == uid:
-                return parts[0]
-    return None
+    return await _user_name_resolver.get(uid)
 
 
 def get_textual_tree_node_path(node) -> str: